@@ -0,0 +1,313 @@
+"""
+JSON API computing the SNR of galactic binaries and the sensitivity
+of the noise budgets on /api/v1, the concurrent requests being combined
+in order to evaluate them together
+"""
+
+import concurrent.futures
+import threading
+
+import flask
+import numpy as np
+
+from config_manager import ConfigManager  # pylint: disable=import-error
+import duration_tables  # pylint: disable=import-error
+from noise_cache import (  # pylint: disable=import-error
+    noise_cache,
+    LOG_FREQ_MIN,
+    LOG_FREQ_MAX,
+)
+from shared_arrays import shared_arrays  # pylint: disable=import-error
+from vgb_table import compute_gb_sensitivity  # pylint: disable=import-error
+
+# Constants
+API_PATH = "/api/v1"
+BATCH_DELAY = 0.005  # seconds a request waits for concurrent requests
+BATCH_SIZE = 4096  # rows evaluated together, beyond that a batch is closed
+MAX_ROWS = 100_000  # rows of a request
+SOURCE_FIELDS = [  # parameters of a galactic binary required by the SNR
+    "Frequency",
+    "FrequencyDerivative",
+    "Amplitude",
+    "EclipticLatitude",
+    "EclipticLongitude",
+    "Inclination",
+    "Polarization",
+    "InitialPhase",
+]
+
+conf_manager = ConfigManager("data/configuration.ini")
+
+
+class MicroBatcher:
+    """
+    Evaluate together the rows submitted by concurrent threads with the
+    same key: the first thread of a batch waits BATCH_DELAY for the others,
+    or until the batch holds max_size rows, evaluates the batch and hands
+    each thread its rows of the result.
+
+    The evaluation is a function called with the key and a structured
+    array of the rows, returning a tuple of arrays with one value per row.
+    """
+
+    def __init__(self, evaluate, max_delay=BATCH_DELAY, max_size=BATCH_SIZE):
+        self.evaluate = evaluate
+        self.max_delay = max_delay
+        self.max_size = max_size
+        self._batches = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, rows):
+        """
+        Evaluate rows along with the rows of the concurrent requests
+
+        :param tuple key: key of the rows, only rows with the same key
+            are evaluated together
+        :param array rows: structured array of the rows
+
+        :return tuple: arrays of the result of the rows
+        """
+        future = concurrent.futures.Future()
+
+        with self._lock:
+            batch = self._batches.get(key)
+            leader = batch is None
+            if leader:
+                batch = {"requests": [], "size": 0, "full": threading.Event()}
+                self._batches[key] = batch
+            batch["requests"].append((rows, future))
+            batch["size"] += len(rows)
+            if batch["size"] >= self.max_size:
+                # closed so that the next request starts a new batch
+                self._batches.pop(key, None)
+                batch["full"].set()
+
+        if leader:
+            batch["full"].wait(self.max_delay)
+            with self._lock:
+                if self._batches.get(key) is batch:
+                    del self._batches[key]
+            self.run(key, batch["requests"])
+
+        return future.result()
+
+    def run(self, key, requests):
+        """
+        Evaluate a batch and set the result of each of its requests
+
+        :param tuple key: key of the batch
+        :param list requests: rows and future of each request
+        """
+        try:
+            results = self.evaluate(key, np.concatenate([rows for rows, _ in requests]))
+        except Exception as error:  # pylint: disable=broad-except
+            for _, future in requests:
+                future.set_exception(error)
+            return
+
+        start = 0
+        for rows, future in requests:
+            stop = start + len(rows)
+            future.set_result(tuple(result[start:stop] for result in results))
+            start = stop
+
+
+def evaluate_sources(key, sources):
+    """
+    Compute the sensitivity of galactic binaries
+
+    :param tuple key: noise budget and mission duration
+    :param array sources: galactic binaries
+
+    :return tuple: frequency, sh, characteristic strain and SNR
+    """
+    noise, duration = key
+    freq, sh, snr = compute_gb_sensitivity(sources, noise, duration)
+
+    return freq, sh, np.sqrt(freq * sh), snr
+
+
+def evaluate_points(_key, points):
+    """
+    Interpolate the noise curves of the noise cache at frequency points
+
+    :param tuple _key: unused, points of every configuration are batched
+    :param array points: noise, duration and freq of the points
+
+    :return tuple: characteristic strain and sh of the instrumental
+        noise and of the instrumental plus confusion noise
+    """
+    results = np.empty((4, len(points)))
+    configurations, indices = np.unique(
+        points[["noise", "duration"]], return_inverse=True
+    )
+    for index, (noise, duration) in enumerate(configurations):
+        selected = indices.ravel() == index
+        log_freq = np.log10(points["freq"][selected])
+        curves_freq, strain_instru, strain_total = noise_cache.get_curves(
+            str(noise), float(duration)
+        )
+        for row, strain in enumerate((strain_instru, strain_total)):
+            results[row, selected] = 10 ** np.interp(
+                log_freq, np.log10(curves_freq), np.log10(strain)
+            )
+        results[2:, selected] = results[:2, selected] ** 2 / points["freq"][selected]
+
+    return tuple(results)
+
+
+source_batcher = MicroBatcher(evaluate_sources)
+point_batcher = MicroBatcher(evaluate_points)
+
+
+def check_configuration(noise, duration):
+    """
+    Check a noise budget and a mission duration
+
+    :param string noise: name of the noise budget
+    :param float duration: mission duration in years
+    """
+    duration_tables.check_configuration(conf_manager, noise, duration)
+
+
+def get_columns(body, key, fields):
+    """
+    Return the columns of a batch, sent as a list of objects
+    or as an object of lists
+
+    :param dict body: body of the request
+    :param string key: key of the batch in the body
+    :param list fields: required fields of the rows
+
+    :return dict: column of each field
+    """
+    rows = body[key]
+    if isinstance(rows, list):
+        columns = {field: [row[field] for row in rows] for field in fields}
+    else:
+        columns = {field: rows[field] for field in fields}
+
+    lengths = {len(column) for column in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError(f"The fields of {key} have different lengths")
+    size = lengths.pop() if lengths else 0
+    if size == 0:
+        raise ValueError(f"No {key}")
+    if size > MAX_ROWS:
+        raise ValueError(f"More than {MAX_ROWS} {key}")
+
+    return columns
+
+
+def parse_sources(body):
+    """
+    Return the galactic binaries of an SNR request
+
+    :param dict body: noise, duration and sources of the request
+
+    :return tuple: noise budget, mission duration and galactic binaries
+        with the fields of the verification binaries catalog, the fields
+        which are not sent being NaN
+    """
+    noise = body["noise"]
+    duration = float(body["duration"])
+    check_configuration(noise, duration)
+
+    columns = get_columns(body, "sources", SOURCE_FIELDS)
+    catalog_file = conf_manager.get_data_file(
+        "SO1.sensitivity.verification_binaries", "vgb"
+    )
+    dtype = np.dtype(shared_arrays.get_array(catalog_file).dtype)
+    sources = np.zeros(len(columns[SOURCE_FIELDS[0]]), dtype=dtype)
+    for field in dtype.names:
+        if dtype.fields[field][0].kind == "f":
+            sources[field] = np.nan
+    for field, column in columns.items():
+        sources[field] = np.asarray(column, dtype=float)
+        if not np.all(np.isfinite(sources[field])):
+            raise ValueError(f"Non finite {field}")
+
+    return noise, duration, sources
+
+
+def parse_points(body):
+    """
+    Return the points of a sensitivity request
+
+    :param dict body: points of the request, with noise, duration and freq
+
+    :return array: noise, duration and freq of the points
+    """
+    columns = get_columns(body, "points", ["noise", "duration", "freq"])
+
+    points = np.zeros(
+        len(columns["freq"]),
+        dtype=[("noise", "U32"), ("duration", float), ("freq", float)],
+    )
+    for field, column in columns.items():
+        points[field] = column
+
+    for noise, duration in set(zip(points["noise"], points["duration"])):
+        check_configuration(str(noise), float(duration))
+    if np.any(
+        ~np.isfinite(points["freq"])
+        | (points["freq"] < 10**LOG_FREQ_MIN)
+        | (points["freq"] > 10**LOG_FREQ_MAX)
+    ):
+        raise ValueError(
+            f"Frequencies out of [{10**LOG_FREQ_MIN:g}, {10**LOG_FREQ_MAX:g}] Hz"
+        )
+
+    return points
+
+
+def install(server):
+    """
+    Add the routes of the API to the Flask server of a Dash application
+
+    POST /api/v1/snr with {"noise", "duration", "sources"} returns the
+    frequency, sh, characteristic strain and SNR of each source.
+    POST /api/v1/sensitivity with {"points"} returns the characteristic
+    strain and sh of the noises at each (noise, duration, freq) point.
+    The rows are sent as a list of objects or as an object of lists,
+    and the results are returned as an object of lists.
+
+    :param Flask server: server of the Dash application
+    """
+
+    @server.route(API_PATH + "/snr", methods=["POST"])
+    def snr():
+        try:
+            noise, duration, sources = parse_sources(flask.request.get_json())
+        except (KeyError, TypeError, ValueError) as error:
+            return flask.jsonify(error=f"Invalid request: {error!r}"), 400
+
+        freq, sh, strain, snr_values = source_batcher.submit((noise, duration), sources)
+
+        return flask.jsonify(
+            noise=noise,
+            duration=duration,
+            freq=freq.tolist(),
+            sh=sh.tolist(),
+            strain=strain.tolist(),
+            snr=snr_values.tolist(),
+        )
+
+    @server.route(API_PATH + "/sensitivity", methods=["POST"])
+    def sensitivity():
+        try:
+            points = parse_points(flask.request.get_json())
+        except (KeyError, TypeError, ValueError) as error:
+            return flask.jsonify(error=f"Invalid request: {error!r}"), 400
+
+        strain_instru, strain_total, sh_instru, sh_total = point_batcher.submit(
+            (), points
+        )
+
+        return flask.jsonify(
+            freq=points["freq"].tolist(),
+            strain_instrumental=strain_instru.tolist(),
+            strain_total=strain_total.tolist(),
+            sh_instrumental=sh_instru.tolist(),
+            sh_total=sh_total.tolist(),
+        )
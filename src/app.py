@@ -2,10 +2,22 @@
 
 import configparser
 import dash
-from dash import Dash, html, dcc, callback, Output, Input
+from dash import Dash, html, dcc, callback, clientside_callback, Output, Input
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
-from PIL import Image
+from flask_compress import Compress
+
+import api  # pylint: disable=import-error
+from artifacts import artifacts  # pylint: disable=import-error
+import export  # pylint: disable=import-error
+import instrumentation  # pylint: disable=import-error
+from config_manager import ConfigManager  # pylint: disable=import-error
+from duration_tables import (  # pylint: disable=import-error
+    get_max_durations,
+    DURATION_MIN,
+)
+from job_queue import job_manager  # pylint: disable=import-error
+import warm_up  # pylint: disable=import-error
 
 ##############################################################################
 # Initialize the app
@@ -14,6 +26,8 @@ app = Dash(
     use_pages=True,
     external_stylesheets=[dbc.themes.CERULEAN],
     suppress_callback_exceptions=True,
+    # expensive callbacks run in background processes
+    background_callback_manager=job_manager,
 )
 
 app.title = "LISA Science Explorer"
@@ -21,14 +35,54 @@ app._favicon = "LISA_science_explorer_logo.ico"  # pylint: disable=protected-acc
 
 server = app.server  # pylint: disable=unused-variable
 
-dash.register_page(__name__, path="/", name="")
+# compression of the callback and layout responses, brotli when the browser
+# accepts it, with a low quality level because responses are dynamic.
+# Compress is installed here rather than by Dash(compress=True), which
+# restricts it to gzip, and before the instrumentation: the after_request
+# functions run in the reverse order, so the instrumentation records the
+# uncompressed sizes of the responses
+server.config["COMPRESS_ALGORITHM"] = ["br", "gzip"]
+server.config["COMPRESS_BR_LEVEL"] = 4
+server.config["COMPRESS_LEVEL"] = 6
+Compress(server)
+
+# latency and payload of the callbacks, exposed on /metrics
+instrumentation.install(server)
+
+# data of the plots, streamed on /export
+export.install(server)
+
+# SNR and sensitivity queries from scripts, on /api/v1
+api.install(server)
+
+# artifacts built offline by precompute.py, the stale ones are computed on request
+valid_artifacts, stale_artifacts = artifacts.load()
+server.logger.info(
+    "%d precomputed artifacts, %d stale",
+    len(valid_artifacts),
+    len(stale_artifacts),
+)
 
-image_lisa_logo = Image.open("assets/Logo_LISA_ESA_1711_ImageOnly.png")
+dash.register_page(__name__, path="/", name="")
 
 # Constants
 MAP_WIDTH = 800
 MAP_HEIGHT = 450
 SCALE_FACTOR = 0.25
+DURATION_DECIMALS = 1  # decimals of the mission duration slider
+DEFAULT_NOISE = "redbook"  # selected in the sidebar when the app opens
+DEFAULT_DURATION = 4.5  # years
+
+conf_manager = ConfigManager("data/configuration.ini")
+
+# the caches of every configuration are filled in the background,
+# the default configuration first, and /ready answers once it is warm
+warm_up.install(server)
+if warm_up.ENABLED:
+    warm_up.warm_up_scheduler.start(
+        conf_manager.get_configurations("SO1.sensitivity.resolved_binaries"),
+        (DEFAULT_NOISE, DEFAULT_DURATION),
+    )
 
 config = configparser.ConfigParser()
 config.read("data/configuration.ini")
@@ -129,26 +183,250 @@ sidebar = html.Div(
         html.P("Noise budget"),
         html.Div(
             dcc.RadioItems(
-                options=["redbook", "scird"],
-                value="redbook",
+                options=list(get_max_durations(conf_manager)),
+                value=DEFAULT_NOISE,
                 id="control_noise_budget"
             )
         ),
         html.P(""),
         html.P("Mission duration"),
-        dcc.RadioItems(
+        # any duration is served by the duration tables, up to the longest
+        # catalog of resolved binaries of the noise budget
+        dcc.Slider(
             id="mission_duration",
-            options=[
-                {"label": "4.5 years", "value": 4.5},
-                {"label": "7.5 years", "value": 7.5},
-            ],
-            value=4.5,
+            min=DURATION_MIN,
+            max=max(get_max_durations(conf_manager).values()),
+            step=10**-DURATION_DECIMALS,
+            value=DEFAULT_DURATION,
+            marks={duration: f"{duration:g}" for duration in (0.5, 2.5, 4.5, 7.5)},
+            tooltip={"placement": "bottom"},
+            # the figures are updated when the handle is released, not while
+            # it is dragged
+            updatemode="mouseup",
         ),
     ],
     style=SIDEBAR_STYLE,
     id="sidebar",
 )
 
+
+def build_home_map():
+    """
+    Build the home navigation map
+
+    :return figure home navigation map, with links to the pages
+    """
+    # Create figure
+    fig = go.Figure()
+
+    # Configure axes
+    fig.update_xaxes(visible=False, range=[0, MAP_WIDTH])
+
+    fig.update_yaxes(visible=False, range=[0, MAP_HEIGHT], scaleanchor="x")
+
+    # Configure other layout
+    fig.update_layout(
+        width=MAP_WIDTH,
+        height=MAP_HEIGHT,
+        margin={"l": 0, "r": 0, "t": 0, "b": 0},
+        template="plotly_white",
+    )
+
+    fig.add_layout_image(
+        dict(
+            x=MAP_WIDTH * 0.37,
+            sizex=MAP_WIDTH * SCALE_FACTOR,
+            y=MAP_HEIGHT * 0.6,
+            sizey=MAP_HEIGHT * SCALE_FACTOR,
+            xref="x",
+            yref="y",
+            opacity=1.0,
+            layer="below",
+            sizing="stretch",
+            source=app.get_asset_url("Logo_LISA_ESA_1711_ImageOnly.png"),
+        )
+    )
+
+    # Disable zoom and option that we will not use here
+    fig.layout.xaxis.fixedrange = True
+    fig.layout.yaxis.fixedrange = True
+
+    # Links management
+    plot_annotes = []
+
+    # pylint: disable=C0209
+    # pylint: disable=W1310
+
+    # Fundamental physics
+    plot_annotes.append(
+        dict(
+            x=400,
+            y=125,
+            text="""<a style="font-weight:bold; font-size:20px"
+            href="https://arxiv.org/ftp/arxiv/papers/2402/2402.07571.pdf#section.3.5">
+            Fundamental physics</a>""".format(
+                "Text"
+            ),
+            showarrow=False,
+            xanchor="center",
+            yanchor="middle",
+        )
+    )
+
+    # Cosmology
+    plot_annotes.append(
+        dict(
+            x=275,
+            y=250,
+            text="""<a style="font-weight:bold; font-size:20px"
+            href="">Cosmology</a>""".format(
+                "Text"
+            ),
+            showarrow=False,
+            xanchor="center",
+            yanchor="middle",
+        )
+    )
+
+    plot_annotes.append(
+        dict(
+            x=200,
+            y=300,
+            text="""<a href=
+            "https://arxiv.org/ftp/arxiv/papers/2402/2402.07571.pdf#section.3.6">
+            Standard sirens</a>""".format(
+                "Text"
+            ),
+            showarrow=False,
+            xanchor="center",
+            yanchor="middle",
+        )
+    )
+
+    plot_annotes.append(
+        dict(
+            x=175,
+            y=200,
+            text="""<a href=
+            "https://arxiv.org/ftp/arxiv/papers/2402/2402.07571.pdf#section.3.7">
+            Stochastic background</a>""".format(
+                "Text"
+            ),
+            showarrow=False,
+            xanchor="center",
+            yanchor="middle",
+        )
+    )
+
+    # Astrophysics
+    plot_annotes.append(
+        dict(
+            x=500,
+            y=275,
+            text="""<a style="font-weight:bold; font-size:20px"
+            href="">Astrophysics</a>""".format(
+                "Text"
+            ),
+            showarrow=False,
+            xanchor="center",
+            yanchor="middle",
+        )
+    )
+
+    plot_annotes.append(
+        dict(
+            x=400,
+            y=325,
+            text="""<a href=
+            "https://arxiv.org/ftp/arxiv/papers/2402/2402.07571.pdf#section.3.3">
+            Extreme mass-ratio inspirals</a>""".format(
+                "Text"
+            ),
+            showarrow=False,
+            xanchor="center",
+            yanchor="middle",
+        )
+    )
+
+    plot_annotes.append(
+        dict(
+            x=600,
+            y=175,
+            text="""<a href=
+            "https://arxiv.org/ftp/arxiv/papers/2402/2402.07571.pdf#section.3.4">
+            Stellar mass black hole binaries</a>""".format(
+                "Text"
+            ),
+            showarrow=False,
+            xanchor="center",
+            yanchor="middle",
+        )
+    )
+
+    plot_annotes.append(
+        dict(
+            x=650,
+            y=225,
+            text="""<a href="/so2-waterfall">Galactic binaries</a>""".format(
+                "Text"
+            ),
+            showarrow=False,
+            xanchor="center",
+            yanchor="middle",
+        )
+    )
+
+    plot_annotes.append(
+        dict(
+            x=700,
+            y=325,
+            text="""<a href="/so1-sensitivity">LISA GW sources</a>""".format(
+                "Text"
+            ),
+            showarrow=False,
+            xanchor="center",
+            yanchor="middle",
+        )
+    )
+
+    plot_annotes.append(
+        dict(
+            x=600,
+            y=300,
+            text="""<a style="font-weight:bold; font-size:15px" href=
+            "https://arxiv.org/ftp/arxiv/papers/2402/2402.07571.pdf#section.3.1">
+            Massive black hole binaries</a>""".format(
+                "Text"
+            ),
+            showarrow=False,
+            xanchor="center",
+            yanchor="middle",
+        )
+    )
+
+    plot_annotes.append(
+        dict(
+            x=500,
+            y=375,
+            text="""<a href="/so2-waterfall">
+            LISA cosmic horizon</a>""".format(
+                "Text"
+            ),
+            showarrow=False,
+            xanchor="center",
+            yanchor="middle",
+        )
+    )
+
+    # Addition of all the above annotation to the plot
+    fig.update_layout(annotations=plot_annotes)
+
+    return fig
+
+
+# The home navigation map is built once and sent with the layout
+home_map = dcc.Graph(figure=build_home_map())
+
 CONTENT_STYLE = {
     "margin-left": "18rem",
     "margin-right": "2rem",
@@ -165,10 +443,11 @@ app.layout = html.Div(
         sidebar,
         dash.page_container,
         dcc.Location(id="url", refresh="callback-nav"),
-        html.Div(id="homemap"),
+        html.Div(home_map, id="homemap", style={"display": "none"}),
         # storage gestion
         dcc.Store(id="config_noise_budget"),
         dcc.Store(id="config_mission_duration"),
+        dcc.Store(id="config_max_durations", data=get_max_durations(conf_manager)),
         dcc.Store(id="common_sidebar"),
         dcc.Store(id="precaluled_data"),
     ],
@@ -181,273 +460,92 @@ app.layout = html.Div(
 # pylint: disable=unused-variable
 
 
+# The sidebar callbacks are run by the browser
+# in order to avoid a request to the server each time they are fired
+
+# Read the noise configurations and their longest mission duration again
+# when the user changes of page, in case the configuration file changed
 @callback(
-    [Output("mission_duration", "options"), Output("mission_duration", "value")],
-    [Input("control_noise_budget", "value"), Input("mission_duration", "value")],
+    [
+        Output("control_noise_budget", "options"),
+        Output("config_max_durations", "data"),
+    ],
+    Input("url", "pathname"),
 )
-def display_dropdown(selected_config, selected_duration):
+def update_noise_budgets(_pathname):
     """
-    Display the mission duration dropdown
-    along the selected noise configuration
+    Return the noise configurations of the configuration file
 
-    :param string selected_config: selected noise configuration
-    :param float selected_duration: selected mission duration
+    :param string _pathname: unused, the page displayed by the user
 
-    :return list options with unavailable ones disabled
-    :return float mission duration selected by the user
-        or default mission duration if selected one not available
+    :return list: names of the noise budgets
+    :return dict: longest mission duration in years of each noise budget
     """
-    if selected_config == "redbook":
-        return [
-            {"label": "4.5 years", "value": 4.5},
-            {"label": "7.5 years", "value": 7.5, "disabled": True},
-        ], 4.5
-
-    return [
-        {"label": "4.5 years", "value": 4.5},
-        {"label": "7.5 years", "value": 7.5},
-    ], selected_duration
-
+    max_durations = get_max_durations(conf_manager)
 
-# radio button for common config
-@callback(Output("config_noise_budget", "data"), Input("control_noise_budget", "value"))
-def get_config_noise(value):
-    """Return the value of the noise budget selector"""
-    return value
-
-
-@callback(Output("config_mission_duration", "data"), Input("mission_duration", "value"))
-def get_config_duration(value):
-    """Return the value of the duration selector"""
-    return value
+    return list(max_durations), max_durations
 
 
-@callback(Output("homemap", "children"), Input("url", "pathname"))
-def display_homemap(current_path):
+# Limit the mission duration to the longest catalog of resolved binaries
+# of the selected noise configuration, and returns the mission duration
+# selected by the user or the longest one if the selected one is too long
+clientside_callback(
     """
-    Display the home navigation map if the current page is the root page
+    function (selected_config, selected_duration, max_durations) {
+        const max_duration = max_durations[selected_config] || %(default)s;
 
-    :param string current_path: path of the current page
-
-    :return dcc.Graph home navigation map
+        return [max_duration, Math.min(selected_duration, max_duration)];
+    }
     """
-    if current_path == "/":
-        # Create figure
-        fig = go.Figure()
-
-        # Configure axes
-        fig.update_xaxes(visible=False, range=[0, MAP_WIDTH])
-
-        fig.update_yaxes(visible=False, range=[0, MAP_HEIGHT], scaleanchor="x")
-
-        # Configure other layout
-        fig.update_layout(
-            width=MAP_WIDTH,
-            height=MAP_HEIGHT,
-            margin={"l": 0, "r": 0, "t": 0, "b": 0},
-            template="plotly_white",
-        )
-
-        fig.add_layout_image(
-            dict(
-                x=MAP_WIDTH * 0.37,
-                sizex=MAP_WIDTH * SCALE_FACTOR,
-                y=MAP_HEIGHT * 0.6,
-                sizey=MAP_HEIGHT * SCALE_FACTOR,
-                xref="x",
-                yref="y",
-                opacity=1.0,
-                layer="below",
-                sizing="stretch",
-                source=image_lisa_logo,
-            )
-        )
-
-        # Disable zoom and option that we will not use here
-        fig.layout.xaxis.fixedrange = True
-        fig.layout.yaxis.fixedrange = True
-
-        # Links management
-        plot_annotes = []
-
-        # pylint: disable=C0209
-        # pylint: disable=W1310
-
-        # Fundamental physics
-        plot_annotes.append(
-            dict(
-                x=400,
-                y=125,
-                text="""<a style="font-weight:bold; font-size:20px"
-                href="https://arxiv.org/ftp/arxiv/papers/2402/2402.07571.pdf#section.3.5">
-                Fundamental physics</a>""".format(
-                    "Text"
-                ),
-                showarrow=False,
-                xanchor="center",
-                yanchor="middle",
-            )
-        )
-
-        # Cosmology
-        plot_annotes.append(
-            dict(
-                x=275,
-                y=250,
-                text="""<a style="font-weight:bold; font-size:20px"
-                href="">Cosmology</a>""".format(
-                    "Text"
-                ),
-                showarrow=False,
-                xanchor="center",
-                yanchor="middle",
-            )
-        )
-
-        plot_annotes.append(
-            dict(
-                x=200,
-                y=300,
-                text="""<a href=
-                "https://arxiv.org/ftp/arxiv/papers/2402/2402.07571.pdf#section.3.6">
-                Standard sirens</a>""".format(
-                    "Text"
-                ),
-                showarrow=False,
-                xanchor="center",
-                yanchor="middle",
-            )
-        )
-
-        plot_annotes.append(
-            dict(
-                x=175,
-                y=200,
-                text="""<a href=
-                "https://arxiv.org/ftp/arxiv/papers/2402/2402.07571.pdf#section.3.7">
-                Stochastic background</a>""".format(
-                    "Text"
-                ),
-                showarrow=False,
-                xanchor="center",
-                yanchor="middle",
-            )
-        )
-
-        # Astrophysics
-        plot_annotes.append(
-            dict(
-                x=500,
-                y=275,
-                text="""<a style="font-weight:bold; font-size:20px"
-                href="">Astrophysics</a>""".format(
-                    "Text"
-                ),
-                showarrow=False,
-                xanchor="center",
-                yanchor="middle",
-            )
-        )
-
-        plot_annotes.append(
-            dict(
-                x=400,
-                y=325,
-                text="""<a href=
-                "https://arxiv.org/ftp/arxiv/papers/2402/2402.07571.pdf#section.3.3">
-                Extreme mass-ratio inspirals</a>""".format(
-                    "Text"
-                ),
-                showarrow=False,
-                xanchor="center",
-                yanchor="middle",
-            )
-        )
-
-        plot_annotes.append(
-            dict(
-                x=600,
-                y=175,
-                text="""<a href=
-                "https://arxiv.org/ftp/arxiv/papers/2402/2402.07571.pdf#section.3.4">
-                Stellar mass black hole binaries</a>""".format(
-                    "Text"
-                ),
-                showarrow=False,
-                xanchor="center",
-                yanchor="middle",
-            )
-        )
-
-        plot_annotes.append(
-            dict(
-                x=650,
-                y=225,
-                text="""<a href="/so2-waterfall">Galactic binaries</a>""".format(
-                    "Text"
-                ),
-                showarrow=False,
-                xanchor="center",
-                yanchor="middle",
-            )
-        )
-
-        plot_annotes.append(
-            dict(
-                x=700,
-                y=325,
-                text="""<a href="/so1-sensitivity">LISA GW sources</a>""".format(
-                    "Text"
-                ),
-                showarrow=False,
-                xanchor="center",
-                yanchor="middle",
-            )
-        )
-
-        plot_annotes.append(
-            dict(
-                x=600,
-                y=300,
-                text="""<a style="font-weight:bold; font-size:15px" href=
-                "https://arxiv.org/ftp/arxiv/papers/2402/2402.07571.pdf#section.3.1">
-                Massive black hole binaries</a>""".format(
-                    "Text"
-                ),
-                showarrow=False,
-                xanchor="center",
-                yanchor="middle",
-            )
-        )
+    % {"default": DEFAULT_DURATION},
+    [Output("mission_duration", "max"), Output("mission_duration", "value")],
+    [
+        Input("control_noise_budget", "value"),
+        Input("mission_duration", "value"),
+        Input("config_max_durations", "data"),
+    ],
+)
 
-        plot_annotes.append(
-            dict(
-                x=500,
-                y=375,
-                text="""<a href="/so2-waterfall">
-                LISA cosmic horizon</a>""".format(
-                    "Text"
-                ),
-                showarrow=False,
-                xanchor="center",
-                yanchor="middle",
-            )
-        )
+# radio button for common config
+# Return the value of the noise budget selector
+clientside_callback(
+    """
+    function (value) {
+        return value;
+    }
+    """,
+    Output("config_noise_budget", "data"),
+    Input("control_noise_budget", "value"),
+)
 
-        # Addition of all the above annotation to the plot
-        for annotation in plot_annotes:
-            fig.add_annotation(
-                x=annotation["x"],
-                y=annotation["y"],
-                text=annotation["text"],
-                showarrow=annotation["showarrow"],
-                xanchor=annotation["xanchor"],
-                yanchor=annotation["yanchor"],
-            )
+# Return the value of the duration selector,
+# rounded to the step of the slider
+clientside_callback(
+    """
+    function (value) {
+        return Math.round(value * %(scale)d) / %(scale)d;
+    }
+    """
+    % {"scale": 10**DURATION_DECIMALS},
+    Output("config_mission_duration", "data"),
+    Input("mission_duration", "value"),
+)
 
-        return dcc.Graph(figure=fig)
 
-    return None
+# Display the home navigation map only on the root page
+clientside_callback(
+    """
+    function (current_path) {
+        if (current_path === "/") {
+            return {"display": "block"};
+        }
+
+        return {"display": "none"};
+    }
+    """,
+    Output("homemap", "style"),
+    Input("url", "pathname"),
+)
 
 
 ##############################################################################
@@ -0,0 +1,204 @@
+"""
+Read the manifest of the artifacts built by precompute.py
+in order to serve them instead of computing them again
+"""
+
+import hashlib
+import json
+import os
+import threading
+import zipfile
+
+from shared_arrays import shared_arrays  # pylint: disable=import-error
+
+# Constants
+PRECOMPUTE_DIR = os.environ.get("PRECOMPUTE_DIR", "data/precomputed")
+MANIFEST_NAME = "manifest.json"
+
+
+class ArtifactManifest:
+    """
+    Read the manifest of the precomputed artifacts and keep the entries
+    which are still valid: every output exists with its recorded size,
+    every input still has the size and modification time it had when
+    the artifact was built and the modules of its builder have the same
+    source. The other artifacts are computed on request.
+    """
+
+    def __init__(self, precompute_dir=PRECOMPUTE_DIR):
+        self.precompute_dir = precompute_dir
+        self.manifest_file = os.path.join(precompute_dir, MANIFEST_NAME)
+        self._entries = None
+        self._stale = []
+        self._lock = threading.Lock()
+
+    def load(self):
+        """
+        Read the manifest and check its entries
+
+        :return tuple: names of the valid and of the stale artifacts
+        """
+        try:
+            with open(self.manifest_file, encoding="utf-8") as file:
+                entries = json.load(file)["artifacts"]
+        except (OSError, ValueError, KeyError):
+            entries = {}
+
+        valid = {}
+        stale = []
+        source_hashes = {}
+        for name, entry in entries.items():
+            if is_valid(entry, source_hashes):
+                valid[name] = entry
+            else:
+                stale.append(name)
+
+        with self._lock:
+            self._entries = valid
+            self._stale = stale
+
+        return sorted(valid), sorted(stale)
+
+    def get_path(self, name):
+        """
+        Return the main output of an artifact if it is valid
+
+        :param string name: name of the artifact
+
+        :return string: path to the output, None if the artifact
+            is missing or stale
+        """
+        with self._lock:
+            entries = self._entries
+
+        if entries is None:
+            self.load()
+            with self._lock:
+                entries = self._entries
+
+        if name not in entries:
+            return None
+
+        return entries[name]["main_output"]
+
+    def load_arrays(self, name, keys):
+        """
+        Return arrays of an artifact saved as an .npz file
+
+        :param string name: name of the artifact
+        :param tuple keys: names of the arrays in the .npz file
+
+        :return tuple: arrays mapped read only, None if the artifact
+            is missing or stale
+        """
+        path = self.get_path(name)
+        if path is None:
+            return None
+
+        try:
+            return shared_arrays.get_npz_arrays(path, keys)
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            return None
+
+    def clear(self):
+        """Forget the manifest, read again on next use"""
+        with self._lock:
+            self._entries = None
+            self._stale = []
+
+
+def get_file_stat(path):
+    """
+    Return the size and modification time of a file
+
+    :param string path: path to the file
+
+    :return list: size in bytes and modification time, None if missing
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    return [stat.st_size, stat.st_mtime]
+
+
+def hash_source(path):
+    """
+    Return the hash of the source of a module
+
+    :param string path: path to the source file
+
+    :return string: hexadecimal sha256, None if the file is missing
+    """
+    try:
+        with open(path, "rb") as file:
+            return hashlib.sha256(file.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def is_valid(entry, source_hashes=None):
+    """
+    Return if an entry of the manifest can be served
+
+    :param dict entry: entry of the manifest
+    :param dict source_hashes: hashes of the source files already read,
+        filled with the ones read by this call
+
+    :return boolean: True if its outputs are complete, its inputs
+        have not changed and it was built by the current code
+    """
+    if source_hashes is None:
+        source_hashes = {}
+
+    if "sources" not in entry:
+        return False
+
+    for path, digest in entry["sources"].items():
+        if path not in source_hashes:
+            source_hashes[path] = hash_source(path)
+        if source_hashes[path] != digest:
+            return False
+
+    for path, output in entry.get("outputs", {}).items():
+        stat = get_file_stat(path)
+        if stat is None or stat[0] != output["size"]:
+            return False
+
+    for path, input_stat in entry.get("inputs", {}).items():
+        if get_file_stat(path) != input_stat["stat"]:
+            return False
+
+    return "main_output" in entry
+
+
+def get_noise_curves_name(noise, duration):
+    """
+    Return the name of the noise curves artifact of a configuration
+
+    :param string noise: name of the noise budget
+    :param float duration: mission duration in years
+
+    :return string: name of the artifact
+    """
+    return f"noise_curves/{noise}_{float(duration):g}"
+
+
+def get_vgb_table_name(data_file, noise, duration):
+    """
+    Return the name of the verification binaries table artifact
+    of a configuration
+
+    :param string data_file: path to the verification binaries catalog
+    :param string noise: name of the noise budget
+    :param float duration: mission duration in years
+
+    :return string: name of the artifact
+    """
+    catalog_name = os.path.splitext(os.path.basename(data_file))[0]
+
+    return f"vgb_table/{catalog_name}_{noise}_{float(duration):g}"
+
+
+artifacts = ArtifactManifest()
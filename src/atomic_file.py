@@ -0,0 +1,30 @@
+"""
+Write the files shared by the workers of the server atomically,
+so that a worker never reads a file partially written by another one
+"""
+
+import contextlib
+import os
+import tempfile
+
+
+@contextlib.contextmanager
+def atomic_write(path, suffix=""):
+    """
+    Return a temporary file next to a file, which replaces the file when
+    the block succeeds and is removed otherwise
+
+    :param string path: path to the file to write
+    :param string suffix: suffix of the temporary file, such as the
+        extension expected by the function writing it
+
+    :return string: path to the temporary file to write
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=suffix)
+    os.close(fd)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -0,0 +1,407 @@
+"""
+Benchmark the callbacks of the application and the data layers behind them
+in order to measure how they scale and catch regressions between runs
+
+Usage (from the src directory):
+    python benchmark.py [--suite callbacks,catalogs,vgb,waterfall]
+                        [--max-rows 10000000] [--compare PREVIOUS.json]
+"""
+
+import argparse
+import datetime
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import plotly
+
+# the measures must not compete with the warm-up of the caches
+os.environ.setdefault("WARM_UP", "0")
+
+# Constants
+RESULTS_DIR = "benchmark_results"
+SUITES = ["callbacks", "catalogs", "vgb", "waterfall"]
+CATALOG_SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+MESH_SIZES = [100, 250, 500, 1000, 2000]
+REPEAT = 3
+REGRESSION_THRESHOLD = 1.2  # ratio of wall time considered as a regression
+
+
+def measure(name, function, *args):
+    """
+    Run a function and measure its cost
+
+    :param string name: name of the measure in the results
+    :param function function: function to benchmark, returning a figure,
+        a trace, a component or None
+    :param args: arguments of the function
+
+    :return dict: best wall time over REPEAT runs in seconds, peak memory
+        allocated during one run in bytes and size of the serialized result
+    """
+    wall_times = []
+    for _ in range(REPEAT):
+        gc.collect()
+        start = time.perf_counter()
+        result = function(*args)
+        wall_times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    function(*args)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    if hasattr(result, "to_plotly_json"):
+        result = result.to_plotly_json()
+    if isinstance(result, dict):
+        payload_size = len(json.dumps(result, cls=plotly.utils.PlotlyJSONEncoder))
+    else:
+        payload_size = 0
+
+    measure_result = {
+        "name": name,
+        "wall_time": min(wall_times),
+        "peak_memory": peak_memory,
+        "payload_size": payload_size,
+    }
+    print(
+        f"{name:60s} {measure_result['wall_time'] * 1e3:10.2f} ms"
+        f" {peak_memory / 2**20:10.2f} MiB {payload_size / 2**10:10.1f} KiB"
+    )
+
+    return measure_result
+
+
+def benchmark_callbacks():
+    """
+    Call the callbacks directly for every configuration of the ini file,
+    without the figure cache
+
+    :return list: results of the measures
+    """
+    # pylint: disable=import-outside-toplevel,import-error
+    import app
+
+    so1 = sys.modules["pages.so1_sensitivity"]
+    so2 = sys.modules["pages.so2_waterfall"]
+
+    results = [measure("app.build_home_map", app.build_home_map)]
+
+    binaries_selections = [
+        ["Verification binaries"],
+        ["Verification binaries", "Resolved binaries"],
+    ]
+    for noise, duration in so1.conf_manager.get_configurations(
+        "SO1.sensitivity.resolved_binaries"
+    ):
+        for binaries_to_display in binaries_selections:
+            results.append(
+                measure(
+                    f"so1_sensitivity.build_figure({noise}, {duration}, "
+                    f"{'+'.join(binaries_to_display)})",
+                    so1.build_figure.__wrapped__,
+                    noise,
+                    float(duration),
+                    ["select all"],
+                    binaries_to_display,
+                    None,
+                )
+            )
+
+    for noise in so2.conf_manager.get_configurations("SO2.waterfall"):
+        results.append(
+            measure(
+                f"so2_waterfall.build_figure({noise})",
+                so2.build_figure.__wrapped__,
+                noise,
+            )
+        )
+
+    return results
+
+
+def make_catalog(nb_rows, rng):
+    """
+    Return a synthetic catalog of resolved binaries
+
+    :param int nb_rows: number of binaries
+    :param Generator rng: random generator
+
+    :return array: catalog with the fields of the gb_<duration>_yr.npy files
+    """
+    catalog = np.zeros((nb_rows, 1), dtype=[("freq", "<f8"), ("sh", "<f8"), ("snr", "<f8")])
+    catalog["freq"][:, 0] = 10 ** rng.uniform(-4, -1.5, nb_rows)
+    catalog["sh"][:, 0] = 10 ** rng.uniform(-41, -37, nb_rows)
+    catalog["snr"][:, 0] = 10 ** rng.uniform(0.8, 3, nb_rows)
+    return catalog
+
+
+def benchmark_catalogs(sizes, tmp_dir):
+    """
+    Convert synthetic catalogs of resolved binaries, read the whole band
+    and a narrow band of each one and build their trace
+
+    :param list sizes: number of binaries of each catalog
+    :param string tmp_dir: directory where the catalogs are written
+
+    :return list: results of the measures
+    """
+    # pylint: disable=import-outside-toplevel,import-error
+    import app  # pylint: disable=unused-import
+    from catalog_reader import CatalogReader, convert_catalog
+    import level_of_detail
+
+    so1 = sys.modules["pages.so1_sensitivity"]
+    rng = np.random.default_rng(0)
+
+    def read_band(reader, x_range):
+        freq, strain, _, _ = reader.read(10 ** x_range[0], 10 ** x_range[1])
+        return freq, strain, np.log10(freq), np.log10(strain)
+
+    def build_trace(freq, strain, log_freq, log_strain):
+        indices = level_of_detail.decimate(log_freq, log_strain, so1.X_RANGE, so1.Y_RANGE)
+        return so1.make_resolved_trace(freq[indices], strain[indices])
+
+    results = []
+    for size in sizes:
+        data_file = os.path.join(tmp_dir, f"gb_{size}.npy")
+        np.save(data_file, make_catalog(size, rng))
+
+        results.append(measure(f"resolved.convert[{size}]", convert_catalog, data_file))
+        reader = CatalogReader(convert_catalog(data_file))
+        for band_name, x_range in [("full", so1.X_RANGE), ("narrow", [-3.0, -2.975])]:
+            results.append(
+                measure(f"resolved.read_{band_name}[{size}]", read_band, reader, x_range)
+            )
+        columns = read_band(reader, so1.X_RANGE)
+        results.append(measure(f"resolved.trace[{size}]", build_trace, *columns))
+
+        del columns
+        reader.close()
+        os.remove(reader.path)
+        os.remove(data_file)
+
+    return results
+
+
+def benchmark_vgb(sizes, tmp_dir):
+    """
+    Load synthetic verification binaries catalogs and select a hundred
+    binaries and the whole catalog.
+
+    The fomweb computation of compute_gb_sensitivity is replaced by the
+    catalog values (SyntheticTable.compute_table), so the measures cover
+    the loading, the cache of the tables and the selection, not the
+    sensitivity computation done once per configuration.
+
+    :param list sizes: number of binaries of each catalog
+    :param string tmp_dir: directory where the catalogs are written
+
+    :return list: results of the measures
+    """
+    # pylint: disable=import-outside-toplevel,import-error
+    from vgb_table import VerificationBinariesTable
+
+    class SyntheticTable(VerificationBinariesTable):
+        """Verification binaries table without the fomweb computation"""
+
+        def compute_table(self, noise, duration):
+            freq = np.ascontiguousarray(self.catalog["Frequency"])
+            strain = np.ascontiguousarray(self.catalog["Amplitude"])
+            return freq, strain, np.sqrt(strain / strain.min())
+
+    rng = np.random.default_rng(0)
+
+    results = []
+    for size in sizes:
+        catalog = np.zeros(
+            size, dtype=[("Name", "<U10"), ("Amplitude", "<f8"), ("Frequency", "<f8")]
+        )
+        catalog["Name"] = np.char.add("GB", np.arange(size).astype("<U8"))
+        catalog["Amplitude"] = 10 ** rng.uniform(-23, -21, size)
+        catalog["Frequency"] = 10 ** rng.uniform(-4, -1.5, size)
+        data_file = os.path.join(tmp_dir, f"vgb_{size}.npy")
+        np.save(data_file, catalog)
+
+        results.append(
+            measure(
+                f"vgb.load[{size}]",
+                lambda data_file: SyntheticTable(data_file).load_catalog(),
+                data_file,
+            )
+        )
+        table = SyntheticTable(data_file)
+        table.get_table("synthetic", 4.5)
+        selection = list(table.names[:: max(1, size // 100)])
+        results.append(
+            measure(f"vgb.select_100[{size}]", table.select, selection, "synthetic", 4.5)
+        )
+        results.append(
+            measure(f"vgb.select_all[{size}]", table.select, [], "synthetic", 4.5, True)
+        )
+
+        del table, catalog
+        os.remove(data_file)
+
+    return results
+
+
+def benchmark_waterfall(sizes, tmp_dir):
+    """
+    Convert synthetic SNR meshes of growing resolution and build their figure
+    unzoomed and zoomed on a tenth of the total mass axis
+
+    :param list sizes: number of points along each axis of the meshes
+    :param string tmp_dir: directory where the meshes are written
+
+    :return list: results of the measures
+    """
+    # pylint: disable=import-outside-toplevel,import-error
+    import app  # pylint: disable=unused-import
+    from waterfall_store import WaterfallStore, convert_waterfall, get_array_dir
+    from shared_arrays import SharedArrayStore
+    import level_of_detail
+
+    so2 = sys.modules["pages.so2_waterfall"]
+    rng = np.random.default_rng(0)
+
+    results = []
+    for size in sizes:
+        z_mesh, m_source_mesh = np.meshgrid(
+            np.linspace(0.1, 20, size), np.logspace(3, 9, size), indexing="ij"
+        )
+        snr_mesh = 10 ** rng.uniform(0, 4, (size, size))
+        data_file = os.path.join(tmp_dir, f"waterfall_{size}.pkl")
+        np.array(
+            [z_mesh, m_source_mesh, snr_mesh, snr_mesh, {}, []], dtype=object
+        ).dump(data_file)
+        del z_mesh, m_source_mesh, snr_mesh
+
+        results.append(
+            measure(f"waterfall.convert[{size}x{size}]", convert_waterfall, data_file)
+        )
+        # the memory of a worker opening the mesh must not grow with its size
+        results.append(
+            measure(
+                f"waterfall.open[{size}x{size}]",
+                lambda path: SharedArrayStore().get_array(path),
+                os.path.join(get_array_dir(data_file), "snr_mesh.npy"),
+            )
+        )
+        waterfall = WaterfallStore().get_pyramid(data_file)
+        for view_name, x_range in [("full", so2.FULL_RANGE), ("zoom", [5.0, 5.5])]:
+            results.append(
+                measure(
+                    f"waterfall.figure_{view_name}[{size}x{size}]",
+                    lambda pyramid, x_range: so2.make_figure(
+                        *level_of_detail.select_mesh(
+                            pyramid, x_range, so2.FULL_RANGE, log_x=True
+                        )
+                    ),
+                    waterfall,
+                    x_range,
+                )
+            )
+
+        del waterfall
+        os.remove(data_file)
+        for file_name in os.listdir(get_array_dir(data_file)):
+            os.remove(os.path.join(get_array_dir(data_file), file_name))
+        os.rmdir(get_array_dir(data_file))
+
+    return results
+
+
+def compare(results, previous_file):
+    """
+    Print the evolution of the wall time of each measure since a previous run
+
+    :param list results: results of the current run
+    :param string previous_file: path to the results of a previous run
+
+    :return boolean: True if a measure is slower than REGRESSION_THRESHOLD
+        times the previous one
+    """
+    with open(previous_file, encoding="utf-8") as file:
+        previous = {result["name"]: result for result in json.load(file)["results"]}
+
+    regression = False
+    print(f"\nComparison with {previous_file}")
+    for result in results:
+        if result["name"] not in previous:
+            continue
+        ratio = result["wall_time"] / max(previous[result["name"]]["wall_time"], 1e-9)
+        flag = ""
+        if ratio > REGRESSION_THRESHOLD:
+            flag = "  REGRESSION"
+            regression = True
+        print(f"{result['name']:60s} {ratio:8.2f}x{flag}")
+
+    return regression
+
+
+def main():
+    """Run the selected benchmarks, store and compare their results"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--suite", default=",".join(SUITES), help="comma separated suites to run"
+    )
+    parser.add_argument(
+        "--max-rows",
+        type=int,
+        default=CATALOG_SIZES[-1],
+        help="largest synthetic catalog",
+    )
+    parser.add_argument(
+        "--max-mesh", type=int, default=MESH_SIZES[-1], help="largest synthetic mesh"
+    )
+    parser.add_argument("--compare", default=None, help="results of a previous run")
+    args = parser.parse_args()
+
+    suites = args.suite.split(",")
+    catalog_sizes = [size for size in CATALOG_SIZES if size <= args.max_rows]
+    mesh_sizes = [size for size in MESH_SIZES if size <= args.max_mesh]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if "callbacks" in suites:
+            results += benchmark_callbacks()
+        if "catalogs" in suites:
+            results += benchmark_catalogs(catalog_sizes, tmp_dir)
+        if "vgb" in suites:
+            results += benchmark_vgb(catalog_sizes, tmp_dir)
+        if "waterfall" in suites:
+            results += benchmark_waterfall(mesh_sizes, tmp_dir)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    results_file = os.path.join(
+        RESULTS_DIR, datetime.datetime.now().strftime("%Y%m%d-%H%M%S") + ".json"
+    )
+    with open(results_file, "w", encoding="utf-8") as file:
+        json.dump(
+            {
+                "date": datetime.datetime.now().isoformat(),
+                "python": sys.version,
+                "numpy": np.__version__,
+                "plotly": plotly.__version__,
+                "results": results,
+            },
+            file,
+            indent=2,
+        )
+    print(f"\nResults stored in {results_file}")
+
+    if args.compare is not None and compare(results, args.compare):
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
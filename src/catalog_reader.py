@@ -0,0 +1,226 @@
+"""
+Read the resolved binaries of a frequency band from catalogs sorted by
+frequency and stored in chunked HDF5 files, in order to only read the
+binaries displayed on the sensitivity page
+"""
+
+import os
+import threading
+
+import numpy as np
+
+from atomic_file import atomic_write  # pylint: disable=import-error
+from config_manager import ConfigManager  # pylint: disable=import-error
+
+# Constants
+CHUNK_SIZE = 4096  # binaries per chunk of the HDF5 datasets
+CHUNKS_PER_READ = 16  # chunks read at once when iterating over a band
+SORTED_FILE_SUFFIX = "_by_freq.h5"
+COLUMNS = ("freq", "strain", "snr", "catalog_index")
+
+
+class CatalogReader:
+    """
+    Read a catalog sorted by frequency chunk by chunk.
+
+    The first and last frequency and the highest SNR of every chunk are
+    kept in memory, so that the chunks of a frequency band are found with
+    a binary search and the chunks below an SNR floor are not read.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+        with self.open() as catalog:
+            self.chunk_freq_min = catalog["chunk_freq_min"][:]
+            self.chunk_freq_max = catalog["chunk_freq_max"][:]
+            self.chunk_snr_max = catalog["chunk_snr_max"][:]
+            self.size = len(catalog["freq"])
+
+    def open(self):
+        """
+        Return the HDF5 file opened read only
+
+        :return File: the opened file
+        """
+        # pylint: disable=import-outside-toplevel,import-error
+        import h5py
+
+        return h5py.File(self.path, "r")
+
+    def get_file(self):
+        """
+        Return the HDF5 file of the reader, opened again in a new process
+        as HDF5 handles must not be shared with forked processes
+
+        :return File: the opened file
+        """
+        if self._file is None or self._pid != os.getpid():
+            self._file = self.open()
+            self._pid = os.getpid()
+
+        return self._file
+
+    def read(self, freq_min, freq_max, snr_min=None):
+        """
+        Read the binaries of a frequency band
+
+        :param float freq_min: lower frequency of the band in Hz
+        :param float freq_max: upper frequency of the band in Hz
+        :param float snr_min: lowest SNR of the binaries, None to read all
+
+        :return tuple: frequency, characteristic strain, SNR and row in
+            the original catalog of the binaries, sorted by frequency
+        """
+        parts = list(self.iter_read(freq_min, freq_max, snr_min, max_chunks=None))
+
+        return tuple(
+            (
+                np.concatenate([part[index] for part in parts])
+                if parts
+                else np.empty(0, dtype=np.int64 if column == "catalog_index" else float)
+            )
+            for index, column in enumerate(COLUMNS)
+        )
+
+    def iter_read(
+        self, freq_min, freq_max, snr_min=None, max_chunks=CHUNKS_PER_READ
+    ):  # pylint: disable=too-many-locals
+        """
+        Read the binaries of a frequency band a few chunks at a time,
+        so that the memory used does not depend on the width of the band
+
+        :param float freq_min: lower frequency of the band in Hz
+        :param float freq_max: upper frequency of the band in Hz
+        :param float snr_min: lowest SNR of the binaries, None to read all
+        :param int max_chunks: chunks read at once, None for no limit
+
+        :return generator: frequency, characteristic strain, SNR and row in
+            the original catalog of the binaries of each read, sorted by
+            frequency
+        """
+        first_chunk = np.searchsorted(self.chunk_freq_max, freq_min, side="left")
+        last_chunk = np.searchsorted(self.chunk_freq_min, freq_max, side="right")
+
+        chunks = np.arange(first_chunk, last_chunk)
+        if snr_min is not None:
+            chunks = chunks[self.chunk_snr_max[chunks] >= snr_min]
+
+        # consecutive chunks are read at once
+        runs = np.split(chunks, np.flatnonzero(np.diff(chunks) != 1) + 1)
+        if max_chunks is not None:
+            runs = [
+                run[start : start + max_chunks]
+                for run in runs
+                for start in range(0, len(run), max_chunks)
+            ]
+
+        for run in runs:
+            if len(run) == 0:
+                continue
+
+            # the file is only locked during a read, not between reads
+            with self._lock:
+                catalog = self.get_file()
+                first_row = run[0] * CHUNK_SIZE
+                last_row = min((run[-1] + 1) * CHUNK_SIZE, self.size)
+                freq = catalog["freq"][first_row:last_row]
+
+                # binary search of the band in the sorted chunks
+                start = first_row + np.searchsorted(freq, freq_min, side="left")
+                stop = first_row + np.searchsorted(freq, freq_max, side="right")
+
+                values = {
+                    column: catalog[column][start:stop]
+                    for column in COLUMNS
+                    if column != "freq"
+                }
+            values["freq"] = freq[start - first_row : stop - first_row]
+
+            if snr_min is not None:
+                kept = values["snr"] >= snr_min
+                values = {column: values[column][kept] for column in COLUMNS}
+
+            yield tuple(values[column] for column in COLUMNS)
+
+    def close(self):
+        """Close the HDF5 file"""
+        with self._lock:
+            if self._file is not None and self._pid == os.getpid():
+                self._file.close()
+            self._file = None
+
+
+def get_sorted_file(data_file):
+    """
+    Return the HDF5 file of a catalog sorted by frequency
+
+    :param string data_file: path to the catalog of resolved binaries
+
+    :return string: path to the HDF5 file
+    """
+    return os.path.splitext(data_file)[0] + SORTED_FILE_SUFFIX
+
+
+def convert_catalog(data_file):
+    """
+    Sort a catalog of resolved binaries by frequency and write its plotted
+    columns in a chunked HDF5 file along with the index of its chunks
+
+    :param string data_file: path to the catalog of resolved binaries
+
+    :return string: path to the HDF5 file
+    """
+    # pylint: disable=import-outside-toplevel,import-error
+    import h5py
+
+    path = get_sorted_file(data_file)
+
+    catalog = np.load(data_file, mmap_mode="r")
+    freq = catalog["freq"].ravel()
+    order = np.argsort(freq, kind="stable")
+
+    columns = {
+        "freq": freq[order].astype(np.float64),
+        "strain": np.sqrt(freq * catalog["sh"].ravel())[order],
+        "snr": catalog["snr"].ravel()[order].astype(np.float64),
+        "catalog_index": order.astype(np.int64),
+    }
+
+    starts = np.arange(0, len(freq), CHUNK_SIZE)
+    stops = np.minimum(starts + CHUNK_SIZE, len(freq))
+
+    with atomic_write(path, ".h5") as tmp_path:
+        with h5py.File(tmp_path, "w") as sorted_catalog:
+            for name, values in columns.items():
+                sorted_catalog.create_dataset(
+                    name, data=values, chunks=(min(CHUNK_SIZE, max(len(values), 1)),)
+                )
+            sorted_catalog["chunk_freq_min"] = columns["freq"][starts]
+            sorted_catalog["chunk_freq_max"] = columns["freq"][stops - 1]
+            sorted_catalog["chunk_snr_max"] = (
+                np.maximum.reduceat(columns["snr"], starts)
+                if len(starts)
+                else np.empty(0)
+            )
+
+    return path
+
+
+##############################################################################
+# Convert every catalog of resolved binaries listed in the configuration file
+if __name__ == "__main__":
+    conf_manager = ConfigManager("data/configuration.ini")
+    for configuration in conf_manager.get_configurations(
+        "SO1.sensitivity.resolved_binaries"
+    ):
+        print(
+            convert_catalog(
+                conf_manager.get_data_file(
+                    "SO1.sensitivity.resolved_binaries", configuration
+                )
+            )
+        )
@@ -0,0 +1,176 @@
+"""
+Store the readers of the catalogs of resolved galactic binaries
+and the binaries of the last displayed frequency bands
+"""
+
+from collections import OrderedDict
+import os
+import threading
+
+import numpy as np
+
+from catalog_reader import (  # pylint: disable=import-error
+    CHUNKS_PER_READ,
+    CatalogReader,
+    convert_catalog,
+    get_sorted_file,
+)
+from duration_tables import duration_tables  # pylint: disable=import-error
+
+# Constants
+BAND_DECIMALS = 3  # rounding of the log10 of the band bounds in the cache keys
+
+
+class CatalogStore:
+    """
+    Read the resolved binaries of the displayed frequency band from the
+    catalogs sorted by frequency, converting the catalogs the first time
+    they are used, so that the memory used and the time spent depend on
+    the number of displayed binaries and not on the size of the catalogs.
+
+    The binaries resolved at a shorter mission duration than the one of
+    a catalog are selected with the duration tables. The max_bands least
+    recently read bands are kept.
+    """
+
+    def __init__(self, max_bands=32):
+        self.max_bands = max_bands
+        self._readers = {}
+        self._bands = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_reader(self, data_file):
+        """
+        Return the reader of a catalog, converting the catalog
+        if its sorted file is missing or older than the catalog
+
+        :param string data_file: path to the catalog of resolved binaries
+
+        :return CatalogReader: reader of the sorted catalog
+        """
+        with self._lock:
+            if data_file in self._readers:
+                return self._readers[data_file]
+
+        sorted_file = get_sorted_file(data_file)
+        if not os.path.exists(sorted_file) or os.path.getmtime(
+            sorted_file
+        ) < os.path.getmtime(data_file):
+            convert_catalog(data_file)
+
+        reader = CatalogReader(sorted_file)
+
+        with self._lock:
+            self._readers.setdefault(data_file, reader)
+            return self._readers[data_file]
+
+    def get_resolved_binaries(
+        self, data_file, x_range, noise, duration_ref, duration, snr_min=None
+    ):  # pylint: disable=too-many-arguments
+        """
+        Return the plotted columns of the binaries of a frequency band
+        which are resolved at a given mission duration
+
+        :param string data_file: path to the catalog of resolved binaries
+        :param list x_range: log10 of the frequency bounds of the band
+        :param string noise: name of the noise budget of the catalog
+        :param float duration_ref: mission duration of the catalog in years
+        :param float duration: mission duration in years
+        :param float snr_min: lowest SNR in the catalog, None for every binary
+
+        :return tuple: frequency and characteristic strain of the binaries
+            and their log10
+        """
+        log_freq_min = round(float(x_range[0]), BAND_DECIMALS)
+        log_freq_max = round(float(x_range[1]), BAND_DECIMALS)
+
+        key = (data_file, float(duration), log_freq_min, log_freq_max, snr_min)
+        with self._lock:
+            if key in self._bands:
+                self._bands.move_to_end(key)
+                return self._bands[key]
+
+        parts = list(
+            self.iter_resolved_binaries(
+                data_file,
+                10**log_freq_min,
+                10**log_freq_max,
+                noise,
+                duration_ref,
+                duration,
+                snr_min,
+                max_chunks=None,
+            )
+        )
+        freq = np.concatenate([part[0] for part in parts]) if parts else np.empty(0)
+        strain = np.concatenate([part[1] for part in parts]) if parts else np.empty(0)
+
+        columns = (freq, strain, np.log10(freq), np.log10(strain))
+
+        # the arrays are shared between callbacks and must not be modified
+        for array in columns:
+            array.flags.writeable = False
+
+        with self._lock:
+            self._bands[key] = columns
+            while len(self._bands) > self.max_bands:
+                self._bands.popitem(last=False)
+
+        return columns
+
+    def iter_resolved_binaries(
+        self,
+        data_file,
+        freq_min,
+        freq_max,
+        noise,
+        duration_ref,
+        duration,
+        snr_min=None,
+        max_chunks=CHUNKS_PER_READ,
+    ):  # pylint: disable=too-many-arguments
+        """
+        Read the binaries of a frequency band which are resolved at a given
+        mission duration a few chunks at a time, without storing them
+
+        :param string data_file: path to the catalog of resolved binaries
+        :param float freq_min: lower frequency of the band in Hz
+        :param float freq_max: upper frequency of the band in Hz
+        :param string noise: name of the noise budget of the catalog
+        :param float duration_ref: mission duration of the catalog in years
+        :param float duration: mission duration in years
+        :param float snr_min: lowest SNR in the catalog, None for every binary
+        :param int max_chunks: chunks of the catalog read at once,
+            None for no limit
+
+        :return generator: frequency and characteristic strain
+            of the binaries of each read, sorted by frequency
+        """
+        resolving_durations = None
+        if float(duration) < float(duration_ref):
+            resolving_durations = duration_tables.get_resolving_durations(
+                data_file, noise, duration_ref
+            )
+
+        for freq, strain, _, catalog_index in self.get_reader(data_file).iter_read(
+            freq_min, freq_max, snr_min, max_chunks
+        ):
+            if resolving_durations is not None:
+                resolved = resolving_durations[catalog_index] <= float(duration)
+                freq = freq[resolved]
+                strain = strain[resolved] * np.sqrt(
+                    float(duration) / float(duration_ref)
+                )
+
+            yield freq, strain
+
+    def clear(self):
+        """Remove every reader and stored band"""
+        with self._lock:
+            for reader in self._readers.values():
+                reader.close()
+            self._readers.clear()
+            self._bands.clear()
+
+
+catalog_store = CatalogStore()
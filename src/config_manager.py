@@ -4,17 +4,103 @@ in order to provide the correct data to the application
 """
 
 import configparser
+import os
+import threading
+import time
+
+# Constants
+RELOAD_CHECK_INTERVAL = 1.0  # seconds between two checks of the ini file
 
 
 class ConfigManager:
     """
     Read and store the different configuration and data from the ini file
     in order to ensure consistency between both.
+
+    The configurations are indexed once when the file is read, and the file
+    is read again when its modification time changes, notifying the
+    registered listeners so that they can invalidate their data.
     """
 
     def __init__(self, path_2_ini_file):
+        self.path_2_ini_file = path_2_ini_file
         self.config = configparser.ConfigParser()
-        self.config.read(path_2_ini_file)
+        self._index = {}
+        self._configurations = {}
+        self._mtime = None
+        self._last_check = 0.0
+        self._reload_listeners = []
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """
+        Read the ini file and index the data file of every configuration
+        """
+        config = configparser.ConfigParser()
+        config.read(self.path_2_ini_file)
+
+        index = {}
+        configurations = {}
+        for section_name in config.sections():
+            configurations[section_name] = []
+            for option in config[section_name]:
+                if self.is_tuple(option):
+                    config_name = self.parse_tuple(option)
+                else:
+                    config_name = option
+
+                configurations[section_name].append(config_name)
+                index[(section_name, config_name)] = config[section_name][option]
+
+        self.config = config
+        self._index = index
+        self._configurations = configurations
+        self._mtime = self.get_mtime()
+        self._last_check = time.monotonic()
+
+    def get_mtime(self):
+        """
+        Return the modification time of the ini file
+
+        :return float: modification time, None if the file does not exist
+        """
+        try:
+            return os.path.getmtime(self.path_2_ini_file)
+        except OSError:
+            return None
+
+    def add_reload_listener(self, listener):
+        """
+        Register a function called without argument
+        each time the ini file is read again
+
+        :param function listener: function invalidating dependent data
+        """
+        self._reload_listeners.append(listener)
+
+    def check_for_update(self):
+        """
+        Read the ini file again if it has been modified since last reading,
+        at most once every RELOAD_CHECK_INTERVAL seconds
+
+        :return boolean: True if the file has been read again
+        """
+        now = time.monotonic()
+        if now - self._last_check < RELOAD_CHECK_INTERVAL:
+            return False
+
+        with self._lock:
+            self._last_check = now
+            if self.get_mtime() == self._mtime:
+                return False
+
+            self.load()
+
+        for listener in self._reload_listeners:
+            listener()
+
+        return True
 
     def get_data_file(self, section_name, config_name):
         """
@@ -25,19 +111,38 @@ class ConfigManager:
 
         :return string: path to datafile corresponding to the configuration
         """
-        for option in self.config[section_name]:
-            if self.is_tuple(option):
-                config_2_check = self.parse_tuple(option)
-            else:
-                config_2_check = option
-
-            if config_2_check == config_name:
-                return self.config[section_name][option]
+        self.check_for_update()
 
-        raise ValueError(
-            """The configuration asked for is 
+        try:
+            return self._index[(section_name, config_name)]
+        except KeyError:
+            raise ValueError(
+                """The configuration asked for is 
                          not contained in the configuration file"""
-        )
+            ) from None
+
+    def get_data_files(self):
+        """
+        Return the data file of every configuration
+
+        :return list: paths to the data files, as written in the ini file
+        """
+        self.check_for_update()
+
+        return sorted(set(self._index.values()))
+
+    def get_configurations(self, section_name):
+        """
+        Return every configuration listed in a section
+
+        :param string section_name: name of the desired section
+
+        :return list: configurations of the section,
+            as tuples when written with the tuple syntax
+        """
+        self.check_for_update()
+
+        return list(self._configurations[section_name])
 
     def is_tuple(self, input_string):
         """
@@ -0,0 +1,353 @@
+"""
+Precompute the quantities depending on the mission duration on a grid
+of durations in order to serve any duration by interpolation
+"""
+
+import os
+import threading
+
+import numpy as np
+
+from atomic_file import atomic_write  # pylint: disable=import-error
+from shared_arrays import shared_arrays  # pylint: disable=import-error
+
+# Constants
+DURATION_MIN = 0.5  # years
+DURATION_MAX = 10.0  # years
+DURATION_STEP = 0.5  # years between two durations of the tables
+DURATION_TOLERANCE = 1e-9  # years, durations closer than that are equal
+TABLE_LOG_FREQ_MIN = -5  # log10(Hz)
+TABLE_LOG_FREQ_MAX = 0  # log10(Hz)
+TABLE_FREQ_SIZE = 10000
+PSD_FLOOR = 1e-60  # confusion noise psd where it vanishes, for its log10
+CONFUSION_TABLE_FILE = os.environ.get(
+    "CONFUSION_TABLE_FILE", "data/confusion_noise_durations.npz"
+)
+RESOLVING_FILE_SUFFIX = "_resolving_durations.npy"
+
+
+class DurationTables:
+    """
+    Load the duration tables, computing and saving them the first time
+    they are used, and keep them in memory.
+
+    The confusion noise is tabulated as log10 of its psd on a
+    (duration, frequency) grid. The resolved binaries of a catalog are
+    tabulated as the duration from which each binary is resolved, so that
+    the catalog of a shorter duration is a mask of the catalog.
+    """
+
+    def __init__(self, confusion_file=CONFUSION_TABLE_FILE):
+        self.confusion_file = confusion_file
+        self._confusion_table = None
+        self._resolving_durations = {}
+        self._lock = threading.Lock()
+
+    def get_confusion_table(self):
+        """
+        Return the table of the confusion noise
+
+        :return tuple: durations, log10 of the frequencies
+            and log10 of the confusion noise psd of the grid
+        """
+        with self._lock:
+            if self._confusion_table is not None:
+                return self._confusion_table
+
+        if not os.path.exists(self.confusion_file):
+            save_arrays(self.confusion_file, **compute_confusion_table())
+
+        confusion_table = shared_arrays.get_npz_arrays(
+            self.confusion_file, ("durations", "log_freq", "log_psd")
+        )
+
+        with self._lock:
+            self._confusion_table = confusion_table
+
+        return confusion_table
+
+    def get_confusion_psd(self, freq, duration):
+        """
+        Return the psd of the confusion noise, interpolated on the table
+        between its durations and computed with the model otherwise
+
+        :param array freq: frequencies where the noise is computed
+        :param float duration: mission duration in years
+
+        :return array: psd of the confusion noise, X channel
+        """
+        durations, log_freq, log_psd = self.get_confusion_table()
+        # the table only stands in for the model between its durations
+        if not is_between_rows(durations, duration):
+            return compute_confusion_psd(freq, duration)
+
+        log_psd_duration = interpolate_rows(durations, log_psd, duration)
+
+        return 10 ** np.interp(np.log10(freq), log_freq, log_psd_duration)
+
+    def get_resolving_durations(self, data_file, noise, duration_ref):
+        """
+        Return the duration from which each binary of a catalog is resolved
+
+        :param string data_file: path to the catalog of resolved binaries
+        :param string noise: name of the noise budget of the catalog
+        :param float duration_ref: mission duration of the catalog in years
+
+        :return array: durations in years, in the order of the catalog
+        """
+        with self._lock:
+            if data_file in self._resolving_durations:
+                return self._resolving_durations[data_file]
+
+        table_file = get_resolving_file(data_file)
+        if not os.path.exists(table_file) or os.path.getmtime(
+            table_file
+        ) < os.path.getmtime(data_file):
+            save_array(
+                table_file,
+                compute_resolving_durations(
+                    data_file, noise, duration_ref, self.get_confusion_table()
+                ),
+            )
+
+        resolving_durations = shared_arrays.get_array(table_file)
+
+        with self._lock:
+            self._resolving_durations[data_file] = resolving_durations
+
+        return resolving_durations
+
+    def clear(self):
+        """Forget the tables of the catalogs"""
+        with self._lock:
+            self._resolving_durations.clear()
+
+
+def get_duration_grid(duration_max=DURATION_MAX):
+    """
+    Return the durations of the tables
+
+    :param float duration_max: longest duration of the grid in years,
+        added to the grid if it is not a multiple of DURATION_STEP
+
+    :return array: durations in years
+    """
+    durations = np.arange(DURATION_MIN, duration_max + DURATION_STEP / 2, DURATION_STEP)
+    durations = durations[durations < duration_max - DURATION_TOLERANCE]
+
+    return np.append(durations, duration_max)
+
+
+def get_resolving_file(data_file):
+    """
+    Return the table of the resolving durations of a catalog
+
+    :param string data_file: path to the catalog of resolved binaries
+
+    :return string: path to the .npy table
+    """
+    return os.path.splitext(data_file)[0] + RESOLVING_FILE_SUFFIX
+
+
+def interpolate_rows(durations, table, duration):
+    """
+    Interpolate linearly the rows of a table between its two closest durations
+
+    :param array durations: durations of the rows, sorted
+    :param array table: 2-D table, one row per duration
+    :param float duration: duration where the table is interpolated,
+        clipped to the durations of the table
+
+    :return array: interpolated row
+    """
+    duration = min(max(float(duration), durations[0]), durations[-1])
+    index = min(np.searchsorted(durations, duration, side="right"), len(durations) - 1)
+    index = max(index, 1)
+
+    weight = (duration - durations[index - 1]) / (
+        durations[index] - durations[index - 1]
+    )
+
+    return (1 - weight) * table[index - 1] + weight * table[index]
+
+
+def is_between_rows(durations, duration):
+    """
+    Return if a duration falls strictly between two durations of a table
+
+    :param array durations: durations of the rows, sorted
+    :param float duration: mission duration in years
+
+    :return boolean: True if the rows have to be interpolated
+    """
+    duration = float(duration)
+    if not durations[0] < duration < durations[-1]:
+        return False
+
+    return not np.any(np.abs(durations - duration) < DURATION_TOLERANCE)
+
+
+def compute_confusion_psd(freq, duration):
+    """
+    Compute the psd of the confusion noise with the model of fomweb
+
+    :param array freq: frequencies where the noise is computed
+    :param float duration: mission duration in years
+
+    :return array: psd of the confusion noise, X channel
+    """
+    # imported on first use in order to speed up the start of the server
+    # pylint: disable=import-outside-toplevel,import-error
+    from fomweb import analytic_noise
+
+    return analytic_noise.ConfusionNoise().psd(freq, duration=duration, option="X")
+
+
+def compute_confusion_table():
+    """
+    Compute the psd of the confusion noise on the grid of the table
+
+    :return dict: durations, log10 of the frequencies and log10 of the psd
+    """
+    durations = get_duration_grid()
+    log_freq = np.linspace(TABLE_LOG_FREQ_MIN, TABLE_LOG_FREQ_MAX, TABLE_FREQ_SIZE)
+    freq = 10**log_freq
+
+    log_psd = np.empty((len(durations), len(freq)))
+    for row, duration in zip(log_psd, durations):
+        psd = compute_confusion_psd(freq, duration)
+        row[:] = np.log10(np.maximum(psd, PSD_FLOOR))
+
+    return {"durations": durations, "log_freq": log_freq, "log_psd": log_psd}
+
+
+def compute_resolving_durations(data_file, noise, duration_ref, confusion_table):
+    """
+    Compute the duration from which each binary of a catalog is resolved
+
+    The SNR of a binary grows as sqrt(duration / psd), the psd being the sum
+    of the instrumental and confusion noises at the frequency of the binary.
+    A binary is resolved when its SNR reaches the lowest SNR of the catalog.
+
+    :param string data_file: path to the catalog of resolved binaries
+    :param string noise: name of the noise budget of the catalog
+    :param float duration_ref: mission duration of the catalog in years
+    :param tuple confusion_table: durations, log10 of the frequencies
+        and log10 of the confusion noise psd
+
+    :return array: durations in years, 0 for the binaries
+        resolved from the shortest duration of the grid
+    """
+    # imported on first use in order to speed up the start of the server
+    # pylint: disable=import-outside-toplevel,import-error
+    from fomweb import analytic_noise
+
+    catalog = np.load(data_file, mmap_mode="r")
+    log_freq_bin = np.log10(catalog["freq"].ravel())
+    log_snr_ref = np.log10(catalog["snr"].ravel())
+    log_threshold = log_snr_ref.min()
+
+    durations, log_freq, log_psd = confusion_table
+    grid = get_duration_grid(float(duration_ref))
+    freq = 10**log_freq
+
+    noise_instru = analytic_noise.InstrumentalNoise(name=noise)
+    sxx_instru = noise_instru.psd(freq, option="X")
+
+    def log_total_psd(duration):
+        return np.log10(
+            sxx_instru + 10 ** interpolate_rows(durations, log_psd, duration)
+        )
+
+    log_psd_ref = log_total_psd(duration_ref)
+
+    # SNR of every binary at every duration of the grid
+    log_snr = np.empty((len(grid), len(log_snr_ref)))
+    for row, duration in zip(log_snr, grid):
+        log_scale = 0.5 * (
+            np.log10(duration / duration_ref) + log_psd_ref - log_total_psd(duration)
+        )
+        row[:] = log_snr_ref + np.interp(log_freq_bin, log_freq, log_scale)
+
+    # last duration where the binary is not resolved, the binaries are
+    # resolved at the duration of the catalog
+    below = log_snr < log_threshold
+    last_below = len(grid) - 1 - np.argmax(below[::-1], axis=0)
+    last_below[~below.any(axis=0)] = -1
+    last_below = np.minimum(last_below, len(grid) - 2)
+
+    columns = np.arange(len(log_snr_ref))
+    before = np.maximum(last_below, 0)
+    snr_before = log_snr[before, columns]
+    snr_after = log_snr[before + 1, columns]
+    weight = np.clip(
+        (log_threshold - snr_before) / np.maximum(snr_after - snr_before, 1e-12), 0, 1
+    )
+
+    resolving_durations = grid[before] + weight * (grid[before + 1] - grid[before])
+    resolving_durations[last_below < 0] = 0.0
+
+    return resolving_durations
+
+
+def save_arrays(path, **arrays):
+    """
+    Save arrays in an uncompressed .npz file
+
+    :param string path: path to the file
+    :param dict arrays: arrays to save by name
+    """
+    with atomic_write(path, ".npz") as tmp_path:
+        np.savez(tmp_path, **arrays)
+
+
+def get_max_durations(conf_manager):
+    """
+    Return the longest mission duration of each noise budget, the duration
+    of its longest catalog of resolved binaries, as the binaries resolved
+    by a longer mission are not known
+
+    :param ConfigManager conf_manager: manager of the configuration file
+
+    :return dict: longest mission duration in years of each noise budget
+    """
+    max_durations = {}
+    for noise, duration in conf_manager.get_configurations(
+        "SO1.sensitivity.resolved_binaries"
+    ):
+        max_durations[noise] = max(float(duration), max_durations.get(noise, 0.0))
+
+    return max_durations
+
+
+def check_configuration(conf_manager, noise, duration):
+    """
+    Check that a noise budget has catalogs of resolved binaries
+    and that a mission duration is served for it
+
+    :param ConfigManager conf_manager: manager of the configuration file
+    :param string noise: name of the noise budget
+    :param float duration: mission duration in years
+    """
+    max_durations = get_max_durations(conf_manager)
+    if noise not in max_durations:
+        raise ValueError(f"Unknown noise budget {noise}")
+    if not DURATION_MIN <= duration <= max_durations[noise]:
+        raise ValueError(
+            f"Mission duration out of [{DURATION_MIN}, {max_durations[noise]}]"
+            f" for {noise}"
+        )
+
+
+def save_array(path, array):
+    """
+    Save an array in a .npy file
+
+    :param string path: path to the file
+    :param array array: array to save
+    """
+    with atomic_write(path, ".npy") as tmp_path:
+        np.save(tmp_path, array)
+
+
+duration_tables = DurationTables()
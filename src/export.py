@@ -0,0 +1,317 @@
+"""
+Stream the data behind the plots as CSV or NPZ files on /export,
+generated chunk by chunk so that the memory used does not depend
+on the size of the exported data
+"""
+
+import io
+import json
+import threading
+import zipfile
+
+from dash import html, clientside_callback, Output
+import flask
+import numpy as np
+
+# Constants
+EXPORT_PATH = "/export/<name>.<file_format>"
+EXPORT_URL = "/export/{name}.{file_format}"
+CHUNK_ROWS = 65536  # rows formatted at once
+MAX_EXPORTS = 2  # exports streamed at once by a worker
+RETRY_AFTER = 5  # seconds before retrying when every export slot is busy
+MIMETYPES = {"csv": "text/csv", "npz": "application/octet-stream"}
+CSV_FORMATS = {"U": "%s", "i": "%d", "f": "%.16g"}  # by kind of dtype
+
+
+class ExportTable:
+    """
+    Columns of an export, read chunk by chunk by a function
+    without argument returning a generator of tuples of arrays,
+    one array per column.
+
+    The number of rows, written in the header of the NPZ files,
+    is counted with a first pass over the chunks if it is not given.
+    """
+
+    def __init__(self, columns, iter_chunks, size=None):
+        self.columns = columns
+        self.iter_chunks = iter_chunks
+        self.size = size
+
+    @property
+    def dtype(self):
+        """Structured dtype of the rows"""
+        return np.dtype(self.columns)
+
+    def get_size(self):
+        """
+        Return the number of rows
+
+        :return int: number of rows of the table
+        """
+        if self.size is None:
+            self.size = sum(len(chunk[0]) for chunk in self.iter_chunks())
+
+        return self.size
+
+    def iter_records(self):
+        """
+        Return the rows as structured arrays of at most CHUNK_ROWS rows
+
+        :return generator: structured arrays of the rows
+        """
+        for chunk in self.iter_chunks():
+            for start in range(0, len(chunk[0]), CHUNK_ROWS):
+                records = np.empty(
+                    min(CHUNK_ROWS, len(chunk[0]) - start), dtype=self.dtype
+                )
+                for (name, _), values in zip(self.columns, chunk):
+                    records[name] = values[start : start + CHUNK_ROWS]
+                yield records
+
+
+class ExportRegistry:
+    """
+    Sources of the exports registered by the pages by name, each source
+    being a function returning the ExportTable of the query parameters
+    of the request and raising ValueError on invalid parameters
+    """
+
+    def __init__(self, max_exports=MAX_EXPORTS):
+        self._sources = {}
+        self._slots = threading.BoundedSemaphore(max_exports)
+
+    def register(self, name, source):
+        """
+        Add the source of an export
+
+        :param string name: name of the export in its url
+        :param function source: function called with the query parameters
+            of the request and returning an ExportTable
+        """
+        self._sources[name] = source
+
+    def get_table(self, name, query_parameters):
+        """
+        Return the table of an export
+
+        :param string name: name of the export
+        :param dict query_parameters: query parameters of the request
+
+        :return ExportTable: table of the export, None if it is not registered
+        """
+        if name not in self._sources:
+            return None
+
+        return self._sources[name](query_parameters)
+
+    def acquire(self):
+        """
+        Reserve an export slot of the worker without waiting
+
+        :return function: function without argument freeing the slot,
+            which can be called several times, None if every slot is busy
+        """
+        if not self._slots.acquire(blocking=False):
+            return None
+
+        released = threading.Event()
+
+        def release():
+            if not released.is_set():
+                released.set()
+                self._slots.release()
+
+        return release
+
+
+class StreamBuffer(io.RawIOBase):
+    """
+    Unseekable file collecting the bytes written by the zip archive
+    until they are sent
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._parts = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def pop(self):
+        """
+        Return and forget the bytes written since the last call
+
+        :return bytes: written bytes
+        """
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def iter_csv(table):
+    """
+    Format a table as CSV
+
+    :param ExportTable table: table to export
+
+    :return generator: lines of the CSV file, a chunk of rows at a time
+    """
+    yield ",".join(name for name, _ in table.columns) + "\n"
+
+    formats = [CSV_FORMATS[np.dtype(dtype).kind] for _, dtype in table.columns]
+    for records in table.iter_records():
+        buffer = io.StringIO()
+        np.savetxt(buffer, records, fmt=formats, delimiter=",")
+        yield buffer.getvalue()
+
+
+def iter_npz(table):
+    """
+    Format a table as an uncompressed NPZ file holding one structured array
+    named data, read with np.load(path)["data"]
+
+    :param ExportTable table: table to export
+
+    :return generator: bytes of the NPZ file, a chunk of rows at a time
+    """
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+        with archive.open("data.npy", "w", force_zip64=True) as member:
+            np.lib.format.write_array_header_1_0(
+                member,
+                {
+                    "descr": np.lib.format.dtype_to_descr(table.dtype),
+                    "fortran_order": False,
+                    "shape": (table.get_size(),),
+                },
+            )
+            for records in table.iter_records():
+                member.write(records.tobytes())
+                yield buffer.pop()
+
+    yield buffer.pop()
+
+
+FORMATTERS = {"csv": iter_csv, "npz": iter_npz}
+
+export_registry = ExportRegistry()
+
+
+def install(server):
+    """
+    Add the /export route to the Flask server of a Dash application
+
+    :param Flask server: server of the Dash application
+    """
+
+    @server.route(EXPORT_PATH)
+    def export(name, file_format):
+        if file_format not in FORMATTERS:
+            flask.abort(404)
+
+        try:
+            table = export_registry.get_table(name, flask.request.args)
+        except (KeyError, ValueError) as error:
+            flask.abort(400, description=str(error))
+        if table is None:
+            flask.abort(404)
+
+        # a worker streams a few exports at once and keeps serving the pages
+        release = export_registry.acquire()
+        if release is None:
+            return flask.Response(
+                "Too many exports in progress",
+                status=429,
+                headers={"Retry-After": str(RETRY_AFTER)},
+            )
+
+        def generate():
+            try:
+                yield from FORMATTERS[file_format](table)
+            finally:
+                release()
+
+        response = flask.Response(
+            flask.stream_with_context(generate()),
+            mimetype=MIMETYPES[file_format],
+            headers={
+                "Content-Disposition": f'attachment; filename="{name}.{file_format}"'
+            },
+        )
+        # also released when the response is closed before being sent
+        response.call_on_close(release)
+
+        return response
+
+
+def get_link_id(name, file_format):
+    """
+    Return the id of the link to an export
+
+    :param string name: name of the export
+    :param string file_format: csv or npz
+
+    :return string: id of the link
+    """
+    return f"export_{name}_{file_format}"
+
+
+def make_links(exports):
+    """
+    Return the links to the exports of a page, whose urls
+    are set by the callback added by add_links_callback
+
+    :param dict exports: labels of the exports by name
+
+    :return html.Div links to the exports
+    """
+    rows = [html.P("Download the plotted data")]
+    for name, label in exports.items():
+        links = [f"{label}: "]
+        for file_format in FORMATTERS:
+            if len(links) > 1:
+                links.append(" | ")
+            links.append(html.A(file_format.upper(), id=get_link_id(name, file_format)))
+        rows.append(html.Div(links))
+
+    return html.Div(rows)
+
+
+def add_links_callback(exports, parameters):
+    """
+    Set the urls of the links to the exports of a page with the
+    configuration selected in the sidebar, in the browser in order
+    to avoid a request to the server
+
+    :param dict exports: labels of the exports by name
+    :param dict parameters: Input of each query parameter of the urls
+    """
+    urls = [
+        EXPORT_URL.format(name=name, file_format=file_format)
+        for name in exports
+        for file_format in FORMATTERS
+    ]
+
+    clientside_callback(
+        """
+        function (...values) {
+            const query = %(parameters)s.map(
+                (parameter, index) =>
+                    parameter + "=" + encodeURIComponent(values[index])
+            ).join("&");
+
+            return %(urls)s.map(url => url + "?" + query);
+        }
+        """ % {"parameters": json.dumps(list(parameters)), "urls": json.dumps(urls)},
+        [
+            Output(get_link_id(name, file_format), "href")
+            for name in exports
+            for file_format in FORMATTERS
+        ],
+        list(parameters.values()),
+    )
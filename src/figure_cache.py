@@ -0,0 +1,310 @@
+"""
+Cache the figures returned by the callbacks
+in order to share them between clients and gunicorn workers
+"""
+
+from collections import OrderedDict
+import functools
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+import threading
+
+from artifacts import artifacts  # pylint: disable=import-error
+from atomic_file import atomic_write  # pylint: disable=import-error
+import figure_encoding  # pylint: disable=import-error
+
+# Constants
+CACHE_DIR = os.environ.get(
+    "FIGURE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "fom_dash_figures")
+)
+MAX_MEMORY_ITEMS = 32  # figures kept in the memory of each worker
+MAX_DISK_SIZE = 256 * 1024 * 1024  # bytes of figures kept on disk
+
+
+class FigureCache:
+    """
+    Store the serialized figures keyed by a hash of the callback inputs,
+    in a least recently used cache in memory in front of a directory
+    shared by every worker of the host.
+
+    The keys also hold a version of each callback, made of its source,
+    the configuration file and the data files, so that the figures stored
+    on disk by a previous deployment are not served.
+
+    The least recently used files are removed when the directory
+    grows above max_disk_size bytes.
+    """
+
+    def __init__(
+        self,
+        cache_dir=CACHE_DIR,
+        max_memory_items=MAX_MEMORY_ITEMS,
+        max_disk_size=MAX_DISK_SIZE,
+    ):
+        self.cache_dir = cache_dir
+        self.max_memory_items = max_memory_items
+        self.max_disk_size = max_disk_size
+        self.stats = {}
+        self._callbacks = {}
+        self._versions = {}
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+        self._events = threading.local()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def make_key(self, name, inputs):
+        """
+        Return the key of a figure
+
+        :param string name: name of the callback
+        :param list inputs: inputs of the callback
+
+        :return string: hash of the callback name, version and inputs
+        """
+        text = json.dumps(
+            [name, self._versions.get(name), inputs], sort_keys=True, default=str
+        )
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def contains(self, name, inputs):
+        """
+        Return if the figure of a callback is stored
+
+        :param string name: name of the callback
+        :param list inputs: inputs of the callback
+
+        :return boolean: True if the figure is in memory or on disk
+        """
+        self.check_for_update(name)
+        key = self.make_key(name, inputs)
+        with self._lock:
+            if key in self._figures:
+                return True
+
+        return os.path.exists(self.get_path(key))
+
+    def get(self, key):
+        """
+        Return a serialized figure
+
+        :param string key: key of the figure
+
+        :return string: figure as JSON, None if it is not stored
+        """
+        with self._lock:
+            if key in self._figures:
+                self._figures.move_to_end(key)
+                return self._figures[key]
+
+        path = self.get_path(key)
+        try:
+            with open(path, encoding="utf-8") as file:
+                figure_json = file.read()
+            # mark the file as recently used for the eviction
+            os.utime(path)
+        except OSError:
+            return None
+
+        self.store_in_memory(key, figure_json)
+
+        return figure_json
+
+    def set(self, key, figure_json):
+        """
+        Store a serialized figure in memory and on disk
+
+        :param string key: key of the figure
+        :param string figure_json: figure as JSON
+        """
+        self.store_in_memory(key, figure_json)
+
+        try:
+            with atomic_write(self.get_path(key)) as tmp_path:
+                with open(tmp_path, "w", encoding="utf-8") as file:
+                    file.write(figure_json)
+        except OSError:
+            return
+
+        self.evict()
+
+    def store_in_memory(self, key, figure_json):
+        """
+        Store a serialized figure in the memory of the worker
+
+        :param string key: key of the figure
+        :param string figure_json: figure as JSON
+        """
+        with self._lock:
+            self._figures[key] = figure_json
+            self._figures.move_to_end(key)
+            while len(self._figures) > self.max_memory_items:
+                self._figures.popitem(last=False)
+
+    def get_path(self, key):
+        """
+        Return the path of the file of a figure
+
+        :param string key: key of the figure
+
+        :return string: path to the JSON file
+        """
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def evict(self):
+        """
+        Remove the least recently used files until the directory
+        is smaller than max_disk_size
+        """
+        files = []
+        total_size = 0
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+                total_size += stat.st_size
+
+        if total_size <= self.max_disk_size:
+            return
+
+        for _, size, path in sorted(files):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_size -= size
+            if total_size <= self.max_disk_size:
+                break
+
+    def check_for_update(self, name):
+        """
+        Read the configuration file of a callback again if it has been
+        modified, which clears the cache through the reload listeners,
+        before a lookup skipping the callback
+
+        :param string name: name of the callback
+        """
+        if name in self._callbacks:
+            self._callbacks[name][1].check_for_update()
+
+    def clear(self):
+        """Remove every stored figure, in memory and on disk"""
+        # the data files may have changed along with the configuration file
+        versions = {
+            name: make_version(function, conf_manager)
+            for name, (function, conf_manager) in self._callbacks.items()
+        }
+
+        with self._lock:
+            self._figures.clear()
+            self._versions = versions
+
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    continue
+
+    def count(self, name, event):
+        """
+        Increment a counter of a callback
+
+        :param string name: name of the callback
+        :param string event: "hit" or "miss"
+        """
+        with self._lock:
+            counters = self.stats.setdefault(name, {"hit": 0, "miss": 0})
+            counters[event] += 1
+
+        if not hasattr(self._events, "events"):
+            self._events.events = []
+        self._events.events.append(event)
+
+    def pop_events(self):
+        """
+        Return the lookups done by the current thread since the last call,
+        used to attribute the cache hits to a request
+
+        :return list: "hit" or "miss" for each lookup
+        """
+        events = getattr(self._events, "events", [])
+        self._events.events = []
+        return events
+
+    def cached(self, name, conf_manager):
+        """
+        Decorate a callback returning a plotly figure
+        so that it returns the stored figure for known inputs,
+        the figures being stored with their arrays in a compact form
+
+        :param string name: name of the callback in the cache
+        :param ConfigManager conf_manager: configuration manager
+            of the data files read by the callback
+
+        :return function: decorator of the callback
+        """
+
+        def decorator(function):
+            self._callbacks[name] = (function, conf_manager)
+            version = make_version(function, conf_manager)
+            with self._lock:
+                self._versions[name] = version
+
+            @functools.wraps(function)
+            def wrapper(*inputs):
+                self.check_for_update(name)
+                key = self.make_key(name, inputs)
+
+                figure_json = self.get(key)
+                if figure_json is None:
+                    self.count(name, "miss")
+                    figure_json = figure_encoding.to_json(function(*inputs))
+                    self.set(key, figure_json)
+                else:
+                    self.count(name, "hit")
+
+                return json.loads(figure_json)
+
+            return wrapper
+
+        return decorator
+
+
+def make_version(function, conf_manager):
+    """
+    Return the version of the figures of a callback
+
+    :param function function: callback returning a figure
+    :param ConfigManager conf_manager: configuration manager
+        of the data files read by the callback
+
+    :return string: hash of the sources of the callback module and of
+        figure_encoding, of the configuration file, and of the size and
+        modification time of the data files and of the precomputed artifacts
+    """
+    digest = hashlib.sha256()
+    for path in [inspect.getsourcefile(function), figure_encoding.__file__]:
+        with open(path, "rb") as file:
+            digest.update(file.read())
+
+    for path in [
+        conf_manager.path_2_ini_file,
+        artifacts.manifest_file,
+        *conf_manager.get_data_files(),
+    ]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+
+    return digest.hexdigest()
+
+
+figure_cache = FigureCache()
@@ -0,0 +1,117 @@
+"""
+Encode the arrays of the figures in a compact form
+in order to reduce the size of the callback responses
+
+The typed arrays are the compact form, 4 bytes per value before the base64
+encoding, but plotly.js decodes them from version 2.28 while dash 2.15 bundles
+plotly.js 2.25.2, so they are opt-in until dash is upgraded. The default
+rounding to float32 is cheap and keeps the values identical to the ones of the
+typed arrays, but it does not shorten the JSON numbers, which are still
+written with the digits of the float64 closest to each float32: the size of
+the responses is then reduced by their compression only.
+"""
+
+import base64
+import os
+
+import numpy as np
+import plotly
+
+# Constants
+# "float32": values rounded to float32, sent as JSON numbers
+# "typed": float32 base64 typed arrays, which need plotly.js >= 2.28
+# "none": arrays sent unchanged
+ENCODING = os.environ.get("FIGURE_ENCODING", "float32")
+MIN_ARRAY_SIZE = 16  # smaller arrays are sent unchanged
+
+
+def to_json(fig, encoding=ENCODING):
+    """
+    Serialize a figure with its data arrays encoded in a compact form
+
+    :param Figure fig: plotly figure
+    :param string encoding: "float32", "typed" or "none"
+
+    :return string: figure as JSON
+    """
+    figure_dict = fig.to_plotly_json()
+
+    if encoding != "none":
+        figure_dict["data"] = [
+            encode_arrays(trace, encoding) for trace in figure_dict.get("data", [])
+        ]
+
+    return plotly.io.json.to_json_plotly(figure_dict)
+
+
+def encode(value, encoding=ENCODING):
+    """
+    Encode a value sent outside of a figure, such as in a partial update
+
+    :param value: array or property of a trace
+    :param string encoding: "float32", "typed" or "none"
+
+    :return: the value with its float arrays encoded
+    """
+    if encoding == "none":
+        return value
+
+    return encode_arrays(value, encoding)
+
+
+def encode_arrays(value, encoding):
+    """
+    Encode the float arrays found in a trace, recursively
+
+    :param value: trace or property of a trace
+    :param string encoding: "float32" or "typed"
+
+    :return: the value with its float arrays encoded
+    """
+    if isinstance(value, dict):
+        return {key: encode_arrays(item, encoding) for key, item in value.items()}
+
+    if (
+        isinstance(value, np.ndarray)
+        and value.dtype.kind == "f"
+        and value.size >= MIN_ARRAY_SIZE
+    ):
+        if encoding == "typed":
+            return encode_typed_array(value)
+        return round_to_float32(value)
+
+    return value
+
+
+def encode_typed_array(array):
+    """
+    Encode an array as a plotly.js base64 typed array of float32
+
+    :param array array: array to encode
+
+    :return dict: dtype, base64 data and shape of the array
+    """
+    typed_array = {
+        "dtype": "f4",
+        "bdata": base64.b64encode(
+            np.ascontiguousarray(array, dtype="<f4").tobytes()
+        ).decode("ascii"),
+    }
+    if array.ndim > 1:
+        typed_array["shape"] = ", ".join(str(size) for size in array.shape)
+
+    return typed_array
+
+
+def round_to_float32(array):
+    """
+    Round the values of an array to the precision of float32
+
+    The values are converted back to float64 to be serialized in JSON,
+    which writes them with up to 17 significant digits.
+
+    :param array array: array to round
+
+    :return array: rounded array
+    """
+    return np.float32(array).astype(np.float64)
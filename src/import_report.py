@@ -0,0 +1,104 @@
+"""
+Report the time spent importing each module of the application
+in order to keep the start of the gunicorn workers fast
+
+Usage (from the src directory):
+    python import_report.py [--module app] [--top 20] [--budget 2.0]
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+
+# Constants
+DEFAULT_MODULE = "app"
+DEFAULT_TOP = 20
+IMPORT_TIME_LINE = re.compile(
+    r"^import time:\s+(?P<self>\d+)\s+\|\s+(?P<cumulative>\d+)\s+\|(?P<name>.*)$"
+)
+
+
+def measure_import_times(module_name):
+    """
+    Import a module in a new interpreter and return its import times
+
+    :param string module_name: name of the module to import
+
+    :return list: (module name, self time, cumulative time, depth) for each
+        imported module, times in seconds, in import order
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + module_name],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(
+            "Import of " + module_name + " failed:\n" + result.stderr[-2000:]
+        )
+
+    import_times = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match is None:
+            continue
+        name = match.group("name")
+        depth = (len(name) - len(name.lstrip())) // 2
+        import_times.append(
+            (
+                name.strip(),
+                int(match.group("self")) * 1e-6,
+                int(match.group("cumulative")) * 1e-6,
+                depth,
+            )
+        )
+
+    return import_times
+
+
+def print_report(import_times, top):
+    """
+    Print the slowest imported modules
+
+    :param list import_times: import times given by measure_import_times
+    :param int top: number of modules to print
+    """
+    print(f"{'cumulative (s)':>15} {'self (s)':>10}  module")
+    for name, self_time, cumulative_time, depth in sorted(
+        import_times, key=lambda import_time: import_time[2], reverse=True
+    )[:top]:
+        print(f"{cumulative_time:15.3f} {self_time:10.3f}  {'  ' * depth}{name}")
+
+
+def main():
+    """Measure the import of the application and check the startup budget"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--module", default=DEFAULT_MODULE, help="module to import")
+    parser.add_argument(
+        "--top", type=int, default=DEFAULT_TOP, help="number of modules to print"
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=None,
+        help="maximum import time of the module in seconds",
+    )
+    args = parser.parse_args()
+
+    import_times = measure_import_times(args.module)
+    print_report(import_times, args.top)
+
+    total = max(cumulative_time for _, _, cumulative_time, _ in import_times)
+    print(f"\nimport {args.module}: {total:.3f} s")
+
+    if args.budget is not None and total > args.budget:
+        print(f"Startup budget of {args.budget:.3f} s exceeded", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
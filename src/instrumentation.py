@@ -0,0 +1,297 @@
+"""
+Measure the latency and the payload of the callbacks
+and expose them in the Prometheus text format on /metrics
+
+The metrics are kept by each gunicorn worker and labelled with its pid,
+a scrape returning the metrics of the worker which answers it. The figure
+cache lookups of the background jobs, which run in their own processes,
+are not counted.
+"""
+
+import os
+import threading
+import time
+
+import flask
+
+from figure_cache import figure_cache  # pylint: disable=import-error
+
+# Constants
+CALLBACK_PATH = "/_dash-update-component"
+METRICS_PATH = "/metrics"
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+SIZE_BUCKETS = [1e3, 1e4, 1e5, 3e5, 1e6, 3e6, 1e7]
+MAX_INPUT_COMBINATIONS = 100  # per callback, beyond that they are merged
+MAX_INPUT_VALUE_LENGTH = 40  # characters of an input value in the labels
+OTHER_INPUTS = "other"
+
+
+class Histogram:
+    """
+    Count observations in cumulative buckets, as Prometheus histograms
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        """
+        Add an observation
+
+        :param float value: observed value
+        """
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def to_prometheus(self, name, labels):
+        """
+        Return the histogram in the Prometheus text format
+
+        :param string name: name of the metric
+        :param string labels: labels of the metric, formatted as 'key="value"'
+
+        :return list: lines of the metric
+        """
+        lines = []
+        for bound, count in zip(self.buckets, self.counts):
+            lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {count}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class CallbackMetrics:
+    """
+    Store the latency and the response size of each callback,
+    and of each combination of its inputs.
+
+    The metrics are kept in the memory of the worker, so each
+    gunicorn worker exposes its own metrics, labelled with its pid.
+    """
+
+    def __init__(self):
+        self.latency = {}
+        self.response_size = {}
+        self.combinations = {}
+        self._lock = threading.Lock()
+
+    def observe(
+        self, callback_name, inputs_label, latency, response_size, cache_events
+    ):  # pylint: disable=too-many-arguments
+        """
+        Record a call of a callback
+
+        :param string callback_name: outputs of the callback
+        :param string inputs_label: values of the inputs of the callback
+        :param float latency: duration of the request in seconds
+        :param int response_size: size of the response body in bytes,
+            before its compression
+        :param list cache_events: lookups of the figure cache during the call
+        """
+        with self._lock:
+            if callback_name not in self.latency:
+                self.latency[callback_name] = Histogram(LATENCY_BUCKETS)
+                self.response_size[callback_name] = Histogram(SIZE_BUCKETS)
+                self.combinations[callback_name] = {}
+
+            self.latency[callback_name].observe(latency)
+            self.response_size[callback_name].observe(response_size)
+
+            combinations = self.combinations[callback_name]
+            if (
+                inputs_label not in combinations
+                and len(combinations) >= MAX_INPUT_COMBINATIONS
+            ):
+                inputs_label = OTHER_INPUTS
+            calls, total_latency, total_size, hits, misses = combinations.get(
+                inputs_label, (0, 0, 0, 0, 0)
+            )
+            combinations[inputs_label] = (
+                calls + 1,
+                total_latency + latency,
+                total_size + response_size,
+                hits + cache_events.count("hit"),
+                misses + cache_events.count("miss"),
+            )
+
+    def to_prometheus(self):
+        """
+        Return every metric in the Prometheus text format
+
+        :return string: content of the /metrics page
+        """
+        pid_label = f'pid="{os.getpid()}"'
+        lines = [
+            "# HELP fom_dash_callback_latency_seconds Duration of the callbacks",
+            "# TYPE fom_dash_callback_latency_seconds histogram",
+        ]
+        with self._lock:
+            for callback_name, histogram in sorted(self.latency.items()):
+                lines += histogram.to_prometheus(
+                    "fom_dash_callback_latency_seconds",
+                    f'{pid_label},callback="{escape(callback_name)}"',
+                )
+
+            lines += [
+                "# HELP fom_dash_callback_response_bytes"
+                " Uncompressed size of the callback responses",
+                "# TYPE fom_dash_callback_response_bytes histogram",
+            ]
+            for callback_name, histogram in sorted(self.response_size.items()):
+                lines += histogram.to_prometheus(
+                    "fom_dash_callback_response_bytes",
+                    f'{pid_label},callback="{escape(callback_name)}"',
+                )
+
+            per_inputs = {
+                "fom_dash_callback_inputs_calls_total": [],
+                "fom_dash_callback_inputs_latency_seconds_total": [],
+                "fom_dash_callback_inputs_response_bytes_total": [],
+                "fom_dash_callback_inputs_cache_hits_total": [],
+                "fom_dash_callback_inputs_cache_misses_total": [],
+            }
+            for callback_name, combinations in sorted(self.combinations.items()):
+                for inputs_label, values in sorted(combinations.items()):
+                    labels = (
+                        f'{pid_label},callback="{escape(callback_name)}",'
+                        f'inputs="{escape(inputs_label)}"'
+                    )
+                    for name, value in zip(per_inputs, values):
+                        per_inputs[name].append(f"{name}{{{labels}}} {value:g}")
+
+        for name, metric_lines in per_inputs.items():
+            lines.append(f"# TYPE {name} counter")
+            lines += metric_lines
+
+        lines.append("# HELP fom_dash_figure_cache_total Lookups of the figure cache")
+        lines.append("# TYPE fom_dash_figure_cache_total counter")
+        for callback_name, counters in sorted(figure_cache.stats.items()):
+            for event, count in sorted(counters.items()):
+                lines.append(
+                    f"fom_dash_figure_cache_total{{{pid_label},"
+                    f'callback="{escape(callback_name)}",'
+                    f'event="{event}"}} {count}'
+                )
+
+        return "\n".join(lines) + "\n"
+
+
+def escape(label_value):
+    """
+    Escape a label value of the Prometheus text format
+
+    :param string label_value: value to escape
+
+    :return string: escaped value
+    """
+    return (
+        str(label_value)
+        .replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+def quote_header(value):
+    """
+    Quote a parameter value of an HTTP header, such as the ids of
+    pattern matching outputs which hold double quotes
+
+    :param string value: value to quote
+
+    :return string: quoted string
+    """
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def get_inputs_label(inputs):
+    """
+    Return a short description of the values of the inputs of a callback
+
+    :param list inputs: inputs found in the body of the callback request
+
+    :return string: input values separated by '|'
+    """
+    values = []
+    for callback_input in inputs or []:
+        # inputs of pattern matching callbacks are lists of inputs
+        if isinstance(callback_input, list):
+            values.append(get_inputs_label(callback_input))
+            continue
+        value = callback_input.get("value")
+        # dictionaries such as relayoutData would make every call unique
+        value = "{...}" if isinstance(value, dict) else str(value)
+        if len(value) > MAX_INPUT_VALUE_LENGTH:
+            value = value[: MAX_INPUT_VALUE_LENGTH - 3] + "..."
+        values.append(value)
+
+    return "|".join(values)
+
+
+callback_metrics = CallbackMetrics()
+
+
+def install(server):
+    """
+    Instrument the callback requests of a Dash application
+    and add the /metrics route to its Flask server
+
+    :param Flask server: server of the Dash application
+    """
+
+    @server.before_request
+    def start_timer():
+        if flask.request.path.endswith(CALLBACK_PATH):
+            # lookups left by a previous request of the thread are ignored
+            figure_cache.pop_events()
+            flask.g.callback_start = time.perf_counter()
+
+    @server.after_request
+    def record_callback(response):
+        start = flask.g.pop("callback_start", None)
+        if start is None:
+            return response
+
+        latency = time.perf_counter() - start
+        body = flask.request.get_json(silent=True) or {}
+
+        if response.direct_passthrough:
+            response_size = response.content_length or 0
+        else:
+            response_size = len(response.get_data())
+
+        cache_events = figure_cache.pop_events()
+        callback_name = body.get("output", "unknown")
+
+        callback_metrics.observe(
+            callback_name,
+            get_inputs_label(body.get("inputs")),
+            latency,
+            response_size,
+            cache_events,
+        )
+
+        server_timing = (
+            f"callback;dur={latency * 1e3:.1f};desc={quote_header(callback_name)}"
+        )
+        if cache_events:
+            server_timing += (
+                f", figure-cache;desc={quote_header(','.join(cache_events))}"
+            )
+        response.headers.add("Server-Timing", server_timing)
+
+        return response
+
+    @server.route(METRICS_PATH)
+    def metrics():
+        return flask.Response(
+            callback_metrics.to_prometheus(),
+            mimetype="text/plain; version=0.0.4",
+        )
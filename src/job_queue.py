@@ -0,0 +1,128 @@
+"""
+Run the expensive callbacks in background processes
+in order to keep the gunicorn workers free to serve other users
+"""
+
+import os
+import tempfile
+
+import diskcache
+from dash import DiskcacheManager
+
+# Constants
+JOB_QUEUE_DIR = os.environ.get(
+    "JOB_QUEUE_DIR", os.path.join(tempfile.gettempdir(), "fom_dash_jobs")
+)
+MAX_WORKERS = int(os.environ.get("JOB_QUEUE_WORKERS", os.cpu_count() or 1))
+POOL_KEY = "job-queue-pool"
+POOL_EXPIRE = 600  # seconds, frees the slots of killed jobs eventually
+RESULT_EXPIRE = 300  # seconds a result waits for the clients sharing its job
+
+
+class JobQueueManager(DiskcacheManager):
+    """
+    Background callback manager storing its jobs on disk, which runs at most
+    max_workers jobs at the same time on the host, and lets clients asking
+    for the same callback with the same inputs share a single job.
+
+    A shared job is only killed when every client waiting for it
+    has changed its inputs or left the page.
+    """
+
+    def __init__(self, cache=None, max_workers=MAX_WORKERS, expire=None):
+        if cache is None:
+            cache = diskcache.Cache(JOB_QUEUE_DIR)
+        super().__init__(cache, expire=expire)
+        self.max_workers = max_workers
+
+    def make_job_fn(self, fn, progress, key=None):
+        job_fn = super().make_job_fn(fn, progress, key)
+        handle = self.handle
+        max_workers = self.max_workers
+
+        def pooled_job_fn(result_key, progress_key, user_callback_args, context):
+            # waits for a free slot of the pool, shared by every worker
+            with diskcache.BoundedSemaphore(
+                handle, POOL_KEY, value=max_workers, expire=POOL_EXPIRE
+            ):
+                job_fn(result_key, progress_key, user_callback_args, context)
+
+            # the result of a job whose clients left is dropped eventually
+            handle.touch(result_key, expire=RESULT_EXPIRE)
+            handle.touch(progress_key, expire=RESULT_EXPIRE)
+
+        return pooled_job_fn
+
+    def call_job_fn(self, key, job_fn, args, context):
+        with diskcache.Lock(self.handle, "job-lock-" + key):
+            job = self.handle.get("job-" + key)
+
+            # identical job already running or finished but not read by all
+            if job is not None and (self.job_running(job) or self.result_ready(key)):
+                self.handle.incr("job-waiting-" + key)
+                return job
+
+            job = super().call_job_fn(key, job_fn, args, context)
+            self.handle.set("job-" + key, job, expire=RESULT_EXPIRE)
+            self.handle.set("job-key-" + str(job), key, expire=RESULT_EXPIRE)
+            self.handle.set("job-waiting-" + key, 1, expire=RESULT_EXPIRE)
+
+        return job
+
+    def get_result(self, key, job):
+        result = self.handle.get(key, self.UNDEFINED)
+        if result is self.UNDEFINED:
+            return self.UNDEFINED
+
+        with diskcache.Lock(self.handle, "job-lock-" + key):
+            waiting = self.handle.decr("job-waiting-" + key, default=1)
+
+            # the last client waiting for the job clears it
+            if waiting <= 0:
+                self.clear_cache_entry(key)
+                self.clear_cache_entry(self._make_progress_key(key))
+                self.clear_cache_entry("job-" + key)
+                self.clear_cache_entry("job-waiting-" + key)
+                if job:
+                    self.clear_cache_entry("job-key-" + str(job))
+                    super().terminate_job(job)
+
+        return result
+
+    def get_progress(self, key):
+        # the progress is kept for every client sharing the job
+        return self.handle.get(self._make_progress_key(key))
+
+    def terminate_job(self, job):
+        if not job or int(job) <= 0:
+            return
+
+        key = self.handle.get("job-key-" + str(job))
+        if key is None:
+            super().terminate_job(job)
+            return
+
+        with diskcache.Lock(self.handle, "job-lock-" + key):
+            # the job is finished, its result is being read
+            if self.result_ready(key):
+                return
+
+            # cancellation by a client, the job is only killed
+            # when nobody else is waiting for it
+            waiting = self.handle.decr("job-waiting-" + key, default=1)
+            if waiting > 0:
+                return
+
+            self.clear_cache_entry("job-" + key)
+            self.clear_cache_entry("job-waiting-" + key)
+            self.clear_cache_entry("job-key-" + str(job))
+            super().terminate_job(job)
+
+    def job_running(self, job):
+        if not job or int(job) <= 0:
+            return False
+
+        return super().job_running(job)
+
+
+job_manager = JobQueueManager()
@@ -0,0 +1,227 @@
+"""
+Reduce the number of points sent to the browser
+according to the region of the plot displayed by the user
+"""
+
+import numpy as np
+
+# Constants
+MAX_POINTS = 5000  # points sent for a scatter trace
+GRID_SIZE = 50  # cells per axis of the density grid
+WEBGL_THRESHOLD = 1000  # points above which WebGL is used for rendering
+MESH_DISPLAY_SIZE = 256  # points per axis of a mesh sent for a contour plot
+RANGE_DECIMALS = 3  # rounding of the axis ranges in the cache keys
+
+
+def get_viewport(relayout_data, default_x_range, default_y_range):
+    """
+    Return the region of the plot displayed by the user
+
+    :param dict relayout_data: relayoutData property of the graph
+    :param list default_x_range: x range used when the plot is not zoomed
+    :param list default_y_range: y range used when the plot is not zoomed
+
+    :return tuple: x range and y range, in axis units
+        (log10 of the values for logarithmic axes)
+    """
+    return (
+        get_axis_range(relayout_data, "xaxis", default_x_range),
+        get_axis_range(relayout_data, "yaxis", default_y_range),
+    )
+
+
+def round_relayout_data(relayout_data, decimals=RANGE_DECIMALS):
+    """
+    Return the ranges of the zoomed axes of the relayoutData of a graph,
+    rounded, without its other entries, so that close zooms share the
+    same cache keys
+
+    :param dict relayout_data: relayoutData property of the graph
+    :param int decimals: rounding of the bounds, in axis units
+
+    :return dict: rounded range of each zoomed axis, None if no axis is zoomed
+    """
+    rounded = {}
+    for axis_name in ("xaxis", "yaxis"):
+        axis_range = get_axis_range(relayout_data, axis_name, [None, None])
+        if None not in axis_range:
+            rounded[axis_name + ".range"] = [
+                round(bound, decimals) for bound in axis_range
+            ]
+
+    return rounded or None
+
+
+def get_axis_range(relayout_data, axis_name, default_range):
+    """
+    Return the range of an axis found in the relayoutData of a graph
+
+    :param dict relayout_data: relayoutData property of the graph
+    :param string axis_name: name of the axis in the layout
+    :param list default_range: range used when the axis is not zoomed
+
+    :return list: lower and upper bound of the axis
+    """
+    if not relayout_data or relayout_data.get(axis_name + ".autorange"):
+        return list(default_range)
+
+    if axis_name + ".range[0]" in relayout_data:
+        axis_range = [
+            relayout_data[axis_name + ".range[0]"],
+            relayout_data.get(axis_name + ".range[1]", default_range[1]),
+        ]
+    elif axis_name + ".range" in relayout_data:
+        axis_range = relayout_data[axis_name + ".range"]
+    else:
+        return list(default_range)
+
+    try:
+        lower, upper = sorted(float(bound) for bound in axis_range)
+    except (TypeError, ValueError):
+        return list(default_range)
+
+    if lower == upper:
+        return list(default_range)
+
+    return [lower, upper]
+
+
+def decimate(log_x, log_y, x_range, y_range, max_points=MAX_POINTS, seed=0):
+    """
+    Select a subset of the points inside the viewport
+    which keeps their density and every populated region
+
+    The viewport is divided in a GRID_SIZE x GRID_SIZE grid and each cell
+    keeps a share of its points proportional to its population, with at
+    least one point, so the number of selected points is bounded by
+    max_points + GRID_SIZE ** 2.
+
+    :param array log_x: x coordinates of the points in axis units
+    :param array log_y: y coordinates of the points in axis units
+    :param list x_range: x range of the viewport in axis units
+    :param list y_range: y range of the viewport in axis units
+    :param int max_points: number of points above which points are removed
+    :param int seed: seed of the random order of the points inside a cell
+
+    :return array: sorted indices of the selected points
+    """
+    visible = np.flatnonzero(
+        (log_x >= x_range[0])
+        & (log_x <= x_range[1])
+        & (log_y >= y_range[0])
+        & (log_y <= y_range[1])
+    )
+
+    if visible.size <= max_points:
+        return visible
+
+    # cell of each visible point
+    cell_x = (log_x[visible] - x_range[0]) / (x_range[1] - x_range[0]) * GRID_SIZE
+    cell_y = (log_y[visible] - y_range[0]) / (y_range[1] - y_range[0]) * GRID_SIZE
+    cells = np.clip(cell_x.astype(np.intp), 0, GRID_SIZE - 1) * GRID_SIZE + np.clip(
+        cell_y.astype(np.intp), 0, GRID_SIZE - 1
+    )
+
+    # random order of the points inside each cell
+    order = np.random.default_rng(seed).permutation(visible.size)
+    order = order[np.argsort(cells[order], kind="stable")]
+    sorted_cells = cells[order]
+
+    counts = np.bincount(cells, minlength=GRID_SIZE * GRID_SIZE)
+    quotas = np.maximum(1, counts * max_points // visible.size)
+    starts = np.cumsum(counts) - counts
+    rank_in_cell = np.arange(visible.size) - starts[sorted_cells]
+
+    selected = order[rank_in_cell < quotas[sorted_cells]]
+
+    return visible[np.sort(selected)]
+
+
+def use_webgl(nb_points):
+    """
+    Return if a trace should be rendered with WebGL
+
+    :param int nb_points: number of points of the trace
+
+    :return boolean: True if the trace is large enough to need WebGL
+    """
+    return nb_points > WEBGL_THRESHOLD
+
+
+def select_mesh(pyramid, x_range, y_range, log_x=False, display_size=MESH_DISPLAY_SIZE):
+    """
+    Return the region displayed by the user of the coarsest level of a
+    pyramid of meshes which has display_size points per axis in the region,
+    or as many points as the full resolution level if it has less
+
+    The axes of the selected level are then sampled with a stride so that
+    at most display_size points per axis are sent, which also covers an
+    axis left unzoomed while the other one is zoomed in.
+
+    :param list pyramid: sorted x axis, sorted y axis and mesh of each
+        level, from the full resolution to the coarsest
+    :param list x_range: x range of the region, in axis units
+    :param list y_range: y range of the region, in axis units
+    :param boolean log_x: True if the x axis is logarithmic
+    :param int display_size: points per axis needed for the plot
+
+    :return tuple: x axis, y axis and mesh of the region, with one more
+        point on each side so that the plot covers the whole region
+    """
+
+    def get_regions(x_axis, y_axis):
+        return (
+            get_axis_region(np.log10(x_axis) if log_x else x_axis, x_range),
+            get_axis_region(y_axis, y_range),
+        )
+
+    x_axis, y_axis, mesh = pyramid[0]
+    columns, rows = get_regions(x_axis, y_axis)
+    needed_columns = min(display_size, len(columns))
+    needed_rows = min(display_size, len(rows))
+
+    # the coarsest level with enough points, the full resolution otherwise
+    for level in reversed(pyramid[1:]):
+        level_columns, level_rows = get_regions(*level[:2])
+        if len(level_columns) >= needed_columns and len(level_rows) >= needed_rows:
+            x_axis, y_axis, mesh = level
+            columns, rows = level_columns, level_rows
+            break
+
+    columns = get_axis_sample(columns, display_size)
+    rows = get_axis_sample(rows, display_size)
+
+    return x_axis[columns], y_axis[rows], mesh[np.ix_(rows, columns)]
+
+
+def get_axis_region(axis, axis_range):
+    """
+    Return the points of a sorted axis inside a range,
+    plus the closest point outside of each bound
+
+    :param array axis: sorted values of the axis
+    :param list axis_range: lower and upper bound of the range
+
+    :return array: indices of the points
+    """
+    start = max(np.searchsorted(axis, axis_range[0], side="right") - 1, 0)
+    stop = min(np.searchsorted(axis, axis_range[1], side="left") + 1, len(axis))
+
+    return np.arange(start, max(stop, start + 1))
+
+
+def get_axis_sample(indices, display_size):
+    """
+    Return one point every n of the points of an axis, n being the
+    smallest stride keeping at most display_size points, plus the last point
+
+    :param array indices: indices of the points of the axis
+    :param int display_size: points per axis needed for the plot
+
+    :return array: indices of the kept points
+    """
+    stride = max(-(-len(indices) // display_size), 1)
+    if stride == 1:
+        return indices
+
+    return np.unique(np.append(indices[::stride], indices[-1]))
@@ -0,0 +1,288 @@
+"""
+Cache the noise curves displayed on the sensitivity page
+in order to compute them only once per configuration
+"""
+
+from collections import OrderedDict
+import threading
+
+import numpy as np
+
+from artifacts import artifacts, get_noise_curves_name  # pylint: disable=import-error
+from duration_tables import duration_tables  # pylint: disable=import-error
+
+# Constants
+LOG_FREQ_MIN = -5  # log10(Hz)
+LOG_FREQ_MAX = 0  # log10(Hz)
+FREQ_SIZE = 9990
+SKY_AVERAGING_FACTOR = 20 / 3
+VIEWPORT_DENSE_SIZE = 20000  # points where the noise is evaluated in a viewport
+VIEWPORT_SIZE = 1000  # points of the curves sent for a viewport
+VIEWPORT_DECIMALS = 3  # rounding of the viewport bounds in the cache keys
+CURVATURE_FLOOR = 0.1  # share of the points spread regardless of the curvature
+
+
+class NoiseCurveCache:
+    """
+    Compute and store the characteristic strain of the noise curves
+    for each (noise budget, mission duration) pair, on the full frequency
+    grid and resampled for the viewports displayed by the users.
+
+    The least recently used curves are evicted when more than
+    max_size configurations, or max_viewports viewports, are stored.
+    """
+
+    def __init__(self, max_size=8, max_viewports=64):
+        self.max_size = max_size
+        self.max_viewports = max_viewports
+        self._curves = OrderedDict()
+        self._viewport_curves = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_curves(self, noise, duration):
+        """
+        Return the noise curves of a configuration,
+        computing them if they are not already stored
+
+        :param string noise: name of the noise budget
+        :param float duration: mission duration in years
+
+        :return tuple: frequency grid, characteristic strain of the
+            instrumental noise and of the instrumental plus confusion noise
+        """
+        return self.get_or_compute(
+            self._curves,
+            self.max_size,
+            (noise, float(duration)),
+            lambda: artifacts.load_arrays(
+                get_noise_curves_name(noise, duration),
+                ("freq", "strain_instru", "strain_total"),
+            )
+            or compute_noise_curves(noise, float(duration)),
+        )
+
+    def get_viewport_curves(self, noise, duration, x_range, size=VIEWPORT_SIZE):
+        """
+        Return the noise curves of a configuration sampled for a viewport,
+        with more points where the curves bend
+
+        :param string noise: name of the noise budget
+        :param float duration: mission duration in years
+        :param list x_range: log10 of the frequency bounds of the viewport
+        :param int size: number of points of the curves
+
+        :return tuple: frequencies, characteristic strain of the
+            instrumental noise and of the instrumental plus confusion noise
+        """
+        # the noise model is only evaluated on the frequency band of the page
+        log_freq_min = round(max(x_range[0], LOG_FREQ_MIN), VIEWPORT_DECIMALS)
+        log_freq_max = round(min(x_range[1], LOG_FREQ_MAX), VIEWPORT_DECIMALS)
+        if log_freq_min >= log_freq_max:
+            log_freq_min, log_freq_max = LOG_FREQ_MIN, LOG_FREQ_MAX
+
+        def compute():
+            # the unzoomed curves are built by precompute.py
+            if (log_freq_min, log_freq_max, size) == (
+                LOG_FREQ_MIN,
+                LOG_FREQ_MAX,
+                VIEWPORT_SIZE,
+            ):
+                curves = artifacts.load_arrays(
+                    get_noise_curves_name(noise, duration),
+                    ("viewport_freq", "viewport_instru", "viewport_total"),
+                )
+                if curves is not None:
+                    return curves
+
+            return compute_viewport_curves(
+                noise, float(duration), log_freq_min, log_freq_max, size
+            )
+
+        return self.get_or_compute(
+            self._viewport_curves,
+            self.max_viewports,
+            (noise, float(duration), log_freq_min, log_freq_max, size),
+            compute,
+        )
+
+    def get_or_compute(
+        self, store, max_size, key, compute
+    ):  # pylint: disable=too-many-arguments
+        """
+        Return a stored value, computing and storing it if needed
+
+        :param OrderedDict store: stored values, least recently used first
+        :param int max_size: maximum number of stored values
+        :param tuple key: key of the value
+        :param function compute: function without argument computing the value
+
+        :return: the stored value
+        """
+        with self._lock:
+            if key in store:
+                store.move_to_end(key)
+                return store[key]
+
+        # computed outside of the lock so that other configurations
+        # can still be served in the meantime
+        value = compute()
+
+        with self._lock:
+            store[key] = value
+            store.move_to_end(key)
+            while len(store) > max_size:
+                store.popitem(last=False)
+
+        return value
+
+    def warm_up(self, conf_manager):
+        """
+        Compute the noise curves of every configuration
+        listed in the configuration file
+
+        :param ConfigManager conf_manager: manager of the configuration file
+        """
+        for noise, duration in conf_manager.get_configurations(
+            "SO1.sensitivity.resolved_binaries"
+        ):
+            self.get_curves(noise, float(duration))
+
+    def clear(self):
+        """Remove every stored noise curve"""
+        with self._lock:
+            self._curves.clear()
+            self._viewport_curves.clear()
+
+
+def compute_noise_curves(noise, duration, freq=None):
+    """
+    Compute the characteristic strain of the noise curves
+
+    :param string noise: name of the noise budget
+    :param float duration: mission duration in years
+    :param array freq: frequencies where the noise is computed,
+        FREQ_SIZE log spaced frequencies of the page band by default
+
+    :return tuple: frequency grid, characteristic strain of the
+        instrumental noise and of the instrumental plus confusion noise
+    """
+    # imported on first use in order to speed up the start of the server
+    # pylint: disable=import-outside-toplevel,import-error
+    from scipy.interpolate import InterpolatedUnivariateSpline as spline
+    from fomweb import analytic_noise
+    from fomweb import utils
+
+    noise_instru = analytic_noise.InstrumentalNoise(name=noise)
+
+    if freq is None:
+        freq = np.logspace(LOG_FREQ_MIN, LOG_FREQ_MAX, FREQ_SIZE)
+
+    # noise psd
+    sxx_noise_instru_only = noise_instru.psd(freq, option="X")
+    # exact on the durations of the duration table, interpolated on it
+    # in between so that the slider does not evaluate the model at each step
+    sxx_confusion_noise_only = duration_tables.get_confusion_psd(freq, duration)
+    sxx_noise = sxx_noise_instru_only + sxx_confusion_noise_only
+
+    # response
+    r_ = utils.fast_response(freq)
+
+    # noise sensitivity
+    sh = spline(freq, sxx_noise_instru_only / r_)
+    sh_wd = utils.psd2sh(freq, sxx_noise, sky_averaging=False)
+
+    strain_instru = np.sqrt(freq) * np.sqrt(sh(freq))
+    strain_total = np.sqrt(freq) * np.sqrt(SKY_AVERAGING_FACTOR) * np.sqrt(sh_wd(freq))
+
+    # the arrays are shared between callbacks and must not be modified
+    for array in (freq, strain_instru, strain_total):
+        array.flags.writeable = False
+
+    return freq, strain_instru, strain_total
+
+
+def compute_viewport_curves(noise, duration, log_freq_min, log_freq_max, size):
+    """
+    Compute the noise curves on a dense grid of the viewport
+    and keep the points needed to draw them
+
+    :param string noise: name of the noise budget
+    :param float duration: mission duration in years
+    :param float log_freq_min: log10 of the lower frequency of the viewport
+    :param float log_freq_max: log10 of the upper frequency of the viewport
+    :param int size: number of points of the curves
+
+    :return tuple: frequencies, characteristic strain of the
+        instrumental noise and of the instrumental plus confusion noise
+    """
+    freq, strain_instru, strain_total = compute_noise_curves(
+        noise,
+        duration,
+        np.logspace(log_freq_min, log_freq_max, VIEWPORT_DENSE_SIZE),
+    )
+
+    indices = select_by_curvature(
+        np.log10(strain_instru), np.log10(strain_total), size=size
+    )
+
+    return freq[indices], strain_instru[indices], strain_total[indices]
+
+
+def select_by_curvature(*log_curves, size):
+    """
+    Select points of curves sampled on a regular grid so that the
+    density of the selected points follows the curvature of the curves
+
+    Linear interpolation error on a segment grows with the second derivative
+    times the square of its length, so the density of points is taken as the
+    square root of the curvature, plus a uniform share CURVATURE_FLOOR so
+    that smooth regions keep a few points. The density is capped so that a
+    sharp bend does not take several of the points on the same sample.
+
+    :param array log_curves: log10 of the curves on the same regular grid
+    :param int size: number of points to select
+
+    :return array: sorted indices of the selected points
+    """
+    nb_points = len(log_curves[0])
+    if nb_points <= size:
+        return np.arange(nb_points)
+
+    curvature = np.zeros(nb_points)
+    for log_curve in log_curves:
+        curvature = np.maximum(curvature, np.abs(np.gradient(np.gradient(log_curve))))
+
+    density = np.sqrt(curvature)
+    density += CURVATURE_FLOOR * max(density.mean(), np.finfo(float).tiny)
+    density = cap_density(density, size)
+
+    # points at regular steps of the cumulated density
+    cumulated = np.cumsum(density)
+    targets = np.linspace(cumulated[0], cumulated[-1], size)
+    indices = np.searchsorted(cumulated, targets)
+
+    return np.unique(np.concatenate(([0], indices, [nb_points - 1])))
+
+
+def cap_density(density, size):
+    """
+    Cap a density of points so that no sample holds more than one of the
+    size selected points, the share removed from the peaks going to the
+    other samples
+
+    :param array density: positive density of each sample
+    :param int size: number of points to select, lower than the samples
+
+    :return array: capped density
+    """
+    descending = np.sort(density)[::-1]
+    # cap when the k highest samples are capped, each of the others
+    # holding its density among the size - k remaining points
+    remaining = np.cumsum(descending[::-1])[::-1][:size]
+    caps = remaining / (size - np.arange(size))
+    first_uncapped = np.flatnonzero(descending[:size] <= caps)[0]
+
+    return np.minimum(density, caps[first_uncapped])
+
+
+noise_cache = NoiseCurveCache()
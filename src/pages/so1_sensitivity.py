@@ -2,7 +2,8 @@
 
 # dash
 import dash
-from dash import html, dcc, callback, Output, Input
+from dash import html, dcc, callback, clientside_callback, Output, Input, State
+from dash import Patch, no_update
 import dash_bootstrap_components as dbc
 
 # plotly
@@ -10,19 +11,39 @@ import plotly.graph_objects as go
 
 # common
 import numpy as np
-from scipy.interpolate import InterpolatedUnivariateSpline as spline
 
 # homemade import
 # pylint: disable=import-error
-from fomweb import sensitivity
-from fomweb import analytic_noise
-from fomweb import utils
+from artifacts import artifacts  # pylint: disable=import-error
 from config_manager import ConfigManager  # pylint: disable=import-error
+from figure_cache import figure_cache  # pylint: disable=import-error
+import figure_encoding  # pylint: disable=import-error
+import level_of_detail  # pylint: disable=import-error
+from catalog_store import catalog_store  # pylint: disable=import-error
+from duration_tables import (  # pylint: disable=import-error
+    duration_tables,
+    check_configuration,
+)
+import export  # pylint: disable=import-error
+from noise_cache import noise_cache  # pylint: disable=import-error
+from vgb_table import VerificationBinariesTable  # pylint: disable=import-error
+from warm_up import warm_up_scheduler  # pylint: disable=import-error
 
 ##############################################################################
 
 dash.register_page(__name__)
 
+# Constants
+X_RANGE = [-5, 0]  # log10(Hz)
+Y_RANGE = [-22, -15]  # log10(characteristic strain)
+DEFAULT_BINARIES = ["Verification binaries"]  # selected when the page opens
+DEFAULT_SELECTED_GB = "select all"
+EXPORTS = {
+    "noise_curves": "Noise curves",
+    "verification_binaries": "Verification binaries",
+    "resolved_binaries": "Resolved binaries",
+}
+
 ### data init
 
 # resolved binaries configuration manager
@@ -33,107 +54,166 @@ input_gb_filename = conf_manager.get_data_file(
     "SO1.sensitivity.verification_binaries", "vgb"
 )
 
-gb_config_file = np.load(input_gb_filename)
+# the catalog is only loaded when the page is displayed for the first time
+vgb_table = VerificationBinariesTable(input_gb_filename)
 
-list_of_names = gb_config_file["Name"]
-
-list_of_names_opt = list_of_names
-list_of_names_opt = np.append("select all", list_of_names_opt)
+# data depending on the configuration file is invalidated when it changes
+conf_manager.add_reload_listener(artifacts.clear)
+conf_manager.add_reload_listener(catalog_store.clear)
+conf_manager.add_reload_listener(duration_tables.clear)
+conf_manager.add_reload_listener(
+    lambda: vgb_table.set_data_file(
+        conf_manager.get_data_file("SO1.sensitivity.verification_binaries", "vgb")
+    )
+)
+conf_manager.add_reload_listener(figure_cache.clear)
 
 ##############################################################################
 # layout of the page
-layout = html.Div(
-    [  # pylint: disable=unused-variable
-        html.H1("Sensitivity curves"),
-        html.P("Binaries selection"),
-        dcc.Checklist(
-            id="binaries_selector",
-            options=[
-                "Verification binaries",
-                "Resolved binaries",
-                "Stellar mass binaries",
-                "Massive black hole",
-                "Multiband sources",
-            ],
-            value=["Verification binaries"],
-            inline=True,
-        ),
-        html.P(""),
-        html.Div(
-            [
-                html.P("Sources selection"),
-                dcc.Dropdown(
-                    id="gb_selector",
-                    options=list_of_names_opt,
-                    value="select all",
-                    multi=True,
-                    placeholder="Select galactic binaries",
-                    disabled=False,
-                ),
-            ],
-            id="gb_dropdown",
-            style={"display": "block"},
-        ),
-        dcc.Graph(
-            id="sensitivity_graph",
-            figure={
-                "layout": {
-                    "height": 700,  # px
+def layout(**_query_parameters):  # pylint: disable=unused-variable
+    """
+    Return the layout of the page, built when the page is displayed
+    in order to load the verification binaries catalog on first use
+
+    :return html.Div layout of the page
+    """
+    list_of_names_opt = np.append("select all", vgb_table.names)
+
+    return html.Div(
+        [
+            html.H1("Sensitivity curves"),
+            html.P("Binaries selection"),
+            dcc.Checklist(
+                id="binaries_selector",
+                options=[
+                    "Verification binaries",
+                    "Resolved binaries",
+                    "Stellar mass binaries",
+                    "Massive black hole",
+                    "Multiband sources",
+                ],
+                value=DEFAULT_BINARIES,
+                inline=True,
+            ),
+            html.P(""),
+            html.Div(
+                [
+                    html.P("Sources selection"),
+                    dcc.Dropdown(
+                        id="gb_selector",
+                        options=list_of_names_opt,
+                        value=DEFAULT_SELECTED_GB,
+                        multi=True,
+                        placeholder="Select galactic binaries",
+                        disabled=False,
+                    ),
+                ],
+                id="gb_dropdown",
+                style={"display": "block"},
+            ),
+            # source classes whose points are in the figure, with the
+            # verification binaries selected when their points were sent
+            dcc.Store(id="sensitivity_loaded_sources"),
+            # configuration of the displayed figure, None while it is computed
+            dcc.Store(id="sensitivity_figure_config"),
+            # inputs of the figure computed by the background job
+            dcc.Store(id="sensitivity_job"),
+            dbc.Progress(
+                id="sensitivity_progress",
+                value=0,
+                style={"visibility": "hidden"},
+            ),
+            dcc.Graph(
+                id="sensitivity_graph",
+                figure={
+                    "layout": {
+                        "height": 700,  # px
+                    },
                 },
-            },
-        ),
-        dbc.Nav(
-            [
-                html.Div(
-                    dbc.NavLink(
-                        "View as notebook",
-                        href="https://nbviewer.org/github/Salander619/FOM_Dash/blob/main/src/notebooks/sensitivity_plot.ipynb",  # pylint: disable=line-too-long
-                        active="exact",
+            ),
+            export.make_links(EXPORTS),
+            dbc.Nav(
+                [
+                    html.Div(
+                        dbc.NavLink(
+                            "View as notebook",
+                            href="https://nbviewer.org/github/Salander619/FOM_Dash/blob/main/src/notebooks/sensitivity_plot.ipynb",  # pylint: disable=line-too-long
+                            active="exact",
+                        ),
                     ),
-                ),
-            ],
-            vertical=True,
-            pills=True,
-        ),
-    ]
-)
+                ],
+                vertical=True,
+                pills=True,
+            ),
+        ]
+    )
+
 
 ##############################################################################
 
 # pylint: disable=unused-variable
 
 
-@callback(Output("gb_dropdown", "style"), Input("binaries_selector", "value"))
-def display_dropdown(binaries_to_display):
+# Display the dropdown to select verification binaries, visible (Block)
+# or not (None) along the binaries selected by the user in the checklist.
+# Run by the browser in order to avoid a request to the server.
+clientside_callback(
     """
-    Display the dropdown to select verification binaries
+    function (binaries_to_display) {
+        if ((binaries_to_display || []).includes("Verification binaries")) {
+            return {"display": "Block"};
+        }
+
+        return {"display": "None"};
+    }
+    """,
+    Output("gb_dropdown", "style"),
+    Input("binaries_selector", "value"),
+)
 
-    :param list binaries_to_display:
-        list of binaries selected by the user in the checklist
 
-    :return style of the dropdown, visible (Block) or not (None)
-    """
-    if "Verification binaries" in binaries_to_display:
-        return {"display": "Block"}
+# Traces of the figure, always present in this order so that the partial
+# updates can address them, hidden when the source class is not selected
+RESOLVED_TRACE = 0
+VERIFICATION_TRACE = 1
+INSTRUMENTAL_TRACE = 2
+TOTAL_TRACE = 3
 
-    return {"display": "None"}
+# Source classes whose points can be sent to the figure
+SOURCE_CLASSES = ["Resolved binaries", "Verification binaries"]
 
 
 # Create plots
 @callback(
-    Output("sensitivity_graph", "figure"),
+    [
+        Output("sensitivity_graph", "figure"),
+        Output("sensitivity_loaded_sources", "data"),
+        Output("sensitivity_figure_config", "data"),
+        Output("sensitivity_job", "data"),
+    ],
     [
         Input("config_noise_budget", "data"),
         Input("config_mission_duration", "data"),
-        Input("gb_selector", "value"),
-        Input("binaries_selector", "value"),
+    ],
+    [
+        State("gb_selector", "value"),
+        State("binaries_selector", "value"),
+        State("sensitivity_graph", "relayoutData"),
     ],
 )
 def update_graph(
-    selected_noise_config, selected_duration, selected_gb, binaries_to_display
+    selected_noise_config,
+    selected_duration,
+    selected_gb,
+    binaries_to_display,
+    relayout_data,
 ):
     """
-    This function return the sensitivity curves
+    This function return the sensitivity curves,
+    rebuilt entirely when the configuration changes.
+
+    Stored figures are served by the worker, which keeps its caches, the
+    others are computed by compute_graph in a background job.
 
     :param string config_noise_budget: noise configuration choosen with
         radio button in the sidebar
@@ -143,133 +223,375 @@ def update_graph(
         on the plot, selected with the dropdown menu in the layout
     :param list binaries_selector: list of binaries to display on the plot,
         selected with the checklist on the layout
+    :param dict relayout_data: zoom of the user on the graph
 
     :return figure sensitivity_graph: sensitivity curve plus galactic binaries
+    :return dict source classes whose points are in the figure
+    :return list configuration of the figure, None until it is computed
+    :return list inputs of the figure to compute in the background
     """
+    inputs = get_figure_inputs(
+        selected_noise_config,
+        selected_duration,
+        selected_gb,
+        binaries_to_display,
+        relayout_data,
+    )
 
-    mission_duration = selected_duration
-    display_mode = "x unified"
+    # the displayed figure is outdated until the job sends the new one
+    if not figure_cache.contains("so1_sensitivity.build_figure", inputs):
+        return no_update, no_update, None, inputs
+
+    return (
+        build_figure(*inputs),
+        get_loaded_sources(selected_gb, binaries_to_display),
+        inputs[:2],
+        no_update,
+    )
+
+
+@callback(
+    [
+        Output("sensitivity_graph", "figure", allow_duplicate=True),
+        Output("sensitivity_loaded_sources", "data", allow_duplicate=True),
+        Output("sensitivity_figure_config", "data", allow_duplicate=True),
+    ],
+    Input("sensitivity_job", "data"),
+    # computed in a background job, canceled when the user leaves the page
+    background=True,
+    progress=[
+        Output("sensitivity_progress", "value"),
+        Output("sensitivity_progress", "label"),
+    ],
+    running=[
+        (
+            Output("sensitivity_progress", "style"),
+            {"visibility": "visible"},
+            {"visibility": "hidden"},
+        ),
+    ],
+    cancel=[Input("url", "pathname")],
+    prevent_initial_call=True,
+)
+def compute_graph(set_progress, inputs):
+    """
+    Compute a sensitivity figure which is not stored yet
 
-    table_verification_gb = []
-    table_resolved_gb = []
+    :param function set_progress: report the progress to the page
+    :param list inputs: configuration, verification binaries, source classes
+        and zoom of the figure, as passed to build_figure
+
+    :return figure sensitivity_graph: sensitivity curve plus galactic binaries
+    :return dict source classes whose points are in the figure
+    :return list configuration of the figure
+    """
+    if inputs is None:
+        return no_update, no_update, no_update
+
+    # the durations sent back by the browser lose their decimal point
+    inputs = get_figure_inputs(*inputs)
+    (
+        selected_noise_config,
+        selected_duration,
+        selected_gb,
+        binaries_to_display,
+        relayout_data,
+    ) = inputs
+
+    # the slow steps are computed first in order to report their progress
+    x_range, _ = level_of_detail.get_viewport(relayout_data, X_RANGE, Y_RANGE)
+
+    set_progress((10, "Noise curves"))
+    noise_cache.get_viewport_curves(selected_noise_config, selected_duration, x_range)
 
     if "Verification binaries" in binaries_to_display:
-        if selected_gb is None:
-            list_of_gb = []
-        else:
-            if "select all" in selected_gb:
-                list_of_gb = list_of_names
-            else:
-                list_of_gb = selected_gb
+        set_progress((40, "Verification binaries"))
+        vgb_table.get_table(selected_noise_config, selected_duration)
 
-        catalog_selected_gb = [gb for gb in gb_config_file if gb["Name"] in list_of_gb]
+    set_progress((80, "Figure"))
+    fig = build_figure(*inputs)
+    set_progress((100, ""))
 
-        table_verification_gb = sensitivity.compute_gb_sensitivity(
-            catalog=catalog_selected_gb,
-            noise=selected_noise_config,
-            duration=mission_duration,
-        )
+    return fig, get_loaded_sources(selected_gb, binaries_to_display), inputs[:2]
 
-        vf = []
-        vy = []
-        snr = []
 
-        for vgb in table_verification_gb:
-            vf.append(float(vgb["freq"]))
-            vy.append(float(np.sqrt(vgb["freq"] * vgb["sh"])))
-            snr.append(float(vgb["snr"]))
+def get_figure_inputs(
+    selected_noise_config,
+    selected_duration,
+    selected_gb,
+    binaries_to_display,
+    relayout_data,
+):
+    """
+    Return the inputs of build_figure in the form of the figure cache keys
 
-    if "Resolved binaries" in binaries_to_display:
+    :param string selected_noise_config: noise configuration
+    :param float selected_duration: mission duration, a JavaScript number
+        without decimal point for whole years
+    :param list selected_gb: names selected in the dropdown menu
+    :param list binaries_to_display: source classes selected by the user
+    :param dict relayout_data: zoom of the user on the graph
 
-        input_resolved_binaries_filename = conf_manager.get_data_file(
-            "SO1.sensitivity.resolved_binaries",
-            (selected_noise_config, str(selected_duration)),
-        )
+    :return list: inputs of build_figure
+    """
+    return [
+        selected_noise_config,
+        None if selected_duration is None else float(selected_duration),
+        selected_gb,
+        binaries_to_display,
+        # only the zoom, rounded, so that close zooms share their figure
+        level_of_detail.round_relayout_data(relayout_data),
+    ]
 
-        table_resolved_gb = np.load(input_resolved_binaries_filename)
 
-        rb_vf = []
-        rb_vy = []
+def is_displayed(figure_config, selected_noise_config, selected_duration):
+    """
+    Return if the displayed figure was built for the configuration of the
+    sidebar, the partial updates of another figure being discarded
 
-        for vgb in table_resolved_gb:
-            rb_vf.append(float(vgb["freq"]))
-            rb_vy.append(float(np.sqrt(vgb["freq"] * vgb["sh"])))
+    :param list figure_config: configuration of the displayed figure
+    :param string selected_noise_config: noise configuration
+    :param float selected_duration: mission duration
 
-    ##########################################################################
+    :return boolean: True if the figure can be patched
+    """
+    if figure_config is None or selected_duration is None:
+        return False
 
-    #########
-    # A REMPLACER (VOIR NOTEBOOK)
-    #########
+    return figure_config == [selected_noise_config, float(selected_duration)]
 
-    ## prepare the data
 
-    # noise
-    noise_instru = analytic_noise.InstrumentalNoise(name=selected_noise_config)
-    noise_confu = analytic_noise.ConfusionNoise()
+def get_loaded_sources(selected_gb, binaries_to_display):
+    """
+    Return the source classes whose points are in a full figure
 
-    freq = np.logspace(-5, 0, 9990)
-    duration = mission_duration  # years
-    # to control the +10000
+    :param list selected_gb: names selected in the dropdown menu
+    :param list binaries_to_display: source classes selected by the user
 
-    # noise psd
-    sxx_noise_instru_only = noise_instru.psd(freq, option="X")
-    sxx_confusion_noise_only = noise_confu.psd(freq, duration=duration, option="X")
-    sxx_noise = sxx_noise_instru_only + sxx_confusion_noise_only
+    :return dict: source classes whose points are in the figure, with the
+        verification binaries selection for the verification binaries
+    """
+    return {
+        source: selected_gb if source == "Verification binaries" else None
+        for source in SOURCE_CLASSES
+        if source in binaries_to_display
+    }
 
-    # response
-    r_ = utils.fast_response(freq)
-    # NOISE SENSITIVITY
-    sh = spline(freq, sxx_noise_instru_only / r_)
-    sh_wd = utils.psd2sh(freq, sxx_noise, sky_averaging=False)
 
-    ##########################################################################
+@callback(
+    [
+        Output("sensitivity_graph", "figure", allow_duplicate=True),
+        Output("sensitivity_loaded_sources", "data", allow_duplicate=True),
+    ],
+    [
+        Input("gb_selector", "value"),
+        Input("binaries_selector", "value"),
+        # the selection may have changed while a job computed the figure
+        Input("sensitivity_figure_config", "data"),
+    ],
+    [
+        State("config_noise_budget", "data"),
+        State("config_mission_duration", "data"),
+        State("sensitivity_graph", "relayoutData"),
+        State("sensitivity_loaded_sources", "data"),
+    ],
+    prevent_initial_call=True,
+)
+def update_sources(  # pylint: disable=too-many-arguments
+    selected_gb,
+    binaries_to_display,
+    figure_config,
+    selected_noise_config,
+    selected_duration,
+    relayout_data,
+    loaded_sources,
+):
+    """
+    Send only the traces of the source classes which differ between the
+    displayed figure and the selection of the user
 
-    # Plot creation
+    :param list gb_selector: list of verification binaries to display
+    :param list binaries_selector: list of binaries to display on the plot
+    :param list figure_config: configuration of the displayed figure
+    :param string config_noise_budget: noise configuration
+    :param float config_mission_duration: mission duration
+    :param dict relayout_data: zoom of the user on the graph
+    :param dict loaded_sources: source classes whose points are in the figure
+
+    :return Patch partial update of sensitivity_graph
+    :return dict source classes whose points are in the figure
+    """
+    if not is_displayed(figure_config, selected_noise_config, selected_duration):
+        return no_update, no_update
+
+    loaded_sources = dict(loaded_sources or {})
+    x_range, y_range = level_of_detail.get_viewport(relayout_data, X_RANGE, Y_RANGE)
+    patched_figure = Patch()
+
+    # the verification binaries were sent for another selection
+    if loaded_sources.get("Verification binaries", selected_gb) != selected_gb:
+        del loaded_sources["Verification binaries"]
+
+    for source, trace_index in [
+        ("Resolved binaries", RESOLVED_TRACE),
+        ("Verification binaries", VERIFICATION_TRACE),
+    ]:
+        displayed = source in binaries_to_display
+        patched_figure["data"][trace_index]["visible"] = displayed
+
+        if displayed and source not in loaded_sources:
+            if source == "Resolved binaries":
+                trace = make_resolved_trace(
+                    *get_resolved_points(
+                        selected_noise_config, selected_duration, x_range, y_range
+                    )
+                )
+            else:
+                trace = make_verification_trace(
+                    *get_verification_points(
+                        selected_gb, selected_noise_config, selected_duration
+                    )
+                )
+            patch_trace(patched_figure, trace_index, trace)
+            loaded_sources.update(get_loaded_sources(selected_gb, [source]))
 
-    ## Figure 1
-    fig = go.Figure()
+    return patched_figure, loaded_sources
+
+
+@callback(
+    Output("sensitivity_graph", "figure", allow_duplicate=True),
+    Input("sensitivity_graph", "relayoutData"),
+    [
+        State("config_noise_budget", "data"),
+        State("config_mission_duration", "data"),
+        State("sensitivity_loaded_sources", "data"),
+        State("sensitivity_figure_config", "data"),
+    ],
+    prevent_initial_call=True,
+)
+def update_viewport(
+    relayout_data,
+    selected_noise_config,
+    selected_duration,
+    loaded_sources,
+    figure_config,
+):
+    """
+    Send only the traces depending on the region displayed by the user,
+    the noise curves and the resolved binaries
+
+    :param dict relayout_data: zoom of the user on the graph
+    :param string config_noise_budget: noise configuration
+    :param float config_mission_duration: mission duration
+    :param dict loaded_sources: source classes whose points are in the figure
+    :param list figure_config: configuration of the displayed figure
+
+    :return Patch partial update of sensitivity_graph
+    """
+    if selected_noise_config is None or selected_duration is None:
+        return no_update
+
+    if not is_displayed(figure_config, selected_noise_config, selected_duration):
+        return no_update
+
+    x_range, y_range = level_of_detail.get_viewport(relayout_data, X_RANGE, Y_RANGE)
+    patched_figure = Patch()
+
+    freq, strain_instru, strain_total = noise_cache.get_viewport_curves(
+        selected_noise_config, selected_duration, x_range
+    )
+    patched_figure["data"][INSTRUMENTAL_TRACE]["x"] = figure_encoding.encode(freq)
+    patched_figure["data"][INSTRUMENTAL_TRACE]["y"] = figure_encoding.encode(
+        strain_instru
+    )
+    patched_figure["data"][TOTAL_TRACE]["x"] = figure_encoding.encode(freq)
+    patched_figure["data"][TOTAL_TRACE]["y"] = figure_encoding.encode(strain_total)
+
+    if "Resolved binaries" in (loaded_sources or {}):
+        patch_trace(
+            patched_figure,
+            RESOLVED_TRACE,
+            make_resolved_trace(
+                *get_resolved_points(
+                    selected_noise_config, selected_duration, x_range, y_range
+                )
+            ),
+        )
+
+    return patched_figure
+
+
+@figure_cache.cached("so1_sensitivity.build_figure", conf_manager)
+def build_figure(
+    selected_noise_config,
+    selected_duration,
+    selected_gb,
+    binaries_to_display,
+    relayout_data,
+):
+    """
+    This function return the sensitivity curves
+
+    :param string selected_noise_config: noise configuration
+    :param float selected_duration: mission duration
+    :param list selected_gb: list of verification binaries to display
+    :param list binaries_to_display: list of binaries to display on the plot
+    :param dict relayout_data: zoom of the user on the graph, used to send
+        only a subset of the resolved binaries in the displayed region
+        and to sample the noise curves on it
+
+    :return figure sensitivity_graph: sensitivity curve plus galactic binaries
+    """
+
+    mission_duration = selected_duration
+    display_mode = "x unified"
+
+    x_range, y_range = level_of_detail.get_viewport(relayout_data, X_RANGE, Y_RANGE)
+
+    ##########################################################################
 
-    tmp = list_of_names.tolist()
+    ## prepare the data
 
     if "Resolved binaries" in binaries_to_display:
-        fig.add_trace(
-            go.Scatter(
-                x=rb_vf,
-                y=rb_vy,
-                # visible='legendonly',
-                mode="markers",
-                marker={"color": "blue"},
-                marker_symbol="circle",
-                name="Resolved GBs",
-                hovertemplate="<b>%{hovertext}</b><br>f= %{x:.4f} Hz<br>h=%{y}",
-            )
+        rb_vf, rb_vy = get_resolved_points(
+            selected_noise_config, mission_duration, x_range, y_range
         )
+    else:
+        rb_vf, rb_vy = [], []
 
     if "Verification binaries" in binaries_to_display:
-        fig.add_trace(
-            go.Scatter(
-                x=vf,
-                y=vy,
-                hovertext=tmp,
-                # visible='legendonly',
-                mode="markers",
-                marker={"color": "red", "size": np.sqrt(snr)},
-                marker_symbol="hexagon",
-                name="Verification GBs",
-                hovertemplate="<b>%{hovertext}</b><br>f= %{x:.4f} Hz<br>h=%{y}",
-            )
+        vgb_names, vf, vy, snr = get_verification_points(
+            selected_gb, selected_noise_config, mission_duration
         )
+    else:
+        vgb_names, vf, vy, snr = [], [], [], []
 
-    fig.add_trace(
-        go.Scatter(
-            x=freq, y=np.sqrt(freq) * np.sqrt(sh(freq)), name="Instrumental Noise"
-        )
+    # noise, computed once per configuration and displayed region
+    freq, strain_instru, strain_total = noise_cache.get_viewport_curves(
+        selected_noise_config, mission_duration, x_range
+    )
+
+    ##########################################################################
+
+    # Plot creation
+
+    ## Figure 1
+    fig = go.Figure()
+
+    fig.add_trace(make_resolved_trace(rb_vf, rb_vy))
+    fig.data[RESOLVED_TRACE].visible = "Resolved binaries" in binaries_to_display
+
+    fig.add_trace(make_verification_trace(vgb_names, vf, vy, snr))
+    fig.data[VERIFICATION_TRACE].visible = (
+        "Verification binaries" in binaries_to_display
     )
 
+    fig.add_trace(go.Scatter(x=freq, y=strain_instru, name="Instrumental Noise"))
+
     fig.add_trace(
         go.Scatter(
             x=freq,
-            y=np.sqrt(freq) * np.sqrt(20 / 3) * np.sqrt(sh_wd(freq)),
+            y=strain_total,
             name="LISA Noise (Instru+Confusion)",
         )
     )
@@ -284,8 +606,10 @@ def update_graph(
     fig.update_yaxes(
         title_text="Characteristic Strain (TODO)", type="log", showgrid=True
     )
-    fig.update_layout(xaxis={"range": [-5, 0]})
-    fig.update_layout(yaxis={"range": [-22, -15]})
+    fig.update_layout(xaxis={"range": x_range})
+    fig.update_layout(yaxis={"range": y_range})
+    # keep the zoom of the user when the figure is updated
+    fig.update_layout(uirevision="sensitivity")
     fig.update_layout(template="ggplot2")
 
     fig.update_layout(hovermode=display_mode)
@@ -303,3 +627,285 @@ def update_graph(
     fig.update_layout(height=600, width=1000)
 
     return fig
+
+
+def get_resolved_points(selected_noise_config, selected_duration, x_range, y_range):
+    """
+    Return the resolved binaries to display in a region of the plot
+
+    :param string selected_noise_config: noise configuration
+    :param float selected_duration: mission duration
+    :param list x_range: log10 of the frequency bounds of the region
+    :param list y_range: log10 of the strain bounds of the region
+
+    :return tuple: frequency and characteristic strain of a density preserving
+        subset of the resolved binaries in the region
+    """
+    input_resolved_binaries_filename, catalog_duration = get_resolved_catalog(
+        selected_noise_config, selected_duration
+    )
+
+    # only the binaries of the displayed frequency band are read
+    rb_vf, rb_vy, rb_log_vf, rb_log_vy = catalog_store.get_resolved_binaries(
+        input_resolved_binaries_filename,
+        x_range,
+        selected_noise_config,
+        catalog_duration,
+        selected_duration,
+    )
+
+    # density preserving subset of the binaries in the displayed region
+    rb_indices = level_of_detail.decimate(rb_log_vf, rb_log_vy, x_range, y_range)
+
+    return rb_vf[rb_indices], rb_vy[rb_indices]
+
+
+def get_resolved_catalog(selected_noise_config, selected_duration):
+    """
+    Return the catalog of resolved binaries of the shortest mission duration
+    longer than the selected one, or of the longest one if none is longer
+
+    :param string selected_noise_config: noise configuration
+    :param float selected_duration: mission duration
+
+    :return tuple: path to the catalog and its mission duration
+    """
+    catalog_durations = {
+        float(duration): duration
+        for noise, duration in conf_manager.get_configurations(
+            "SO1.sensitivity.resolved_binaries"
+        )
+        if noise == selected_noise_config
+    }
+    longer_durations = [
+        duration
+        for duration in catalog_durations
+        if duration >= float(selected_duration)
+    ]
+    catalog_duration = min(longer_durations, default=max(catalog_durations))
+
+    data_file = conf_manager.get_data_file(
+        "SO1.sensitivity.resolved_binaries",
+        (selected_noise_config, catalog_durations[catalog_duration]),
+    )
+
+    return data_file, catalog_duration
+
+
+def get_verification_points(selected_gb, selected_noise_config, selected_duration):
+    """
+    Return the selected verification binaries
+
+    :param list selected_gb: names selected in the dropdown menu
+    :param string selected_noise_config: noise configuration
+    :param float selected_duration: mission duration
+
+    :return tuple: name, frequency, characteristic strain and SNR
+        of the selected verification binaries
+    """
+    if selected_gb is None:
+        selected_gb = []
+
+    return vgb_table.select(
+        selected_gb,
+        selected_noise_config,
+        selected_duration,
+        select_all="select all" in selected_gb,
+    )
+
+
+def make_resolved_trace(rb_vf, rb_vy):
+    """
+    Return the trace of the resolved binaries,
+    rendered with WebGL when it contains many points
+
+    :param array rb_vf: frequency of the resolved binaries
+    :param array rb_vy: characteristic strain of the resolved binaries
+
+    :return trace scatter plot of the resolved binaries
+    """
+    if level_of_detail.use_webgl(len(rb_vf)):
+        scatter = go.Scattergl
+    else:
+        scatter = go.Scatter
+
+    return scatter(
+        x=rb_vf,
+        y=rb_vy,
+        # visible='legendonly',
+        mode="markers",
+        marker={"color": "blue"},
+        marker_symbol="circle",
+        name="Resolved GBs",
+        hovertemplate="<b>%{hovertext}</b><br>f= %{x:.4f} Hz<br>h=%{y}",
+    )
+
+
+def make_verification_trace(vgb_names, vf, vy, snr):
+    """
+    Return the trace of the verification binaries
+
+    :param array vgb_names: name of the verification binaries
+    :param array vf: frequency of the verification binaries
+    :param array vy: characteristic strain of the verification binaries
+    :param array snr: SNR of the verification binaries
+
+    :return trace scatter plot of the verification binaries
+    """
+    return go.Scatter(
+        x=vf,
+        y=vy,
+        hovertext=vgb_names,
+        # visible='legendonly',
+        mode="markers",
+        marker={"color": "red", "size": np.sqrt(snr)},
+        marker_symbol="hexagon",
+        name="Verification GBs",
+        hovertemplate="<b>%{hovertext}</b><br>f= %{x:.4f} Hz<br>h=%{y}",
+    )
+
+
+def patch_trace(patched_figure, trace_index, trace):
+    """
+    Replace the data of a trace in a partial update of the figure
+
+    :param Patch patched_figure: partial update of the figure
+    :param int trace_index: index of the trace in the figure
+    :param trace trace: trace holding the new data
+    """
+    trace_json = trace.to_plotly_json()
+    patched_figure["data"][trace_index]["type"] = trace_json["type"]
+    for key in ["x", "y", "hovertext"]:
+        if key in trace_json:
+            patched_figure["data"][trace_index][key] = figure_encoding.encode(
+                trace_json[key]
+            )
+    if "size" in trace_json.get("marker", {}):
+        patched_figure["data"][trace_index]["marker"]["size"] = figure_encoding.encode(
+            trace_json["marker"]["size"]
+        )
+
+
+##############################################################################
+# Exports of the plotted data, streamed on /export/<name>.<csv|npz>
+
+export.add_links_callback(
+    EXPORTS,
+    {
+        "noise": Input("config_noise_budget", "data"),
+        "duration": Input("config_mission_duration", "data"),
+    },
+)
+
+
+def get_export_configuration(query_parameters):
+    """
+    Return the configuration of an export
+
+    :param dict query_parameters: query parameters of the export request
+
+    :return tuple: noise budget and mission duration
+    """
+    noise = query_parameters["noise"]
+    duration = float(query_parameters["duration"])
+    check_configuration(conf_manager, noise, duration)
+
+    return noise, duration
+
+
+def export_noise_curves(query_parameters):
+    """
+    Return the noise curves of a configuration
+
+    :param dict query_parameters: noise and duration
+
+    :return ExportTable: frequency and characteristic strain of the noises
+    """
+    curves = noise_cache.get_curves(*get_export_configuration(query_parameters))
+
+    return export.ExportTable(
+        [("freq", float), ("strain_instrumental", float), ("strain_total", float)],
+        lambda: iter([curves]),
+        size=len(curves[0]),
+    )
+
+
+def export_verification_binaries(query_parameters):
+    """
+    Return the sensitivity of the verification binaries of a configuration
+
+    :param dict query_parameters: noise and duration
+
+    :return ExportTable: name, frequency, characteristic strain and SNR
+        of every verification binary
+    """
+    freq, strain, snr = vgb_table.get_table(*get_export_configuration(query_parameters))
+
+    return export.ExportTable(
+        [
+            ("name", vgb_table.names.dtype),
+            ("freq", float),
+            ("strain", float),
+            ("snr", float),
+        ],
+        lambda: iter([(vgb_table.names, freq, strain, snr)]),
+        size=len(freq),
+    )
+
+
+def export_resolved_binaries(query_parameters):
+    """
+    Return the resolved binaries of a configuration, read from the catalog
+    a few chunks at a time
+
+    :param dict query_parameters: noise, duration and optionally
+        freq_min and freq_max, the frequency band in Hz
+
+    :return ExportTable: frequency and characteristic strain of the binaries
+    """
+    noise, duration = get_export_configuration(query_parameters)
+    freq_min = float(query_parameters.get("freq_min", 10 ** X_RANGE[0]))
+    freq_max = float(query_parameters.get("freq_max", 10 ** X_RANGE[1]))
+    data_file, catalog_duration = get_resolved_catalog(noise, duration)
+
+    return export.ExportTable(
+        [("freq", float), ("strain", float)],
+        lambda: catalog_store.iter_resolved_binaries(
+            data_file, freq_min, freq_max, noise, catalog_duration, duration
+        ),
+    )
+
+
+export.export_registry.register("noise_curves", export_noise_curves)
+export.export_registry.register("verification_binaries", export_verification_binaries)
+export.export_registry.register("resolved_binaries", export_resolved_binaries)
+
+
+##############################################################################
+# Warm-up of the caches when the worker starts
+
+
+def warm_up(noise, duration):
+    """
+    Fill the caches read when the page opens with a configuration,
+    along with the resolved binaries of the whole frequency band
+
+    :param string noise: name of the noise budget
+    :param float duration: mission duration in years
+    """
+    noise_cache.get_curves(noise, duration)
+    noise_cache.get_viewport_curves(noise, duration, X_RANGE)
+    vgb_table.get_table(noise, duration)
+
+    data_file, catalog_duration = get_resolved_catalog(noise, duration)
+    catalog_store.get_resolved_binaries(
+        data_file, X_RANGE, noise, catalog_duration, duration
+    )
+
+    # inputs of update_graph when the page opens, before any zoom
+    build_figure(
+        *get_figure_inputs(noise, duration, DEFAULT_SELECTED_GB, DEFAULT_BINARIES, None)
+    )
+
+
+warm_up_scheduler.register("sensitivity", warm_up)
@@ -1,25 +1,51 @@
 """ Page of the waterfall plot """
 
 import dash
-from dash import html, dcc, callback, Output, Input
+from dash import html, dcc, callback, Output, Input, State
+from dash import Patch, no_update
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
 import numpy as np
 
 from config_manager import ConfigManager  # pylint: disable=import-error
+import export  # pylint: disable=import-error
+from figure_cache import figure_cache  # pylint: disable=import-error
+import figure_encoding  # pylint: disable=import-error
+import level_of_detail  # pylint: disable=import-error
+from warm_up import warm_up_scheduler  # pylint: disable=import-error
+from waterfall_store import (  # pylint: disable=import-error
+    waterfall_store,
+    SNR_MIN,
+    SNR_MAX,
+)
 
 ##############################################################################
 
 dash.register_page(__name__)
 
+# Constants
+FULL_RANGE = [-np.inf, np.inf]  # axis range of the unzoomed plot
+EXPORTS = {"waterfall": "SNR mesh"}
+
 conf_manager = ConfigManager("data/configuration.ini")
 
+# data depending on the configuration file is invalidated when it changes
+conf_manager.add_reload_listener(waterfall_store.clear)
+conf_manager.add_reload_listener(figure_cache.clear)
+
 ##############################################################################
 
 # layout of the page
 layout = html.Div(
     [  # pylint: disable=unused-variable
         html.H1("Waterfall plot"),
+        # noise budget of the figure computed by the background job
+        dcc.Store(id="waterfall_job"),
+        dbc.Progress(
+            id="waterfall_progress",
+            value=0,
+            style={"visibility": "hidden"},
+        ),
         dcc.Graph(
             id="waterfall_graph",
             figure={
@@ -28,6 +54,7 @@ layout = html.Div(
                 },
             },
         ),
+        export.make_links(EXPORTS),
         dbc.Nav(
             [
                 html.Div(
@@ -49,29 +76,173 @@ layout = html.Div(
 
 
 # pylint: disable=unused-variable
-@callback(Output("waterfall_graph", "figure"), Input("config_noise_budget", "data"))
+@callback(
+    [
+        Output("waterfall_graph", "figure"),
+        Output("waterfall_job", "data"),
+    ],
+    Input("config_noise_budget", "data"),
+)
 def update_graph(noise):
     """This function return the waterfall plot
-    based on the noise config selected by the user
+    based on the noise config selected by the user.
+
+    Stored figures are served by the worker, which keeps its caches, the
+    others are computed by compute_graph in a background job.
+
+    :param string noise: noise configuration selected in the sidebar
+
+    :return figure waterfall_graph: plot snr
+        based on redshift and total mass
+    :return string noise configuration to compute in the background"""
+    if not figure_cache.contains("so2_waterfall.build_figure", [noise]):
+        return no_update, noise
+
+    return build_figure(noise), no_update
+
+
+@callback(
+    Output("waterfall_graph", "figure", allow_duplicate=True),
+    Input("waterfall_job", "data"),
+    # computed in a background job, canceled when the user leaves the page
+    background=True,
+    progress=[
+        Output("waterfall_progress", "value"),
+        Output("waterfall_progress", "label"),
+    ],
+    running=[
+        (
+            Output("waterfall_progress", "style"),
+            {"visibility": "visible"},
+            {"visibility": "hidden"},
+        ),
+    ],
+    cancel=[Input("url", "pathname")],
+    prevent_initial_call=True,
+)
+def compute_graph(set_progress, noise):
+    """
+    Compute a waterfall figure which is not stored yet
+
+    :param function set_progress: report the progress to the page
+    :param string noise: noise configuration selected in the sidebar
+
+    :return figure waterfall_graph: plot snr
+        based on redshift and total mass
+    """
+    if noise is None:
+        return no_update
 
-    :param string data_file: path to the data
+    # the mesh is read first in order to report its progress
+    set_progress((10, "SNR mesh"))
+    get_pyramid(noise)
+
+    set_progress((60, "Figure"))
+    fig = build_figure(noise)
+    set_progress((100, ""))
+
+    return fig
+
+
+@callback(
+    Output("waterfall_graph", "figure", allow_duplicate=True),
+    Input("waterfall_graph", "relayoutData"),
+    State("config_noise_budget", "data"),
+    prevent_initial_call=True,
+)
+def update_viewport(relayout_data, noise):
+    """
+    Send the mesh of the region displayed by the user, at the resolution
+    of the coarsest level of the pyramid with enough points in the region
+
+    :param dict relayout_data: zoom of the user on the graph
+    :param string noise: noise configuration selected in the sidebar
+
+    :return Patch partial update of waterfall_graph
+    """
+    if noise is None or not any(
+        key.startswith(("xaxis.", "yaxis.")) for key in relayout_data or {}
+    ):
+        return no_update
+
+    x_range, y_range = level_of_detail.get_viewport(
+        relayout_data, FULL_RANGE, FULL_RANGE
+    )
+    m_source_axis, z_axis, log_snr = level_of_detail.select_mesh(
+        get_pyramid(noise), x_range, y_range, log_x=True
+    )
+
+    patched_figure = Patch()
+    patched_figure["data"][0]["x"] = figure_encoding.encode(m_source_axis)
+    patched_figure["data"][0]["y"] = figure_encoding.encode(z_axis)
+    patched_figure["data"][0]["z"] = figure_encoding.encode(log_snr)
+
+    return patched_figure
+
+
+@figure_cache.cached("so2_waterfall.build_figure", conf_manager)
+def build_figure(noise):
+    """
+    Return the waterfall plot of a noise configuration
+
+    :param string noise: noise configuration selected in the sidebar
 
     :return figure waterfall_graph: plot snr
-        based on redshift and total mass"""
+        based on redshift and total mass
+    """
+    return make_figure(
+        *level_of_detail.select_mesh(
+            get_pyramid(noise), FULL_RANGE, FULL_RANGE, log_x=True
+        )
+    )
 
-    data_file = conf_manager.get_data_file("SO2.waterfall", noise)
-    t = np.load(data_file, allow_pickle=True)
 
-    # pylint: disable=unused-variable
-    [z_mesh, m_source_mesh, snr_mesh, _, _, _] = t
+def get_pyramid(noise):
+    """
+    Return the pyramid of the plotted meshes of a noise budget
 
-    sn_cl = np.clip(snr_mesh, 1.0, 4000)
+    :param string noise: name of the noise budget
+
+    :return list: total mass axis, redshift axis and clipped log10 of
+        the SNR of each level, from the full resolution to the coarsest
+    """
+    return waterfall_store.get_pyramid(
+        conf_manager.get_data_file("SO2.waterfall", noise)
+    )
+
+
+def has_mesh(noise):
+    """
+    Return if the SNR mesh of a noise budget is listed in the configuration file
+
+    :param string noise: name of the noise budget
+
+    :return boolean: True if the mesh can be plotted
+    """
+    return noise in conf_manager.get_configurations("SO2.waterfall")
+
+
+def make_figure(m_source_axis, z_axis, log_snr):
+    """
+    Return the contour plot of the SNR
+
+    :param array m_source_axis: total mass of the columns of the mesh
+    :param array z_axis: redshift of the rows of the mesh
+    :param array log_snr: clipped log10 of the SNR
+        on the (redshift, total mass) mesh
+
+    :return figure waterfall_graph: plot snr
+        based on redshift and total mass
+    """
     tickvals = [10, 20, 50, 100, 200, 500, 1000, 4000]
     fig2 = go.Figure(
         data=go.Contour(
-            x=m_source_mesh[0, :],
-            y=z_mesh[:, 0],
-            z=np.log10(sn_cl),
+            x=m_source_axis,
+            y=z_axis,
+            z=log_snr,
+            # same colors at every level of the pyramid
+            zmin=np.log10(SNR_MIN),
+            zmax=np.log10(SNR_MAX),
             colorbar=dict(
                 title="Signal Noise Ratio",
                 titleside="top",
@@ -87,3 +258,63 @@ def update_graph(noise):
     fig2["layout"]["xaxis"].title = "Total mass"
 
     return fig2
+
+
+##############################################################################
+# Export of the plotted mesh, streamed on /export/waterfall.<csv|npz>
+
+export.add_links_callback(EXPORTS, {"noise": Input("config_noise_budget", "data")})
+
+
+def export_waterfall(query_parameters):
+    """
+    Return the plotted SNR mesh of a noise configuration at full resolution,
+    one row of the table per point of the mesh
+
+    :param dict query_parameters: noise
+
+    :return ExportTable: total mass, redshift and clipped log10 of the SNR
+    """
+    noise = query_parameters["noise"]
+    if not has_mesh(noise):
+        raise ValueError(f"Unknown noise budget {noise}")
+
+    m_source_axis, z_axis, log_snr = get_pyramid(noise)[0]
+
+    def iter_chunks():
+        # whole rows of the mesh, about CHUNK_ROWS points at a time
+        rows = max(1, export.CHUNK_ROWS // len(m_source_axis))
+        for start in range(0, len(z_axis), rows):
+            z_rows = z_axis[start : start + rows]
+            yield (
+                np.tile(m_source_axis, len(z_rows)),
+                np.repeat(z_rows, len(m_source_axis)),
+                log_snr[start : start + rows].ravel(),
+            )
+
+    return export.ExportTable(
+        [("total_mass", float), ("redshift", float), ("log10_snr", float)],
+        iter_chunks,
+        size=log_snr.size,
+    )
+
+
+export.export_registry.register("waterfall", export_waterfall)
+
+
+##############################################################################
+# Warm-up of the caches when the worker starts
+
+
+def warm_up(noise, _duration):
+    """
+    Fill the caches read when the page opens with a noise budget
+
+    :param string noise: name of the noise budget
+    :param float _duration: unused, the meshes do not depend on it
+    """
+    if has_mesh(noise):
+        build_figure(noise)
+
+
+warm_up_scheduler.register("waterfall", warm_up)
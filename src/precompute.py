@@ -0,0 +1,525 @@
+"""
+Build every artifact derived from the data files listed in the
+configuration file, in parallel, and record them in a manifest of
+content hashes so that only the changed artifacts are built again
+
+Usage (from the src directory):
+    python precompute.py [--workers 4] [--force] [--dry-run]
+"""
+
+import argparse
+import concurrent.futures
+import datetime
+import hashlib
+import importlib.metadata
+import json
+import os
+import sys
+import time
+
+from artifacts import (  # pylint: disable=import-error
+    PRECOMPUTE_DIR,
+    MANIFEST_NAME,
+    get_file_stat,
+    get_noise_curves_name,
+    get_vgb_table_name,
+    hash_source,
+)
+from atomic_file import atomic_write  # pylint: disable=import-error
+from catalog_reader import (  # pylint: disable=import-error
+    convert_catalog,
+    get_sorted_file,
+)
+from config_manager import ConfigManager  # pylint: disable=import-error
+from duration_tables import (  # pylint: disable=import-error
+    CONFUSION_TABLE_FILE,
+    compute_confusion_table,
+    compute_resolving_durations,
+    duration_tables,
+    get_resolving_file,
+    save_array,
+    save_arrays,
+)
+import noise_cache  # pylint: disable=import-error
+from vgb_table import VerificationBinariesTable  # pylint: disable=import-error
+from waterfall_store import (  # pylint: disable=import-error
+    convert_waterfall,
+    get_array_dir,
+)
+
+# Constants
+ARTIFACT_VERSION = 1  # part of the keys, changed with the format of the artifacts
+MAX_WORKERS = os.cpu_count() or 1
+HASH_BLOCK_SIZE = 2**20  # bytes read at once when hashing a file
+# modules run by each builder besides this one, whose source is hashed
+# in the keys so that a change of the code builds the artifacts again
+BUILDER_MODULES = {
+    "build_confusion_table": ["duration_tables"],
+    "build_noise_curves": ["noise_cache", "duration_tables"],
+    "build_vgb_table": ["vgb_table"],
+    "build_resolved_catalog": ["catalog_reader", "duration_tables"],
+    "build_waterfall": ["waterfall_store"],
+}
+
+
+def list_artifacts(conf_manager, precompute_dir=PRECOMPUTE_DIR):
+    """
+    Return the artifacts of every configuration of the configuration file
+
+    :param ConfigManager conf_manager: manager of the configuration file
+    :param string precompute_dir: directory of the precomputed arrays
+
+    :return list: artifacts, as dictionaries with their name, builder,
+        arguments of the builder, input files and output files,
+        the first output being the one served by the application
+    """
+    artifact_list = [
+        {
+            "name": "confusion_noise",
+            "builder": "build_confusion_table",
+            "args": [],
+            "inputs": [],
+            "outputs": [CONFUSION_TABLE_FILE],
+        }
+    ]
+
+    vgb_file = conf_manager.get_data_file(
+        "SO1.sensitivity.verification_binaries", "vgb"
+    )
+    for noise, duration in conf_manager.get_configurations(
+        "SO1.sensitivity.resolved_binaries"
+    ):
+        data_file = conf_manager.get_data_file(
+            "SO1.sensitivity.resolved_binaries", (noise, duration)
+        )
+        noise_file = os.path.join(
+            precompute_dir, get_noise_curves_name(noise, duration) + ".npz"
+        )
+        vgb_table_file = os.path.join(
+            precompute_dir, get_vgb_table_name(vgb_file, noise, duration) + ".npz"
+        )
+
+        artifact_list += [
+            {
+                "name": get_noise_curves_name(noise, duration),
+                "builder": "build_noise_curves",
+                "args": [noise, float(duration), noise_file],
+                "inputs": [CONFUSION_TABLE_FILE],
+                "outputs": [noise_file],
+            },
+            {
+                "name": get_vgb_table_name(vgb_file, noise, duration),
+                "builder": "build_vgb_table",
+                "args": [vgb_file, noise, float(duration), vgb_table_file],
+                "inputs": [vgb_file],
+                "outputs": [vgb_table_file],
+            },
+            {
+                "name": f"resolved_catalog/{noise}_{float(duration):g}",
+                "builder": "build_resolved_catalog",
+                "args": [data_file, noise, float(duration)],
+                "inputs": [data_file, CONFUSION_TABLE_FILE],
+                "outputs": [get_sorted_file(data_file), get_resolving_file(data_file)],
+            },
+        ]
+
+    for noise in conf_manager.get_configurations("SO2.waterfall"):
+        data_file = conf_manager.get_data_file("SO2.waterfall", noise)
+        artifact_list.append(
+            {
+                "name": f"waterfall/{noise}",
+                "builder": "build_waterfall",
+                "args": [data_file],
+                "inputs": [data_file],
+                "outputs": [get_array_dir(data_file)],
+            }
+        )
+
+    return artifact_list
+
+
+##############################################################################
+# Builders, run in the processes of the pool
+
+
+def build_confusion_table():
+    """Compute the table of the confusion noise on the duration grid"""
+    save_arrays(CONFUSION_TABLE_FILE, **compute_confusion_table())
+
+
+def build_noise_curves(noise, duration, output):
+    """
+    Compute the noise curves of a configuration on the full frequency grid
+    and sampled for the unzoomed sensitivity plot
+
+    :param string noise: name of the noise budget
+    :param float duration: mission duration in years
+    :param string output: path to the .npz file
+    """
+    freq, strain_instru, strain_total = noise_cache.compute_noise_curves(
+        noise, duration
+    )
+    viewport_freq, viewport_instru, viewport_total = (
+        noise_cache.compute_viewport_curves(
+            noise,
+            duration,
+            noise_cache.LOG_FREQ_MIN,
+            noise_cache.LOG_FREQ_MAX,
+            noise_cache.VIEWPORT_SIZE,
+        )
+    )
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    save_arrays(
+        output,
+        freq=freq,
+        strain_instru=strain_instru,
+        strain_total=strain_total,
+        viewport_freq=viewport_freq,
+        viewport_instru=viewport_instru,
+        viewport_total=viewport_total,
+    )
+
+
+def build_vgb_table(data_file, noise, duration, output):
+    """
+    Compute the sensitivity of the verification binaries of a configuration
+
+    :param string data_file: path to the verification binaries catalog
+    :param string noise: name of the noise budget
+    :param float duration: mission duration in years
+    :param string output: path to the .npz file
+    """
+    freq, strain, snr = VerificationBinariesTable(data_file).compute_table(
+        noise, duration
+    )
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    save_arrays(output, freq=freq, strain=strain, snr=snr)
+
+
+def build_resolved_catalog(data_file, noise, duration):
+    """
+    Sort a resolved binaries catalog by frequency and compute
+    the duration from which each binary is resolved
+
+    :param string data_file: path to the catalog of resolved binaries
+    :param string noise: name of the noise budget of the catalog
+    :param float duration: mission duration of the catalog in years
+    """
+    convert_catalog(data_file)
+    save_array(
+        get_resolving_file(data_file),
+        compute_resolving_durations(
+            data_file, noise, duration, duration_tables.get_confusion_table()
+        ),
+    )
+
+
+def build_waterfall(data_file):
+    """
+    Convert a pickle file of SNR meshes, replacing a previous conversion
+
+    :param string data_file: path to the pickle file of the SNR meshes
+    """
+    convert_waterfall(data_file)
+
+
+BUILDERS = {
+    "build_confusion_table": build_confusion_table,
+    "build_noise_curves": build_noise_curves,
+    "build_vgb_table": build_vgb_table,
+    "build_resolved_catalog": build_resolved_catalog,
+    "build_waterfall": build_waterfall,
+}
+
+
+def run_builder(builder, args):
+    """
+    Run a builder in a process of the pool
+
+    :param string builder: name of the builder
+    :param list args: arguments of the builder
+
+    :return float: wall time of the build in seconds
+    """
+    start = time.perf_counter()
+    BUILDERS[builder](*args)
+
+    return time.perf_counter() - start
+
+
+##############################################################################
+# Manifest
+
+
+def hash_file(path, key=None):
+    """
+    Hash the content of a file, or of every file of a directory
+
+    :param string path: path to the file or directory
+    :param hash key: hash updated with the content, a new sha256 if None
+
+    :return string: hexadecimal hash
+    """
+    if key is None:
+        key = hashlib.sha256()
+
+    if os.path.isdir(path):
+        for file_name in sorted(os.listdir(path)):
+            key.update(file_name.encode("utf-8"))
+            hash_file(os.path.join(path, file_name), key)
+        return key.hexdigest()
+
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+            key.update(block)
+
+    return key.hexdigest()
+
+
+def get_package_version(package):
+    """
+    Return the installed version of a package
+
+    :param string package: name of the package
+
+    :return string: version, "unknown" if the package is not installed
+    """
+    try:
+        return importlib.metadata.version(package)
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def get_source_hashes(builder):
+    """
+    Return the hashes of the source of the modules run by a builder
+
+    :param string builder: name of the builder
+
+    :return dict: sha256 of each source file, by path relative to the
+        working directory like the other paths of the manifest
+    """
+    paths = [__file__] + [
+        sys.modules[name].__file__ for name in BUILDER_MODULES[builder]
+    ]
+
+    return {os.path.relpath(path): hash_source(path) for path in paths}
+
+
+def get_artifact_key(artifact, input_hashes):
+    """
+    Return the key of an artifact, changing when its builder, the source
+    of the builder, its arguments, inputs or the noise models change
+
+    :param dict artifact: artifact of list_artifacts
+    :param dict input_hashes: hash of the content of every input file
+
+    :return string: hexadecimal hash
+    """
+    key = {
+        "version": ARTIFACT_VERSION,
+        "builder": artifact["builder"],
+        "sources": get_source_hashes(artifact["builder"]),
+        "args": artifact["args"],
+        "inputs": {path: input_hashes[path] for path in artifact["inputs"]},
+        "fomweb": get_package_version("fomweb"),
+    }
+
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def get_output_files(output):
+    """
+    Return the files of an output, a file or a directory
+
+    :param string output: path to the output
+
+    :return list: paths to the files
+    """
+    if os.path.isdir(output):
+        return [os.path.join(output, name) for name in sorted(os.listdir(output))]
+
+    return [output]
+
+
+def is_up_to_date(entry, key):
+    """
+    Return if an artifact of the manifest does not need to be built again
+
+    :param dict entry: entry of the artifact in the manifest, None if absent
+    :param string key: current key of the artifact
+
+    :return boolean: True if the key is the same and the outputs
+        have the recorded content
+    """
+    if entry is None or entry.get("key") != key:
+        return False
+
+    for path, output in entry["outputs"].items():
+        if get_file_stat(path) is None or hash_file(path) != output["sha256"]:
+            return False
+
+    return True
+
+
+def make_entry(artifact, key):
+    """
+    Return the entry of a built artifact in the manifest
+
+    :param dict artifact: artifact of list_artifacts
+    :param string key: key of the artifact
+
+    :return dict: entry of the manifest
+    """
+    outputs = {}
+    for output in artifact["outputs"]:
+        for path in get_output_files(output):
+            outputs[path] = {"sha256": hash_file(path), "size": get_file_stat(path)[0]}
+
+    main_output = artifact["outputs"][0]
+
+    return {
+        "key": key,
+        "builder": artifact["builder"],
+        "built": datetime.datetime.now().isoformat(),
+        "inputs": {
+            path: {"sha256": hash_file(path), "stat": get_file_stat(path)}
+            for path in artifact["inputs"]
+        },
+        "sources": get_source_hashes(artifact["builder"]),
+        "outputs": outputs,
+        "main_output": main_output,
+    }
+
+
+def read_manifest(manifest_file):
+    """
+    Read the artifacts of a manifest
+
+    :param string manifest_file: path to the manifest
+
+    :return dict: entries of the artifacts by name
+    """
+    try:
+        with open(manifest_file, encoding="utf-8") as file:
+            return json.load(file)["artifacts"]
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def write_manifest(manifest_file, entries):
+    """
+    Write a manifest atomically
+
+    :param string manifest_file: path to the manifest
+    :param dict entries: entries of the artifacts by name
+    """
+    os.makedirs(os.path.dirname(manifest_file) or ".", exist_ok=True)
+    with atomic_write(manifest_file, ".json") as tmp_path:
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(
+                {"version": ARTIFACT_VERSION, "artifacts": entries},
+                file,
+                indent=2,
+                sort_keys=True,
+            )
+
+
+def precompute(  # pylint: disable=too-many-locals
+    conf_manager, max_workers=MAX_WORKERS, force=False, dry_run=False
+):
+    """
+    Build the artifacts which changed since the last run, the confusion
+    noise table first as the other artifacts depend on it
+
+    :param ConfigManager conf_manager: manager of the configuration file
+    :param int max_workers: processes building the artifacts
+    :param boolean force: build every artifact
+    :param boolean dry_run: only print the artifacts to build
+
+    :return list: names of the built artifacts
+    """
+    manifest_file = os.path.join(PRECOMPUTE_DIR, MANIFEST_NAME)
+    entries = read_manifest(manifest_file)
+    artifact_list = list_artifacts(conf_manager)
+
+    # artifacts whose inputs are outputs of other artifacts are built after them
+    produced = {path for artifact in artifact_list for path in artifact["outputs"]}
+    stages = [
+        [
+            artifact
+            for artifact in artifact_list
+            if not produced & set(artifact["inputs"])
+        ],
+        [artifact for artifact in artifact_list if produced & set(artifact["inputs"])],
+    ]
+
+    built = []
+    for stage in stages:
+        input_hashes = {}
+        to_build = []
+        for artifact in stage:
+            for path in artifact["inputs"]:
+                if path not in input_hashes and os.path.exists(path):
+                    input_hashes[path] = hash_file(path)
+            if not all(path in input_hashes for path in artifact["inputs"]):
+                print(f"{artifact['name']:50s} missing input, skipped")
+                continue
+
+            key = get_artifact_key(artifact, input_hashes)
+            if not force and is_up_to_date(entries.get(artifact["name"]), key):
+                print(f"{artifact['name']:50s} up to date")
+                continue
+            to_build.append((artifact, key))
+
+        if dry_run:
+            for artifact, _ in to_build:
+                print(f"{artifact['name']:50s} to build")
+            continue
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers) as pool:
+            futures = {
+                pool.submit(run_builder, artifact["builder"], artifact["args"]): (
+                    artifact,
+                    key,
+                )
+                for artifact, key in to_build
+            }
+            for future in concurrent.futures.as_completed(futures):
+                artifact, key = futures[future]
+                try:
+                    wall_time = future.result()
+                except Exception as error:  # pylint: disable=broad-except
+                    print(f"{artifact['name']:50s} failed: {error!r}")
+                    entries.pop(artifact["name"], None)
+                    continue
+
+                entries[artifact["name"]] = make_entry(artifact, key)
+                built.append(artifact["name"])
+                print(f"{artifact['name']:50s} built in {wall_time:.2f} s")
+
+        # written after each stage so that an interrupted run keeps its work
+        write_manifest(manifest_file, entries)
+
+    return built
+
+
+##############################################################################
+# Build the artifacts of the configuration file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    parser.add_argument("--force", action="store_true", help="build every artifact")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="only print the artifacts to build"
+    )
+    arguments = parser.parse_args()
+
+    precompute(
+        ConfigManager("data/configuration.ini"),
+        arguments.workers,
+        arguments.force,
+        arguments.dry_run,
+    )
@@ -0,0 +1,133 @@
+"""
+Share the arrays read by the pages between the workers of the server
+through read only memory-mapped files, so that each array is loaded once
+per host in the page cache instead of once per worker
+"""
+
+import os
+import struct
+import threading
+import zipfile
+
+import numpy as np
+
+# Constants
+ZIP_LOCAL_HEADER_SIZE = 30  # bytes of a zip local file header before its name
+ZIP_NAME_LENGTH_OFFSET = 26  # offset of the name and extra field lengths
+
+
+class SharedArrayStore:
+    """
+    Open .npy files and the members of uncompressed .npz files as read only
+    memory maps, which every worker of the host maps to the same pages.
+
+    The maps are opened again when their file is replaced.
+    """
+
+    def __init__(self):
+        self._maps = {}
+        self._lock = threading.Lock()
+
+    def get_array(self, path):
+        """
+        Return a .npy file mapped read only
+
+        :param string path: path to the .npy file
+
+        :return memmap: the mapped array
+        """
+        mtime = os.path.getmtime(path)
+
+        with self._lock:
+            if path in self._maps and self._maps[path][0] == mtime:
+                return self._maps[path][1]
+
+        array = np.load(path, mmap_mode="r")
+
+        with self._lock:
+            self._maps[path] = (mtime, array)
+
+        return array
+
+    def get_npz_arrays(self, path, keys):
+        """
+        Return members of a .npz file, mapped read only when the file is
+        uncompressed and read in memory otherwise
+
+        :param string path: path to the .npz file
+        :param tuple keys: names of the arrays in the .npz file
+
+        :return tuple: the arrays
+        """
+        mtime = os.path.getmtime(path)
+        map_key = (path, tuple(keys))
+
+        with self._lock:
+            if map_key in self._maps and self._maps[map_key][0] == mtime:
+                return self._maps[map_key][1]
+
+        arrays = tuple(map_npz_member(path, key) for key in keys)
+
+        with self._lock:
+            self._maps[map_key] = (mtime, arrays)
+
+        return arrays
+
+    def clear(self):
+        """Close every map, opened again on next use"""
+        with self._lock:
+            self._maps.clear()
+
+
+def map_npz_member(path, key):
+    """
+    Map an array of a .npz file read only, the members of an uncompressed
+    .npz file being .npy files stored contiguously in the zip archive
+
+    :param string path: path to the .npz file
+    :param string key: name of the array
+
+    :return array: the mapped array, or the array read in memory
+        when the member is compressed, empty or holds Python objects
+    """
+    with zipfile.ZipFile(path) as archive:
+        info = archive.getinfo(key + ".npy")
+
+    if info.compress_type == zipfile.ZIP_STORED:
+        with open(path, "rb") as file:
+            # the local header of the member, whose extra field may differ
+            # from the one of the central directory
+            file.seek(info.header_offset + ZIP_NAME_LENGTH_OFFSET)
+            name_length, extra_length = struct.unpack("<HH", file.read(4))
+            file.seek(
+                info.header_offset + ZIP_LOCAL_HEADER_SIZE + name_length + extra_length
+            )
+
+            if np.lib.format.read_magic(file) == (1, 0):
+                header = np.lib.format.read_array_header_1_0(file)
+            else:
+                header = np.lib.format.read_array_header_2_0(file)
+            shape, fortran_order, dtype = header
+            offset = file.tell()
+
+        # empty arrays cannot be mapped
+        if not dtype.hasobject and np.prod(shape) > 0:
+            return np.memmap(
+                path,
+                dtype=dtype,
+                mode="r",
+                offset=offset,
+                shape=shape,
+                order="F" if fortran_order else "C",
+            )
+
+    with np.load(path) as arrays:
+        array = arrays[key]
+
+    # the arrays are shared between callbacks and must not be modified
+    array.flags.writeable = False
+
+    return array
+
+
+shared_arrays = SharedArrayStore()
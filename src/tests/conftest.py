@@ -0,0 +1,17 @@
+"""
+Configuration of the tests, run from the src directory with
+python -m pytest tests
+"""
+
+import os
+import sys
+import tempfile
+
+# the modules of the app are imported as top level modules, like gunicorn does
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SRC_DIR)
+
+# the caches shared by the workers are not mixed with the ones of a server
+os.environ.setdefault(
+    "FIGURE_CACHE_DIR", tempfile.mkdtemp(prefix="fom_dash_test_figures_")
+)
@@ -0,0 +1,134 @@
+"""
+Tests of the batching and of the validation of the API requests
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+import api  # pylint: disable=import-error
+
+
+class RecordingEvaluation:
+    """Evaluation doubling the rows and recording the batches"""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.batches = []
+        self._lock = threading.Lock()
+
+    def __call__(self, key, rows):
+        with self._lock:
+            self.batches.append((key, len(rows)))
+        if self.error is not None:
+            raise self.error
+
+        return rows * 2, rows + 1
+
+
+def submit_concurrently(batcher, requests):
+    """
+    Submit requests from one thread each
+
+    :param MicroBatcher batcher: batcher of the requests
+    :param list requests: key and rows of each request
+
+    :return list: result or raised error of each request
+    """
+    results = [()] * len(requests)
+    start = threading.Barrier(len(requests))
+
+    def submit(index, key, rows):
+        start.wait()
+        try:
+            results[index] = batcher.submit(key, rows)
+        except Exception as error:  # pylint: disable=broad-except
+            results[index] = error
+
+    threads = [
+        threading.Thread(target=submit, args=(index, key, rows))
+        for index, (key, rows) in enumerate(requests)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    return results
+
+
+def test_concurrent_requests_share_a_batch():
+    evaluation = RecordingEvaluation()
+    batcher = api.MicroBatcher(evaluation, max_delay=5, max_size=6)
+    requests = [(("scird", 4.5), np.arange(2.0) + 10 * index) for index in range(3)]
+
+    results = submit_concurrently(batcher, requests)
+
+    assert evaluation.batches == [(("scird", 4.5), 6)]
+    for (_, rows), (doubled, shifted) in zip(requests, results):
+        np.testing.assert_array_equal(doubled, rows * 2)
+        np.testing.assert_array_equal(shifted, rows + 1)
+
+
+def test_full_batches_are_split():
+    evaluation = RecordingEvaluation()
+    batcher = api.MicroBatcher(evaluation, max_delay=5, max_size=4)
+    requests = [(("scird", 4.5), np.arange(2.0) + 10 * index) for index in range(4)]
+
+    results = submit_concurrently(batcher, requests)
+
+    assert sorted(size for _, size in evaluation.batches) == [4, 4]
+    for (_, rows), (doubled, _) in zip(requests, results):
+        np.testing.assert_array_equal(doubled, rows * 2)
+
+
+def test_keys_are_not_mixed():
+    evaluation = RecordingEvaluation()
+    batcher = api.MicroBatcher(evaluation, max_delay=0.05, max_size=100)
+    requests = [(("scird", 4.5), np.arange(2.0)), (("redbook", 4.5), np.arange(3.0))]
+
+    results = submit_concurrently(batcher, requests)
+
+    assert sorted(evaluation.batches) == [(("redbook", 4.5), 3), (("scird", 4.5), 2)]
+    np.testing.assert_array_equal(results[1][0], np.arange(3.0) * 2)
+
+
+def test_errors_reach_every_request_of_the_batch():
+    evaluation = RecordingEvaluation(error=ValueError("failed evaluation"))
+    batcher = api.MicroBatcher(evaluation, max_delay=5, max_size=6)
+    requests = [(("scird", 4.5), np.arange(2.0)) for _ in range(3)]
+
+    results = submit_concurrently(batcher, requests)
+
+    assert len(evaluation.batches) == 1
+    assert all(isinstance(result, ValueError) for result in results)
+
+    # the next batch is evaluated again
+    evaluation.error = None
+    doubled, _ = batcher.submit(("scird", 4.5), np.arange(6.0))
+    np.testing.assert_array_equal(doubled, np.arange(6.0) * 2)
+
+
+@pytest.mark.parametrize("freq", [float("nan"), float("inf"), 1e-7, 2.0])
+def test_points_out_of_band_are_rejected(monkeypatch, freq):
+    monkeypatch.setattr(api, "check_configuration", lambda noise, duration: None)
+    body = {"points": [{"noise": "scird", "duration": 4.5, "freq": freq}]}
+
+    with pytest.raises(ValueError):
+        api.parse_points(body)
+
+
+def test_points_in_band_are_parsed(monkeypatch):
+    monkeypatch.setattr(api, "check_configuration", lambda noise, duration: None)
+    body = {
+        "points": [
+            {"noise": "scird", "duration": 4.5, "freq": 1e-3},
+            {"noise": "redbook", "duration": 7.5, "freq": 1e-2},
+        ]
+    }
+
+    points = api.parse_points(body)
+
+    assert list(points["noise"]) == ["scird", "redbook"]
+    np.testing.assert_array_equal(points["freq"], [1e-3, 1e-2])
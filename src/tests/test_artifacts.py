@@ -0,0 +1,98 @@
+"""
+Tests of the keys of the precomputed artifacts and of their validation
+"""
+
+import os
+
+import pytest
+
+from artifacts import (  # pylint: disable=import-error
+    get_file_stat,
+    hash_source,
+    is_valid,
+)
+import precompute  # pylint: disable=import-error
+
+
+@pytest.fixture(name="entry")
+def fixture_entry(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with open("builder.py", "w", encoding="utf-8") as file:
+        file.write("VERSION = 1\n")
+    with open("input.npy", "wb") as file:
+        file.write(b"input")
+    with open("output.npz", "wb") as file:
+        file.write(b"output")
+
+    return {
+        "inputs": {"input.npy": {"stat": get_file_stat("input.npy")}},
+        "sources": {"builder.py": hash_source("builder.py")},
+        "outputs": {"output.npz": {"size": os.path.getsize("output.npz")}},
+        "main_output": "output.npz",
+    }
+
+
+def test_valid_entry(entry):
+    assert is_valid(entry)
+
+
+def test_entry_without_sources_is_stale(entry):
+    del entry["sources"]
+
+    assert not is_valid(entry)
+
+
+def test_entry_with_modified_source_is_stale(entry):
+    with open("builder.py", "a", encoding="utf-8") as file:
+        file.write("VERSION = 2\n")
+
+    assert not is_valid(entry)
+
+
+def test_entry_with_missing_source_is_stale(entry):
+    os.remove("builder.py")
+
+    assert not is_valid(entry)
+
+
+def test_entry_with_modified_output_is_stale(entry):
+    with open("output.npz", "ab") as file:
+        file.write(b" truncated")
+
+    assert not is_valid(entry)
+
+
+def test_source_hashes_shared_between_entries(entry):
+    source_hashes = {}
+    assert is_valid(entry, source_hashes)
+    assert source_hashes == entry["sources"]
+
+    # the source read by the first call is not read again
+    source_hashes["builder.py"] = "modified"
+    assert not is_valid(entry, source_hashes)
+
+
+@pytest.mark.parametrize("builder", sorted(precompute.BUILDER_MODULES))
+def test_source_hashes_cover_builder_modules(builder):
+    sources = precompute.get_source_hashes(builder)
+
+    assert os.path.relpath(precompute.__file__) in sources
+    for name in precompute.BUILDER_MODULES[builder]:
+        assert any(os.path.basename(path) == name + ".py" for path in sources)
+    assert None not in sources.values()
+
+
+def test_artifact_key_depends_on_sources(monkeypatch):
+    artifact = {"builder": "build_waterfall", "args": ["waterfall.pkl"], "inputs": []}
+    key = precompute.get_artifact_key(artifact, {})
+
+    assert key == precompute.get_artifact_key(artifact, {})
+    assert key != precompute.get_artifact_key(dict(artifact, args=["other.pkl"]), {})
+
+    sources = precompute.get_source_hashes("build_waterfall")
+    monkeypatch.setattr(
+        precompute,
+        "get_source_hashes",
+        lambda builder: dict(sources, **{"waterfall_store.py": "modified"}),
+    )
+    assert precompute.get_artifact_key(artifact, {}) != key
@@ -0,0 +1,39 @@
+"""
+Tests of the atomic writes of the shared files
+"""
+
+import os
+
+import pytest
+
+from atomic_file import atomic_write  # pylint: disable=import-error
+
+
+def test_atomic_write_replaces_file(tmp_path):
+    path = tmp_path / "figure.json"
+    path.write_text("old")
+
+    with atomic_write(str(path), ".json") as tmp_file:
+        assert tmp_file.endswith(".json")
+        assert os.path.dirname(tmp_file) == str(tmp_path)
+        with open(tmp_file, "w", encoding="utf-8") as file:
+            file.write("new")
+        # the file is only replaced at the end of the block
+        assert path.read_text() == "old"
+
+    assert path.read_text() == "new"
+    assert os.listdir(tmp_path) == ["figure.json"]
+
+
+def test_atomic_write_keeps_file_on_error(tmp_path):
+    path = tmp_path / "figure.json"
+    path.write_text("old")
+
+    with pytest.raises(RuntimeError):
+        with atomic_write(str(path)) as tmp_file:
+            with open(tmp_file, "w", encoding="utf-8") as file:
+                file.write("partial")
+            raise RuntimeError("failed write")
+
+    assert path.read_text() == "old"
+    assert os.listdir(tmp_path) == ["figure.json"]
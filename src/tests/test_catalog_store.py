@@ -0,0 +1,149 @@
+"""
+Tests of the band reads of the resolved binaries catalogs, compared with
+the selection of the band in the whole catalog
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+import catalog_reader  # pylint: disable=import-error
+from catalog_store import CatalogStore  # pylint: disable=import-error
+
+DURATION_REF = 4.5  # years
+CATALOG_SIZE = 2000
+BANDS = [[-4.0, -1.0], [-3.2, -2.9], [-2.501, -2.5], [0.0, 1.0], [-6.0, 0.0]]
+
+
+def write_catalog(path, seed):
+    """
+    Write a catalog of resolved binaries in the format of the data files
+
+    :return array: the catalog
+    """
+    rng = np.random.default_rng(seed)
+    catalog = np.zeros(
+        CATALOG_SIZE, dtype=[("freq", float), ("sh", float), ("snr", float)]
+    )
+    catalog["freq"] = 10 ** rng.uniform(-4.5, -1.5, CATALOG_SIZE)
+    catalog["sh"] = 10 ** rng.uniform(-42, -38, CATALOG_SIZE)
+    catalog["snr"] = rng.uniform(7, 100, CATALOG_SIZE)
+    np.save(path, catalog)
+
+    return catalog
+
+
+def select_band(catalog, x_range, snr_min=None):
+    """
+    Select the binaries of a band in the whole catalog, as the page did
+    before the catalogs were sorted
+
+    :return tuple: frequency and characteristic strain sorted by frequency
+    """
+    freq = catalog["freq"]
+    selected = (freq >= 10 ** x_range[0]) & (freq <= 10 ** x_range[1])
+    if snr_min is not None:
+        selected &= catalog["snr"] >= snr_min
+    order = np.argsort(freq[selected])
+
+    return (
+        freq[selected][order],
+        np.sqrt(freq * catalog["sh"])[selected][order],
+    )
+
+
+@pytest.fixture(name="data_file")
+def fixture_data_file(tmp_path, monkeypatch):
+    # many small chunks, so that the bands span several reads
+    monkeypatch.setattr(catalog_reader, "CHUNK_SIZE", 64)
+    data_file = str(tmp_path / "gb_4.5_yr.npy")
+    write_catalog(data_file, seed=0)
+
+    return data_file
+
+
+@pytest.mark.parametrize("x_range", BANDS)
+def test_band_matches_whole_catalog(data_file, x_range):
+    catalog = np.load(data_file)
+    store = CatalogStore()
+
+    freq, strain, log_freq, log_strain = store.get_resolved_binaries(
+        data_file, x_range, "scird", DURATION_REF, DURATION_REF
+    )
+
+    expected_freq, expected_strain = select_band(catalog, x_range)
+    np.testing.assert_array_equal(freq, expected_freq)
+    np.testing.assert_allclose(strain, expected_strain)
+    np.testing.assert_allclose(log_freq, np.log10(expected_freq))
+    np.testing.assert_allclose(log_strain, np.log10(expected_strain))
+    store.clear()
+
+
+@pytest.mark.parametrize("x_range", BANDS)
+def test_band_above_snr_floor(data_file, x_range):
+    catalog = np.load(data_file)
+    store = CatalogStore()
+
+    freq, strain, _, _ = store.get_resolved_binaries(
+        data_file, x_range, "scird", DURATION_REF, DURATION_REF, snr_min=50
+    )
+
+    expected_freq, expected_strain = select_band(catalog, x_range, snr_min=50)
+    np.testing.assert_array_equal(freq, expected_freq)
+    np.testing.assert_allclose(strain, expected_strain)
+    store.clear()
+
+
+def test_band_at_shorter_duration(data_file, monkeypatch):
+    catalog = np.load(data_file)
+    resolving_durations = np.random.default_rng(1).uniform(0.5, 4.5, CATALOG_SIZE)
+    store = CatalogStore()
+    monkeypatch.setattr(
+        "catalog_store.duration_tables.get_resolving_durations",
+        lambda data_file, noise, duration_ref: resolving_durations,
+    )
+
+    freq, strain, _, _ = store.get_resolved_binaries(
+        data_file, [-4.0, -2.0], "scird", DURATION_REF, 2.5
+    )
+
+    # the whole catalog masked with the resolving durations
+    resolved = catalog[resolving_durations <= 2.5]
+    expected_freq, expected_strain = select_band(resolved, [-4.0, -2.0])
+    np.testing.assert_array_equal(freq, expected_freq)
+    np.testing.assert_allclose(strain, expected_strain * np.sqrt(2.5 / DURATION_REF))
+    store.clear()
+
+
+def test_reads_bounded_in_chunks(data_file):
+    catalog = np.load(data_file)
+    store = CatalogStore()
+    reader = store.get_reader(data_file)
+
+    parts = list(reader.iter_read(10**-4, 10**-2, max_chunks=2))
+
+    assert len(parts) > 1
+    assert all(len(part[0]) <= 2 * catalog_reader.CHUNK_SIZE for part in parts)
+    freq = np.concatenate([part[0] for part in parts])
+    catalog_index = np.concatenate([part[3] for part in parts])
+    np.testing.assert_array_equal(freq, select_band(catalog, [-4, -2])[0])
+    np.testing.assert_array_equal(catalog["freq"][catalog_index], freq)
+    store.clear()
+
+
+def test_catalog_converted_again_when_modified(data_file):
+    store = CatalogStore()
+    store.get_resolved_binaries(data_file, [-4, -1], "scird", DURATION_REF, 4.5)
+    store.clear()
+
+    catalog = write_catalog(data_file, seed=1)
+    sorted_file = catalog_reader.get_sorted_file(data_file)
+    mtime = os.path.getmtime(sorted_file)
+    os.utime(data_file, (mtime + 10, mtime + 10))
+
+    freq, _, _, _ = store.get_resolved_binaries(
+        data_file, [-4, -1], "scird", DURATION_REF, 4.5
+    )
+    np.testing.assert_array_equal(freq, select_band(catalog, [-4, -1])[0])
+    store.clear()
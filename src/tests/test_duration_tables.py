@@ -0,0 +1,133 @@
+"""
+Tests of the interpolation of the quantities tabulated on mission durations
+"""
+
+import numpy as np
+import pytest
+
+import duration_tables  # pylint: disable=import-error
+from vgb_table import VerificationBinariesTable  # pylint: disable=import-error
+
+
+def confusion_psd(freq, duration):
+    """Confusion noise model decreasing with the duration"""
+    return 1e-40 * (freq / 1e-3) ** -2 / duration
+
+
+@pytest.fixture(name="tables")
+def fixture_tables(tmp_path, monkeypatch):
+    calls = []
+
+    def compute_confusion_psd(freq, duration):
+        calls.append(float(duration))
+        return confusion_psd(freq, duration)
+
+    monkeypatch.setattr(duration_tables, "compute_confusion_psd", compute_confusion_psd)
+    tables = duration_tables.DurationTables(str(tmp_path / "confusion.npz"))
+    # the table file is written on first use
+    tables.get_confusion_table()
+    calls.clear()
+    tables.calls = calls
+
+    return tables
+
+
+def test_duration_grid():
+    np.testing.assert_allclose(
+        duration_tables.get_duration_grid(2.2), [0.5, 1.0, 1.5, 2.0, 2.2]
+    )
+    np.testing.assert_allclose(
+        duration_tables.get_duration_grid(2.0), [0.5, 1.0, 1.5, 2.0]
+    )
+
+
+@pytest.mark.parametrize(
+    "duration, between",
+    [(0.5, False), (0.7, True), (4.5, False), (4.5 + 1e-12, False), (10.0, False)],
+)
+def test_is_between_rows(duration, between):
+    durations = duration_tables.get_duration_grid()
+
+    assert duration_tables.is_between_rows(durations, duration) == between
+
+
+def test_interpolate_rows():
+    durations = np.array([1.0, 2.0, 4.0])
+    table = np.array([[0.0, 1.0], [2.0, 3.0], [6.0, 7.0]])
+
+    np.testing.assert_allclose(
+        duration_tables.interpolate_rows(durations, table, 3.0), [4.0, 5.0]
+    )
+    np.testing.assert_allclose(
+        duration_tables.interpolate_rows(durations, table, 2.0), [2.0, 3.0]
+    )
+    # clipped to the durations of the table
+    np.testing.assert_allclose(
+        duration_tables.interpolate_rows(durations, table, 8.0), [6.0, 7.0]
+    )
+
+
+def test_confusion_psd_exact_on_the_table_durations(tables):
+    freq = np.logspace(-4, -1, 333)
+
+    psd = tables.get_confusion_psd(freq, 4.5)
+
+    np.testing.assert_array_equal(psd, confusion_psd(freq, 4.5))
+    assert tables.calls == [4.5]
+
+
+def test_confusion_psd_interpolated_between_durations(tables):
+    freq = np.logspace(-4, -1, 333)
+
+    psd = tables.get_confusion_psd(freq, 4.7)
+
+    assert not tables.calls
+    # log10 of the psd interpolated linearly between 4.5 and 5.0 years
+    expected = 10 ** (
+        0.6 * np.log10(confusion_psd(freq, 4.5))
+        + 0.4 * np.log10(confusion_psd(freq, 5.0))
+    )
+    np.testing.assert_allclose(psd, expected, rtol=1e-6)
+
+
+class SyntheticTable(VerificationBinariesTable):
+    """Verification binaries table with a sensitivity linear in the duration"""
+
+    def __init__(self, data_file):
+        super().__init__(data_file)
+        self.computed = []
+
+    def compute_table(self, noise, duration):
+        self.computed.append(float(duration))
+        freq = np.ascontiguousarray(self.catalog["Frequency"])
+        return freq, freq * 0 + 1 / duration, freq * 0 + 10 * duration
+
+
+@pytest.fixture(name="vgb_table")
+def fixture_vgb_table(tmp_path):
+    catalog = np.zeros(3, dtype=[("Name", "<U10"), ("Frequency", "<f8")])
+    catalog["Name"] = ["A", "B", "C"]
+    catalog["Frequency"] = [1e-3, 2e-3, 3e-3]
+    data_file = str(tmp_path / "vgb.npy")
+    np.save(data_file, catalog)
+
+    return SyntheticTable(data_file)
+
+
+def test_vgb_table_interpolated_between_durations(vgb_table):
+    for duration in (4.6, 4.7, 4.8, 4.9):
+        freq, strain, snr = vgb_table.get_table("scird", duration)
+        np.testing.assert_allclose(snr, 10 * duration)
+        np.testing.assert_allclose(freq, [1e-3, 2e-3, 3e-3])
+        assert not snr.flags.writeable
+
+    # only the tables of the neighbouring durations are computed
+    assert vgb_table.computed == [4.5, 5.0]
+    np.testing.assert_allclose(strain, 0.2 * (1 / 4.5) + 0.8 * (1 / 5.0))
+
+
+def test_vgb_table_exact_on_the_table_durations(vgb_table):
+    _, strain, _ = vgb_table.get_table("scird", 4.5)
+
+    np.testing.assert_allclose(strain, 1 / 4.5)
+    assert vgb_table.computed == [4.5]
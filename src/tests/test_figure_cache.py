@@ -0,0 +1,125 @@
+"""
+Tests of the keys and versions of the figure cache
+"""
+
+import os
+
+import plotly.graph_objects as go
+import pytest
+
+from figure_cache import FigureCache, make_version  # pylint: disable=import-error
+
+
+class FakeConfManager:
+    """Configuration manager reading a list of data files"""
+
+    def __init__(self, path_2_ini_file, data_files):
+        self.path_2_ini_file = path_2_ini_file
+        self.data_files = data_files
+        self.checks = 0
+
+    def get_data_files(self):
+        return self.data_files
+
+    def check_for_update(self):
+        self.checks += 1
+
+
+def build_figure(noise, duration):
+    return go.Figure(go.Scatter(x=[1, 2], y=[duration, duration], name=noise))
+
+
+@pytest.fixture(name="conf_manager")
+def fixture_conf_manager(tmp_path):
+    ini_file = tmp_path / "configuration.ini"
+    ini_file.write_text("[SO1.sensitivity.resolved_binaries]\n")
+    data_file = tmp_path / "gb.npy"
+    data_file.write_bytes(b"catalog")
+
+    return FakeConfManager(str(ini_file), [str(data_file)])
+
+
+@pytest.fixture(name="cache")
+def fixture_cache(tmp_path):
+    return FigureCache(cache_dir=str(tmp_path / "figures"))
+
+
+def test_make_key_depends_on_inputs(cache):
+    key = cache.make_key("so1.build_figure", ["scird", 4.5])
+
+    assert key == cache.make_key("so1.build_figure", ["scird", 4.5])
+    assert key != cache.make_key("so1.build_figure", ["scird", 7.5])
+    assert key != cache.make_key("so1.other_figure", ["scird", 4.5])
+
+
+def test_cached_serves_stored_figure(cache, conf_manager):
+    calls = []
+
+    @cache.cached("so1.build_figure", conf_manager)
+    def cached_figure(noise, duration):
+        calls.append((noise, duration))
+        return build_figure(noise, duration)
+
+    first = cached_figure("scird", 4.5)
+    second = cached_figure("scird", 4.5)
+
+    assert first == second
+    assert calls == [("scird", 4.5)]
+    assert cache.stats["so1.build_figure"] == {"hit": 1, "miss": 1}
+    assert conf_manager.checks == 2
+
+
+def test_figures_shared_through_disk(tmp_path, cache, conf_manager):
+    @cache.cached("so1.build_figure", conf_manager)
+    def cached_figure(noise, duration):
+        return build_figure(noise, duration)
+
+    cached_figure("scird", 4.5)
+
+    # another worker with the same directory and version
+    other = FigureCache(cache_dir=str(tmp_path / "figures"))
+    other.cached("so1.build_figure", conf_manager)(build_figure)
+    assert other.contains("so1.build_figure", ("scird", 4.5))
+    assert not other.contains("so1.build_figure", ("scird", 7.5))
+
+
+def test_version_changes_with_data_files(conf_manager):
+    version = make_version(build_figure, conf_manager)
+    assert version == make_version(build_figure, conf_manager)
+
+    data_file = conf_manager.data_files[0]
+    with open(data_file, "ab") as file:
+        file.write(b" updated")
+
+    assert make_version(build_figure, conf_manager) != version
+
+
+def test_clear_updates_versions(cache, conf_manager):
+    @cache.cached("so1.build_figure", conf_manager)
+    def cached_figure(noise, duration):
+        return build_figure(noise, duration)
+
+    cached_figure("scird", 4.5)
+    key = cache.make_key("so1.build_figure", ("scird", 4.5))
+
+    data_file = conf_manager.data_files[0]
+    with open(data_file, "ab") as file:
+        file.write(b" updated")
+    cache.clear()
+
+    assert not os.listdir(cache.cache_dir)
+    assert cache.make_key("so1.build_figure", ("scird", 4.5)) != key
+    assert not cache.contains("so1.build_figure", ("scird", 4.5))
+
+
+def test_evict_least_recently_used(tmp_path):
+    cache = FigureCache(
+        cache_dir=str(tmp_path / "figures"), max_memory_items=1, max_disk_size=15
+    )
+    cache.set("a", "0123456789")
+    os.utime(cache.get_path("a"), (0, 0))
+    cache.set("b", "0123456789")
+
+    assert not os.path.exists(cache.get_path("a"))
+    assert cache.get("b") == "0123456789"
+    assert cache.get("a") is None
@@ -0,0 +1,158 @@
+"""
+Tests of the reduction of the points sent to the browser
+"""
+
+import numpy as np
+import pytest
+
+import level_of_detail  # pylint: disable=import-error
+from waterfall_store import build_pyramid  # pylint: disable=import-error
+
+X_RANGE = [-4.0, -1.0]
+Y_RANGE = [-24.0, -18.0]
+
+
+@pytest.fixture(name="points")
+def fixture_points():
+    rng = np.random.default_rng(1)
+    # a dense cluster, a uniform background and an isolated binary
+    log_x = np.concatenate(
+        (rng.normal(-2.5, 0.05, 40000), rng.uniform(-5, 0, 10000), [-3.9])
+    )
+    log_y = np.concatenate(
+        (rng.normal(-21, 0.05, 40000), rng.uniform(-25, -17, 10000), [-23.9])
+    )
+
+    return log_x, log_y
+
+
+def get_cells(log_x, log_y):
+    """Return the cell of the density grid of the viewport of each point"""
+    size = level_of_detail.GRID_SIZE
+    cell_x = ((log_x - X_RANGE[0]) / (X_RANGE[1] - X_RANGE[0]) * size).astype(int)
+    cell_y = ((log_y - Y_RANGE[0]) / (Y_RANGE[1] - Y_RANGE[0]) * size).astype(int)
+
+    return np.clip(cell_x, 0, size - 1) * size + np.clip(cell_y, 0, size - 1)
+
+
+def test_decimate_keeps_small_sets(points):
+    log_x, log_y = points
+
+    indices = level_of_detail.decimate(
+        log_x, log_y, X_RANGE, Y_RANGE, max_points=len(log_x)
+    )
+
+    inside = (
+        (log_x >= X_RANGE[0])
+        & (log_x <= X_RANGE[1])
+        & (log_y >= Y_RANGE[0])
+        & (log_y <= Y_RANGE[1])
+    )
+    np.testing.assert_array_equal(indices, np.flatnonzero(inside))
+
+
+def test_decimate_bounds_the_number_of_points(points):
+    log_x, log_y = points
+    max_points = 2000
+
+    indices = level_of_detail.decimate(
+        log_x, log_y, X_RANGE, Y_RANGE, max_points=max_points
+    )
+
+    assert len(indices) <= max_points + level_of_detail.GRID_SIZE**2
+    assert np.all(np.diff(indices) > 0)
+    assert np.all((log_x[indices] >= X_RANGE[0]) & (log_x[indices] <= X_RANGE[1]))
+    assert np.all((log_y[indices] >= Y_RANGE[0]) & (log_y[indices] <= Y_RANGE[1]))
+
+
+def test_decimate_keeps_every_populated_cell(points):
+    log_x, log_y = points
+
+    indices = level_of_detail.decimate(log_x, log_y, X_RANGE, Y_RANGE, max_points=2000)
+
+    inside = level_of_detail.decimate(
+        log_x, log_y, X_RANGE, Y_RANGE, max_points=len(log_x)
+    )
+    assert set(get_cells(log_x[indices], log_y[indices])) == set(
+        get_cells(log_x[inside], log_y[inside])
+    )
+    # the isolated binary is kept
+    assert len(log_x) - 1 in indices
+
+
+def test_decimate_is_deterministic(points):
+    log_x, log_y = points
+
+    np.testing.assert_array_equal(
+        level_of_detail.decimate(log_x, log_y, X_RANGE, Y_RANGE, max_points=2000),
+        level_of_detail.decimate(log_x, log_y, X_RANGE, Y_RANGE, max_points=2000),
+    )
+
+
+@pytest.fixture(name="pyramid")
+def fixture_pyramid():
+    m_source_axis = np.logspace(3, 9, 600)
+    z_axis = np.linspace(0.1, 20, 300)
+    snr_mesh = np.outer(1 / z_axis, np.sqrt(m_source_axis))
+
+    return build_pyramid(m_source_axis, z_axis, snr_mesh)
+
+
+def check_region(pyramid, x_range, y_range, display_size):
+    """
+    Select the mesh of a region and check that it covers the region
+    with at most display_size points per axis
+
+    :return tuple: x axis, y axis and mesh of the region
+    """
+    x_axis, y_axis, mesh = level_of_detail.select_mesh(
+        pyramid, x_range, y_range, log_x=True, display_size=display_size
+    )
+    full_x_axis, full_y_axis, _ = pyramid[0]
+
+    assert mesh.shape == (len(y_axis), len(x_axis))
+    assert len(x_axis) <= display_size + 1
+    assert len(y_axis) <= display_size + 1
+    assert x_axis[0] <= max(10 ** x_range[0], full_x_axis[0])
+    assert x_axis[-1] >= min(10 ** x_range[1], full_x_axis[-1])
+    assert y_axis[0] <= max(y_range[0], full_y_axis[0])
+    assert y_axis[-1] >= min(y_range[1], full_y_axis[-1])
+
+    return x_axis, y_axis, mesh
+
+
+def test_select_mesh_unzoomed_uses_a_coarse_level(pyramid):
+    x_axis, y_axis, _ = check_region(pyramid, [3, 9], [0.1, 20], display_size=64)
+
+    # the coarsest level with at least 64 points per axis
+    level_x_axis, level_y_axis, level_mesh = pyramid[2]
+    assert min(level_mesh.shape) >= 64 > min(pyramid[3][2].shape)
+    assert set(x_axis) <= set(level_x_axis)
+    assert set(y_axis) <= set(level_y_axis)
+
+
+def test_select_mesh_zoomed_uses_full_resolution(pyramid):
+    x_axis, y_axis, mesh = check_region(pyramid, [5, 5.2], [3, 4], display_size=64)
+
+    full_x_axis, full_y_axis, full_mesh = pyramid[0]
+    columns = np.searchsorted(full_x_axis, x_axis)
+    rows = np.searchsorted(full_y_axis, y_axis)
+    np.testing.assert_array_equal(full_x_axis[columns], x_axis)
+    np.testing.assert_array_equal(mesh, full_mesh[np.ix_(rows, columns)])
+
+
+def test_select_mesh_samples_an_unzoomed_axis(pyramid):
+    x_axis, y_axis, _ = check_region(pyramid, [5, 5.2], [0.1, 20], display_size=16)
+
+    assert len(x_axis) <= 17
+    assert len(y_axis) <= 17
+
+
+def test_select_mesh_outside_of_the_axes(pyramid):
+    x_axis, y_axis, mesh = level_of_detail.select_mesh(
+        pyramid, [10, 11], [30, 40], log_x=True, display_size=64
+    )
+
+    assert mesh.shape == (len(y_axis), len(x_axis))
+    assert len(x_axis) >= 1
+    assert len(y_axis) >= 1
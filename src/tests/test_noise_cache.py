@@ -0,0 +1,51 @@
+"""
+Tests of the resampling of the noise curves
+"""
+
+import numpy as np
+
+from noise_cache import cap_density, select_by_curvature  # pylint: disable=import-error
+
+
+def test_select_by_curvature_keeps_short_curves():
+    np.testing.assert_array_equal(
+        select_by_curvature(np.zeros(10), size=20), np.arange(10)
+    )
+
+
+def test_select_by_curvature_bounds():
+    log_freq = np.linspace(-5, 0, 20000)
+    log_curve = np.abs(log_freq + 2.5)
+
+    indices = select_by_curvature(log_curve, size=1000)
+
+    assert indices[0] == 0
+    assert indices[-1] == len(log_freq) - 1
+    assert np.all(np.diff(indices) > 0)
+    assert 0.95 * 1000 <= len(indices) <= 1000 + 2
+
+
+def test_select_by_curvature_follows_the_bends():
+    log_freq = np.linspace(-5, 0, 20000)
+    # two straight lines joined by a bend around -2.5, and a straight curve
+    log_curves = (np.sqrt((log_freq + 2.5) ** 2 + 0.01), 0.1 * log_freq)
+
+    indices = select_by_curvature(*log_curves, size=1000)
+
+    near_bend = np.abs(log_freq[indices] + 2.5) < 0.25
+    # the bend spans 10 % of the band
+    assert np.count_nonzero(near_bend) > 0.4 * len(indices)
+    # the straight parts keep a few points
+    assert np.count_nonzero(log_freq[indices] < -3) > 10
+    assert np.count_nonzero(log_freq[indices] > -2) > 10
+
+
+def test_cap_density():
+    density = np.ones(100)
+    density[10] = 1000
+
+    capped = cap_density(density, size=10)
+
+    assert capped.max() <= capped.sum() / 10 + 1e-12
+    np.testing.assert_array_equal(np.delete(capped, 10), 1)
+    np.testing.assert_array_equal(cap_density(np.ones(100), size=10), 1)
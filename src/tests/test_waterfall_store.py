@@ -0,0 +1,50 @@
+"""
+Tests of the pyramid of the waterfall meshes
+"""
+
+import numpy as np
+
+import waterfall_store  # pylint: disable=import-error
+
+
+def test_build_pyramid_levels():
+    m_source_axis = np.logspace(3, 9, 301)
+    z_axis = np.linspace(0.1, 20, 150)
+    snr_mesh = np.outer(z_axis, m_source_axis)
+
+    pyramid = waterfall_store.build_pyramid(
+        m_source_axis, z_axis, snr_mesh, min_size=16
+    )
+
+    shapes = [level[2].shape for level in pyramid]
+    assert shapes == [(150, 301), (76, 151), (39, 76), (20, 39)]
+
+    for previous, level in zip(pyramid, pyramid[1:]):
+        # the bounds of the axes are kept by every level
+        for previous_axis, axis in zip(previous[:2], level[:2]):
+            assert axis[0] == previous_axis[0]
+            assert axis[-1] == previous_axis[-1]
+            assert set(axis) <= set(previous_axis)
+
+    for m_axis, z_level_axis, log_snr in pyramid:
+        assert log_snr.shape == (len(z_level_axis), len(m_axis))
+        np.testing.assert_allclose(
+            log_snr,
+            np.log10(
+                np.clip(
+                    np.outer(z_level_axis, m_axis),
+                    waterfall_store.SNR_MIN,
+                    waterfall_store.SNR_MAX,
+                )
+            ),
+        )
+        assert not log_snr.flags.writeable
+
+
+def test_build_pyramid_small_mesh():
+    pyramid = waterfall_store.build_pyramid(
+        np.arange(10.0), np.arange(5.0), np.ones((5, 10)), min_size=4
+    )
+
+    assert len(pyramid) == 1
+    np.testing.assert_array_equal(pyramid[0][2], np.zeros((5, 10)))
@@ -0,0 +1,243 @@
+"""
+Store the sensitivity of the verification binaries
+in order to compute it only once per configuration
+"""
+
+from collections import OrderedDict
+import threading
+
+import numpy as np
+
+from artifacts import artifacts, get_vgb_table_name  # pylint: disable=import-error
+from duration_tables import (  # pylint: disable=import-error
+    get_duration_grid,
+    interpolate_rows,
+    is_between_rows,
+)
+from shared_arrays import shared_arrays  # pylint: disable=import-error
+
+
+class VerificationBinariesTable:
+    """
+    Compute the frequency, characteristic strain and SNR of every
+    verification binary once per (noise budget, mission duration) pair
+    so that any selection of binaries is an index into stored arrays.
+
+    The catalog is loaded on first use, and the least recently used
+    configurations are evicted when more than max_size configurations
+    are stored.
+    """
+
+    def __init__(self, data_file, max_size=8):
+        self.data_file = data_file
+        self.max_size = max_size
+        self._catalog = None
+        self._names = None
+        self._name_index = None
+        self._tables = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load_catalog(self):
+        """
+        Load the catalog of verification binaries if it is not already loaded
+
+        :return array: catalog of verification binaries
+        """
+        with self._lock:
+            if self._catalog is None:
+                # mapped read only, the pages of the catalog being
+                # shared by the workers of the server
+                catalog = shared_arrays.get_array(self.data_file)
+                self._names = catalog["Name"]
+                self._name_index = {
+                    name: index for index, name in enumerate(self._names)
+                }
+                self._catalog = catalog
+
+            return self._catalog
+
+    @property
+    def catalog(self):
+        """Catalog of verification binaries"""
+        return self.load_catalog()
+
+    @property
+    def names(self):
+        """Names of the verification binaries, in catalog order"""
+        self.load_catalog()
+        return self._names
+
+    @property
+    def name_index(self):
+        """Row of each verification binary in the catalog, by name"""
+        self.load_catalog()
+        return self._name_index
+
+    def get_table(self, noise, duration):
+        """
+        Return the sensitivity of the whole catalog for a configuration
+
+        It is computed on the durations of the duration tables and for the
+        precomputed configurations, and interpolated between the durations
+        of the tables otherwise, so that moving the duration slider does not
+        compute the sensitivity of the binaries at every step.
+
+        :param string noise: name of the noise budget
+        :param float duration: mission duration in years
+
+        :return tuple: frequency, characteristic strain and SNR
+            of every verification binary
+        """
+        durations = get_duration_grid()
+        if (
+            not is_between_rows(durations, duration)
+            or artifacts.get_path(get_vgb_table_name(self.data_file, noise, duration))
+            is not None
+        ):
+            return self.get_exact_table(noise, duration)
+
+        index = np.searchsorted(durations, float(duration))
+        neighbours = durations[index - 1 : index + 1]
+        tables = [self.get_exact_table(noise, node) for node in neighbours]
+
+        table = tuple(
+            interpolate_rows(neighbours, np.stack(arrays), duration)
+            for arrays in zip(*tables)
+        )
+        # the arrays are shared between callbacks and must not be modified
+        for array in table:
+            array.flags.writeable = False
+
+        return table
+
+    def get_exact_table(self, noise, duration):
+        """
+        Return the sensitivity of the whole catalog for a configuration,
+        computing it if it is not already stored
+
+        :param string noise: name of the noise budget
+        :param float duration: mission duration in years
+
+        :return tuple: frequency, characteristic strain and SNR
+            of every verification binary
+        """
+        key = (noise, float(duration))
+
+        with self._lock:
+            if key in self._tables:
+                self._tables.move_to_end(key)
+                return self._tables[key]
+
+        table = artifacts.load_arrays(
+            get_vgb_table_name(self.data_file, noise, duration),
+            ("freq", "strain", "snr"),
+        ) or self.compute_table(noise, float(duration))
+
+        with self._lock:
+            self._tables[key] = table
+            self._tables.move_to_end(key)
+            while len(self._tables) > self.max_size:
+                self._tables.popitem(last=False)
+
+        return table
+
+    def compute_table(self, noise, duration):
+        """
+        Compute the sensitivity of the whole catalog
+
+        :param string noise: name of the noise budget
+        :param float duration: mission duration in years
+
+        :return tuple: frequency, characteristic strain and SNR
+            of every verification binary
+        """
+        freq, sh, snr = compute_gb_sensitivity(self.catalog, noise, duration)
+        strain = np.sqrt(freq * sh)
+
+        # the arrays are shared between callbacks and must not be modified
+        for array in (freq, strain, snr):
+            array.flags.writeable = False
+
+        return freq, strain, snr
+
+    def get_indices(self, selected_names, select_all=False):
+        """
+        Return the rows of the selected binaries in catalog order
+
+        :param list selected_names: names of the selected binaries
+        :param boolean select_all: True to select the whole catalog,
+            whatever the selected names
+
+        :return array: indices of the selected binaries
+        """
+        if select_all:
+            return np.arange(len(self.names))
+
+        indices = [
+            self.name_index[name] for name in selected_names if name in self.name_index
+        ]
+        return np.unique(np.array(indices, dtype=np.intp))
+
+    def select(self, selected_names, noise, duration, select_all=False):
+        """
+        Return the sensitivity of the selected binaries for a configuration
+
+        :param list selected_names: names of the selected binaries
+        :param string noise: name of the noise budget
+        :param float duration: mission duration in years
+        :param boolean select_all: True to select the whole catalog
+
+        :return tuple: name, frequency, characteristic strain and SNR
+            of the selected binaries
+        """
+        freq, strain, snr = self.get_table(noise, duration)
+        indices = self.get_indices(selected_names, select_all)
+
+        return self.names[indices], freq[indices], strain[indices], snr[indices]
+
+    def set_data_file(self, data_file):
+        """
+        Change the catalog of verification binaries, loaded on next use,
+        and remove every stored configuration
+
+        :param string data_file: path to the catalog
+        """
+        with self._lock:
+            self.data_file = data_file
+            self._catalog = None
+            self._names = None
+            self._name_index = None
+            self._tables.clear()
+
+    def clear(self):
+        """Remove every stored configuration"""
+        with self._lock:
+            self._tables.clear()
+
+
+def compute_gb_sensitivity(catalog, noise, duration):
+    """
+    Compute the sensitivity of galactic binaries
+
+    :param array catalog: galactic binaries, with the fields of the
+        verification binaries catalog
+    :param string noise: name of the noise budget
+    :param float duration: mission duration in years
+
+    :return tuple: frequency, sh and SNR of every binary
+    """
+    # imported on first use in order to speed up the start of the server
+    # pylint: disable=import-outside-toplevel,import-error
+    from fomweb import sensitivity
+
+    table = sensitivity.compute_gb_sensitivity(
+        catalog=catalog,
+        noise=noise,
+        duration=duration,
+    )
+
+    freq = np.array([float(vgb["freq"]) for vgb in table])
+    sh = np.array([float(vgb["sh"]) for vgb in table])
+    snr = np.array([float(vgb["snr"]) for vgb in table])
+
+    return freq, sh, snr
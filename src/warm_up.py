@@ -0,0 +1,152 @@
+"""
+Fill the data and figure caches of every configuration of the
+configuration file in a background thread when a worker starts,
+and report the progress on /ready for the load balancer
+"""
+
+import os
+import threading
+import time
+
+import flask
+
+# Constants
+READY_PATH = "/ready"
+ENABLED = os.environ.get("WARM_UP", "1") != "0"
+HOT_PRIORITY = 0  # tasks which must be finished before the worker is ready
+
+
+class WarmUpScheduler:
+    """
+    Run the warm-up functions registered by the pages for each
+    (noise budget, mission duration) configuration, in priority order:
+    the configuration selected by default in the sidebar first, for every
+    page, then the others. The worker is ready once the tasks of the
+    default configuration are finished, the others being run afterwards.
+
+    A failed task is reported and does not stop the following ones.
+    """
+
+    def __init__(self):
+        self._warm_ups = []
+        self._tasks = []
+        self._finished = []
+        self._failed = {}
+        self._current = None
+        self._started = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def register(self, name, function):
+        """
+        Add the warm-up function of a page
+
+        :param string name: name of the page in the task names
+        :param function function: function called with a noise budget and
+            a mission duration, filling the caches of the page
+        """
+        self._warm_ups.append((name, function))
+
+    def start(self, configurations, default_configuration):
+        """
+        Start the warm-up thread
+
+        :param list configurations: (noise budget, mission duration) pairs
+        :param tuple default_configuration: pair selected by default
+        """
+        tasks = []
+        for noise, duration in configurations:
+            priority = HOT_PRIORITY + int(
+                (noise, float(duration)) != tuple(default_configuration)
+            )
+            for name, function in self._warm_ups:
+                tasks.append(
+                    (
+                        priority,
+                        f"{name}[{noise},{float(duration):g}]",
+                        function,
+                        (noise, float(duration)),
+                    )
+                )
+        # stable sort, the pages keep their registration order
+        tasks.sort(key=lambda task: task[0])
+
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._tasks = tasks
+            self._started = time.monotonic()
+            self._thread = threading.Thread(
+                target=self.run, name="warm-up", daemon=True
+            )
+        self._thread.start()
+
+    def run(self):
+        """Run the tasks one after the other"""
+        for _, name, function, args in self._tasks:
+            with self._lock:
+                self._current = name
+            try:
+                function(*args)
+            except Exception as error:  # pylint: disable=broad-except
+                with self._lock:
+                    self._failed[name] = repr(error)
+            with self._lock:
+                self._finished.append(name)
+
+        with self._lock:
+            self._current = None
+
+    def is_ready(self):
+        """
+        Return if the hot tasks are finished
+
+        :return boolean: True once the tasks of the default
+            configuration are finished, or if no warm-up was started
+        """
+        with self._lock:
+            if self._thread is None:
+                return True
+
+            return all(
+                name in self._finished
+                for priority, name, _, _ in self._tasks
+                if priority == HOT_PRIORITY
+            )
+
+    def get_status(self):
+        """
+        Return the progress of the warm-up
+
+        :return dict: readiness, finished and total tasks,
+            running task, failed tasks and elapsed time in seconds
+        """
+        ready = self.is_ready()
+        with self._lock:
+            return {
+                "ready": ready,
+                "finished": len(self._finished),
+                "total": len(self._tasks),
+                "running": self._current,
+                "failed": dict(self._failed),
+                "elapsed": (
+                    0.0 if self._started is None else time.monotonic() - self._started
+                ),
+            }
+
+
+warm_up_scheduler = WarmUpScheduler()
+
+
+def install(server):
+    """
+    Add the /ready route to the Flask server of a Dash application,
+    answering 503 until the hot paths are warm
+
+    :param Flask server: server of the Dash application
+    """
+
+    @server.route(READY_PATH)
+    def ready():
+        status = warm_up_scheduler.get_status()
+        return flask.jsonify(status), 200 if status["ready"] else 503
@@ -0,0 +1,261 @@
+"""
+Store the SNR meshes of the waterfall plot as memory mapped arrays
+in order to remove pickle deserialization from the callbacks, along with
+a pyramid of downsampled meshes of the plotted log10 of the SNR
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+
+from config_manager import ConfigManager  # pylint: disable=import-error
+from duration_tables import save_array  # pylint: disable=import-error
+from shared_arrays import shared_arrays  # pylint: disable=import-error
+
+# Constants
+ARRAY_DIR_SUFFIX = "_npy"
+SNR_MIN = 1.0  # SNR plotted below which the mesh is clipped
+SNR_MAX = 4000.0  # SNR plotted above which the mesh is clipped
+PYRAMID_MIN_SIZE = 32  # points per axis of the coarsest level of the pyramid
+
+
+class WaterfallStore:
+    """
+    Open the converted SNR meshes memory mapped, converting the pickle
+    files the first time they are used, and keep them open.
+
+    The pyramid of a mesh holds the clipped log10 of the SNR at the full
+    resolution then downsampled by 2 per level, so that the plot only
+    sends the resolution needed by the displayed region.
+    """
+
+    def __init__(self):
+        self._waterfalls = {}
+        self._pyramids = {}
+        self._lock = threading.Lock()
+
+    def get_waterfall(self, data_file):
+        """
+        Return the arrays plotted on the waterfall page
+
+        :param string data_file: path to the pickle file of the SNR meshes
+
+        :return tuple: total mass axis, redshift axis and SNR mesh
+        """
+        with self._lock:
+            if data_file in self._waterfalls:
+                return self._waterfalls[data_file]
+
+        array_dir = get_array_dir(data_file)
+        if not is_converted(data_file):
+            convert_waterfall(data_file)
+
+        waterfall = tuple(
+            shared_arrays.get_array(os.path.join(array_dir, name + ".npy"))
+            for name in ("m_source_axis", "z_axis", "snr_mesh")
+        )
+
+        with self._lock:
+            self._waterfalls[data_file] = waterfall
+
+        return waterfall
+
+    def get_pyramid(self, data_file):
+        """
+        Return the pyramid of the plotted meshes of a pickle file,
+        computing it if the converted meshes do not have one
+
+        :param string data_file: path to the pickle file of the SNR meshes
+
+        :return list: total mass axis, redshift axis and clipped log10 of
+            the SNR of each level, from the full resolution to the coarsest
+        """
+        with self._lock:
+            if data_file in self._pyramids:
+                return self._pyramids[data_file]
+
+        array_dir = get_array_dir(data_file)
+        if not is_converted(data_file):
+            convert_waterfall(data_file)
+        if not os.path.exists(os.path.join(array_dir, "log_snr_0.npy")):
+            save_pyramid(array_dir, build_pyramid(*self.get_waterfall(data_file)))
+
+        pyramid = load_pyramid(array_dir)
+
+        with self._lock:
+            self._pyramids[data_file] = pyramid
+
+        return pyramid
+
+    def clear(self):
+        """Forget every opened waterfall"""
+        with self._lock:
+            self._waterfalls.clear()
+            self._pyramids.clear()
+
+
+def get_array_dir(data_file):
+    """
+    Return the directory containing the converted meshes of a pickle file
+
+    :param string data_file: path to the pickle file of the SNR meshes
+
+    :return string: path to the directory of the .npy arrays
+    """
+    return os.path.splitext(data_file)[0] + ARRAY_DIR_SUFFIX
+
+
+def is_converted(data_file):
+    """
+    Return if the converted meshes of a pickle file exist
+    and are not older than the pickle file
+
+    :param string data_file: path to the pickle file of the SNR meshes
+
+    :return boolean: True if the converted meshes can be used
+    """
+    array_dir = get_array_dir(data_file)
+
+    return os.path.isdir(array_dir) and os.path.getmtime(
+        array_dir
+    ) >= os.path.getmtime(data_file)
+
+
+def convert_waterfall(data_file):
+    """
+    Convert a pickle file of SNR meshes into one uncompressed .npy file
+    per mesh, plus the 1-D axes used by the plot
+
+    :param string data_file: path to the pickle file of the SNR meshes
+
+    :return string: path to the directory of the .npy arrays
+    """
+    array_dir = get_array_dir(data_file)
+
+    # pylint: disable=unbalanced-tuple-unpacking
+    [z_mesh, m_source_mesh, snr_mesh, snr_std_mesh, _, _] = np.load(
+        data_file, allow_pickle=True
+    )
+
+    arrays = {
+        "z_mesh": z_mesh,
+        "m_source_mesh": m_source_mesh,
+        "snr_mesh": snr_mesh,
+        "snr_std_mesh": snr_std_mesh,
+        "m_source_axis": m_source_mesh[0, :],
+        "z_axis": z_mesh[:, 0],
+    }
+
+    # written in a temporary directory then renamed so that another worker
+    # never sees a partially converted directory
+    tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(array_dir) or ".")
+    try:
+        for name, array in arrays.items():
+            np.save(
+                os.path.join(tmp_dir, name + ".npy"),
+                np.ascontiguousarray(array, dtype=np.float64),
+            )
+        save_pyramid(
+            tmp_dir, build_pyramid(arrays["m_source_axis"], arrays["z_axis"], snr_mesh)
+        )
+        if os.path.isdir(array_dir):
+            # outdated conversion, the workers which mapped its arrays
+            # keep them until they open the new ones
+            old_dir = tempfile.mkdtemp(dir=os.path.dirname(array_dir) or ".")
+            os.rename(array_dir, os.path.join(old_dir, "old"))
+            shutil.rmtree(old_dir, ignore_errors=True)
+        os.rename(tmp_dir, array_dir)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not os.path.isdir(array_dir):
+            raise
+
+    return array_dir
+
+
+def build_pyramid(m_source_axis, z_axis, snr_mesh, min_size=PYRAMID_MIN_SIZE):
+    """
+    Compute the clipped log10 of an SNR mesh and downsample it by 2
+    per level, keeping the first and last points of the axes
+
+    :param array m_source_axis: total mass of the columns of the mesh
+    :param array z_axis: redshift of the rows of the mesh
+    :param array snr_mesh: SNR on the (redshift, total mass) mesh
+    :param int min_size: points per axis under which no level is added
+
+    :return list: total mass axis, redshift axis and clipped log10 of
+        the SNR of each level, from the full resolution to the coarsest
+    """
+    log_snr = np.log10(np.clip(snr_mesh, SNR_MIN, SNR_MAX))
+    pyramid = [(np.asarray(m_source_axis), np.asarray(z_axis), log_snr)]
+
+    while min(log_snr.shape) >= 2 * min_size:
+        m_source_axis, z_axis, log_snr = pyramid[-1]
+        rows = np.unique(np.append(np.arange(0, len(z_axis), 2), len(z_axis) - 1))
+        columns = np.unique(
+            np.append(np.arange(0, len(m_source_axis), 2), len(m_source_axis) - 1)
+        )
+        log_snr = log_snr[np.ix_(rows, columns)]
+        pyramid.append((m_source_axis[columns], z_axis[rows], log_snr))
+
+    # the arrays are shared between callbacks and must not be modified
+    for level in pyramid:
+        for array in level:
+            array.flags.writeable = False
+
+    return pyramid
+
+
+def save_pyramid(array_dir, pyramid):
+    """
+    Save each level of a pyramid as .npy files
+
+    :param string array_dir: directory of the converted meshes
+    :param list pyramid: total mass axis, redshift axis and clipped log10
+        of the SNR of each level
+    """
+    # the full resolution mesh is written last, its presence
+    # meaning that the whole pyramid is written
+    for level, arrays in reversed(list(enumerate(pyramid))):
+        for name, array in zip(("m_source_axis", "z_axis", "log_snr"), arrays):
+            save_array(
+                os.path.join(array_dir, f"{name}_{level}.npy"),
+                np.ascontiguousarray(array, dtype=np.float64),
+            )
+
+
+def load_pyramid(array_dir):
+    """
+    Map the levels of a pyramid saved as .npy files
+
+    :param string array_dir: directory of the pyramid
+
+    :return list: total mass axis, redshift axis and clipped log10 of
+        the SNR of each level, from the full resolution to the coarsest
+    """
+    pyramid = []
+    level = 0
+    while os.path.exists(os.path.join(array_dir, f"log_snr_{level}.npy")):
+        pyramid.append(
+            tuple(
+                shared_arrays.get_array(os.path.join(array_dir, f"{name}_{level}.npy"))
+                for name in ("m_source_axis", "z_axis", "log_snr")
+            )
+        )
+        level += 1
+
+    return pyramid
+
+
+waterfall_store = WaterfallStore()
+
+
+##############################################################################
+# Convert every waterfall listed in the configuration file
+if __name__ == "__main__":
+    conf_manager = ConfigManager("data/configuration.ini")
+    for noise in conf_manager.get_configurations("SO2.waterfall"):
+        print(convert_waterfall(conf_manager.get_data_file("SO2.waterfall", noise)))